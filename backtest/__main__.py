@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Backtest CLI. Replays candles from the candle store (see data/candle_store.py;
+fill it by running the bot or `KrakenClient(store=...)`) and writes a
+`<pair>_<tf>_ledger.csv` per pair plus one `summary.json`.
+
+    python -m backtest --pair BTC/EUR --timeframe 5m --decide ema_cross
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from backtest.engine import run_backtest
+from backtest.strategies import load_decider
+from config import load_config
+from data.candle_store import CandleStore
+from utils.logging import configure_logging, get_logger
+
+LOG = get_logger("backtest")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Backtest stored candles through the paper pipeline")
+    p.add_argument("--pair", action="append", default=None, help="Pair to replay (repeatable; default: config)")
+    p.add_argument("--timeframe", type=str, default=None, help="Candle timeframe (default: config)")
+    p.add_argument("--decide", type=str, default="ema_cross", help="Decision function: built-in name or module:function")
+    p.add_argument("--equity", type=float, default=10_000.0, help="Starting equity")
+    p.add_argument("--storage-dir", type=str, default=None, help="Candle store root (default: config storage_dir)")
+    p.add_argument("--out", type=str, default=None, help="Output directory (default: <storage_dir>/backtests/<stamp>)")
+    p.add_argument("--config", type=str, default="config.toml", help="Path to TOML config file")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = load_config(args.config)
+    configure_logging(cfg.logs_dir, fmt=cfg.log_format, level=cfg.log_level, rate_limit=cfg.log_rate_limit)
+    timeframe = args.timeframe or cfg.timeframe
+    pairs = args.pair or [cfg.default_pair]
+    decide = load_decider(args.decide)
+    storage_dir = args.storage_dir or cfg.storage_dir
+    store = CandleStore(storage_dir)
+    out_dir = Path(args.out or Path(storage_dir) / "backtests" / time.strftime("%Y%m%d-%H%M%S"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    summaries = []
+    for pair in pairs:
+        series = store.read_series(pair, timeframe)
+        if not len(series):
+            LOG.error("No stored candles for %s %s in %s", pair, timeframe, store.root)
+            continue
+        stem = f"{pair.replace('/', '-')}_{timeframe}"
+        summary = run_backtest(
+            series, pair, timeframe, decide, cfg,
+            equity=args.equity, ledger_path=str(out_dir / f"{stem}_ledger.csv"),
+        )
+        summaries.append(summary)
+        LOG.info(
+            "%s %s: bars=%d trades=%d return=%.2f%% maxDD=%.2f%% sharpe=%.2f (%.0f bars/s)",
+            pair, timeframe, summary["bars"], summary["trades"], summary["total_return"] * 100,
+            summary["max_drawdown"] * 100, summary["sharpe"], summary["bars_per_sec"],
+        )
+    if not summaries:
+        return 1
+    with (out_dir / "summary.json").open("w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    LOG.info("Wrote results to %s", out_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Backtest engine: replays stored candles through the live pipeline, bar by bar:
+
+    indicators (incremental) -> decide(...) -> validate_contract
+        -> RiskGate.check_and_gate -> PaperBroker.submit -> ledger
+
+Fills and marks are fed back into the RiskGate so its daily-loss and
+exposure totals track the run.
+
+Indicators come from `IncrementalIndicators`, which returns the same dict as
+`compute_indicators` but costs O(1) per bar, so a run is linear in the number
+of bars. VWAP is the exception: the live loop computes it over the 300 bars
+it fetches, so here it is kept over the same rolling window (`vwap_window`)
+instead of the incremental engine's cumulative one. Stops/take-profits are
+checked against each bar's open/high/low before the decision. Summary
+statistics are accumulated online (no equity-curve list).
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+import csv
+import math
+import time
+
+from broker.paper_broker import PaperBroker
+from config import Config
+from contracts.action_contract import validate_contract
+from data.candle_store import CandleView
+from data.candles import CandleSeries
+from data.kraken_client import _TF_TO_INTERVAL
+from indicators.incremental import IncrementalIndicators
+from risk.risk_engine import RiskGate
+from backtest.strategies import DecideFn
+
+LEDGER_FIELDS = ("t", "pair", "action", "price", "size", "fee", "pnl", "equity", "reason")
+
+
+def run_backtest(
+    series: Union[CandleSeries, CandleView],
+    pair: str,
+    timeframe: str,
+    decide: DecideFn,
+    cfg: Optional[Config] = None,
+    ema_fast: int = 12,
+    ema_slow: int = 26,
+    rsi_period: int = 14,
+    atr_period: int = 14,
+    equity: float = 10_000.0,
+    ledger_path: Optional[str] = None,
+    vwap_window: int = 300,
+) -> Dict[str, Any]:
+    """
+    Run one pair through the pipeline and return summary statistics. `series`
+    is only iterated once through `rows()`, so a mapped `CandleView` is
+    replayed without copying it out.
+    """
+    cfg = cfg or Config()
+    if vwap_window <= 0:
+        raise ValueError("vwap_window must be > 0")
+    ind = IncrementalIndicators(timeframe, ema_fast, ema_slow, rsi_period, atr_period)
+    broker = PaperBroker(fee_bps=cfg.fee_bps, equity=equity)
+    gate = RiskGate(per_trade_loss_cap=cfg.per_trade_loss_cap, daily_loss_cap=cfg.daily_loss_cap, equity=equity)
+    risk = {
+        "per_trade_loss_cap": cfg.per_trade_loss_cap,
+        "daily_loss_cap": cfg.daily_loss_cap,
+        "fee_bps": cfg.fee_bps,
+    }
+    warmup = max(ema_fast, ema_slow, rsi_period + 1, atr_period + 1)
+    ledger: List[Dict[str, Any]] = []
+
+    # online stats over per-bar mark-to-market returns
+    n_ret = 0
+    mean = 0.0
+    m2 = 0.0
+    peak = equity
+    max_dd = 0.0
+    prev_eq = equity
+    wins = 0
+
+    def record(t: int, fill: Dict[str, Any], reason: str) -> None:
+        nonlocal wins
+        if fill["action"].startswith("exit") and fill["pnl"] > 0:
+            wins += 1
+        ledger.append({
+            "t": t, "pair": pair, "action": fill["action"], "price": fill["price"],
+            "size": fill["size"], "fee": fill["fee"], "pnl": fill["pnl"],
+            "equity": fill["equity"], "reason": reason,
+        })
+
+    # rolling VWAP over the last `vwap_window` bars, as live (tp * v, v) per bar
+    vwap_bars: Deque[Tuple[float, float]] = deque()
+    vwap_num = 0.0
+    vwap_den = 0.0
+
+    candle: Dict[str, Any] = {}  # reused for every bar; update() does not keep it
+    t0 = time.perf_counter()
+    bars = 0
+    for t, o, h, l, c, v in series.rows():
+        candle["t"] = t; candle["o"] = o; candle["h"] = h; candle["l"] = l; candle["c"] = c; candle["v"] = v
+        values = ind.update(candle)
+        bars += 1
+        pv = (h + l + c) / 3.0 * v
+        vwap_bars.append((pv, v))
+        vwap_num += pv
+        vwap_den += v
+        if len(vwap_bars) > vwap_window:
+            old_pv, old_v = vwap_bars.popleft()
+            vwap_num -= old_pv
+            vwap_den -= old_v
+        if values["vwap"] is not None:
+            values["vwap"] = vwap_num / vwap_den if vwap_den > 0.0 else None
+
+        stopped = broker.check_stops(h, l, o)
+        if stopped is not None and stopped["filled"]:
+            stopped["pair"] = pair
+            gate.on_fill(stopped, t)
+            record(t, stopped, "stop/take-profit")
+        unrealized = broker.unrealized(c)
+        gate.mark(unrealized, t)
+
+        if bars >= warmup:
+            proposal = validate_contract(decide(values, broker.position, risk))
+            gated = gate.check_and_gate(proposal, price=c, pair=pair, t=t)
+            if gated["action"] != "hold":
+                fill = broker.submit(gated["action"], gated["size_fraction"], c, gated["stop"], gated["take_profit"])
+                if fill["filled"]:
+                    fill["pair"] = pair
+                    gate.on_fill(fill, t)
+                    record(t, fill, gated["reason"])
+                    unrealized = broker.unrealized(c)
+                    gate.mark(unrealized, t)
+
+        eq = broker.equity + unrealized
+        if prev_eq > 0:
+            r = eq / prev_eq - 1.0
+            n_ret += 1
+            d = r - mean
+            mean += d / n_ret
+            m2 += d * (r - mean)
+        prev_eq = eq
+        if eq > peak:
+            peak = eq
+        elif peak > 0:
+            max_dd = max(max_dd, 1.0 - eq / peak)
+    elapsed = time.perf_counter() - t0
+
+    # close out at the last price so the summary reflects realized results
+    if broker.position["side"] != "flat" and bars:
+        # t / c still hold the last bar
+        fill = broker.submit("exit_" + broker.position["side"], 1.0, c)
+        fill["pair"] = pair
+        gate.on_fill(fill, t)
+        record(t, fill, "end of data")
+
+    if ledger_path:
+        write_ledger_csv(ledger_path, ledger)
+
+    bars_per_year = 365 * 24 * 60 / _TF_TO_INTERVAL.get(timeframe, 5)
+    std = math.sqrt(m2 / (n_ret - 1)) if n_ret > 1 else 0.0
+    return {
+        "pair": pair,
+        "timeframe": timeframe,
+        "bars": bars,
+        "trades": broker.trades,
+        "wins": wins,
+        "win_rate": wins / broker.trades if broker.trades else 0.0,
+        "final_equity": broker.equity,
+        "total_return": broker.equity / equity - 1.0,
+        "max_drawdown": max_dd,
+        "sharpe": mean / std * math.sqrt(bars_per_year) if std > 0 else 0.0,
+        "fees": broker.fees_paid,
+        "elapsed_s": elapsed,
+        "bars_per_sec": bars / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def write_ledger_csv(path: str, rows: List[Dict[str, Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=LEDGER_FIELDS)
+        w.writeheader()
+        w.writerows(rows)
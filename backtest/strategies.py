@@ -0,0 +1,59 @@
+"""
+Built-in decision functions for backtests.
+
+A decision function has the same signature as `GroqClient.decide`:
+    decide(indicators, position, risk) -> action contract dict
+and is validated with `validate_contract` by the engine. Use
+`load_decider("package.module:function")` to plug in your own.
+"""
+from typing import Any, Callable, Dict
+import importlib
+
+from contracts.action_contract import empty_contract
+
+DecideFn = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+def hold(indicators: Dict[str, Any], position: Dict[str, Any], risk: Dict[str, Any]) -> Dict[str, Any]:
+    return empty_contract()
+
+
+def ema_cross(indicators: Dict[str, Any], position: Dict[str, Any], risk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Long-only EMA12/26 cross with an RSI filter; stop at 2 ATR, target at 3 ATR.
+    Position size keeps the stop-out loss at `per_trade_loss_cap` of equity.
+    """
+    x = indicators.get("ema_cross")
+    price = indicators.get("price")
+    atr = indicators.get("atr")
+    rsi = indicators.get("rsi")
+    side = position.get("side", "flat")
+    if side == "long" and x == "bear_cross":
+        return {"action": "exit_long", "size_fraction": 1.0, "confidence": 0.6, "reason": "bear cross"}
+    if side == "flat" and x == "bull_cross" and price and atr and rsi is not None and rsi < 70.0:
+        stop = price - 2.0 * atr
+        cap = float(risk.get("per_trade_loss_cap", 0.01))
+        size = min(1.0, cap * price / (2.0 * atr))
+        return {
+            "action": "enter_long",
+            "size_fraction": size,
+            "stop": stop,
+            "take_profit": price + 3.0 * atr,
+            "confidence": 0.6,
+            "reason": "bull cross",
+        }
+    return empty_contract()
+
+
+def load_decider(spec: str) -> DecideFn:
+    """Resolve "module:function" (or a built-in name like "ema_cross") to a callable."""
+    if ":" not in spec:
+        fn = globals().get(spec)
+        if not callable(fn):
+            raise ValueError(f"Unknown decision function: {spec}")
+        return fn
+    module, _, name = spec.partition(":")
+    fn = getattr(importlib.import_module(module), name, None)
+    if not callable(fn):
+        raise ValueError(f"Unknown decision function: {spec}")
+    return fn
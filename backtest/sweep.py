@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep: run the backtest over a grid of indicator periods, risk caps
+and fee_bps on all cores, then rank the configurations.
+
+    python -m backtest.sweep --pair BTC/EUR --pair ETH/EUR \
+        --ema-fast 8,12,16 --ema-slow 21,26,34 --trade-cap 0.005,0.01
+
+Candles are not shipped to the workers: each worker process maps the
+`storage/candles/` files itself once (in the pool initializer) and keeps the
+`CandleView`s open for its lifetime. Backtests replay the records straight
+from the mapping instead of copying them into a per-process series, so the
+OS page cache holds the one copy of the data and a task is just a small
+parameter tuple. Tasks are independent and CPU-bound,
+so throughput scales with the number of worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+from backtest.engine import run_backtest
+from backtest.strategies import DecideFn, load_decider
+from config import Config, load_config
+from data.candle_store import CandleStore, CandleView
+from utils.logging import configure_logging, get_logger
+
+LOG = get_logger("backtest.sweep")
+
+
+class SweepParams(NamedTuple):
+    ema_fast: int
+    ema_slow: int
+    rsi_period: int
+    atr_period: int
+    per_trade_loss_cap: float
+    daily_loss_cap: float
+    fee_bps: float
+
+
+RESULT_FIELDS = SweepParams._fields + (
+    "pairs", "bars", "trades", "win_rate", "total_return", "max_drawdown", "sharpe", "fees",
+)
+
+# metrics where smaller is better; everything else ranks descending
+_ASCENDING = {"max_drawdown", "fees"}
+
+
+def build_grid(
+    ema_fast: Sequence[int],
+    ema_slow: Sequence[int],
+    rsi_period: Sequence[int],
+    atr_period: Sequence[int],
+    per_trade_loss_cap: Sequence[float],
+    daily_loss_cap: Sequence[float],
+    fee_bps: Sequence[float],
+) -> List[SweepParams]:
+    """Cartesian product of the axes, skipping combinations with ema_fast >= ema_slow."""
+    grid = [
+        SweepParams(*p)
+        for p in itertools.product(ema_fast, ema_slow, rsi_period, atr_period, per_trade_loss_cap, daily_loss_cap, fee_bps)
+    ]
+    return [p for p in grid if p.ema_fast < p.ema_slow]
+
+
+# ---------- Worker side ----------
+# Per-process state set by `_init_worker`; never pickled.
+_W_SERIES: Dict[str, CandleView] = {}
+_W_DECIDE: Optional[DecideFn] = None
+_W_CFG: Optional[Config] = None
+_W_TIMEFRAME = ""
+
+
+def _init_worker(storage_dir: str, pairs: Sequence[str], timeframe: str, decide_spec: str, cfg: Config) -> None:
+    global _W_DECIDE, _W_CFG, _W_TIMEFRAME
+    store = CandleStore(storage_dir)
+    for pair in pairs:
+        _W_SERIES[pair] = store.open_view(pair, timeframe)
+    _W_DECIDE = load_decider(decide_spec)
+    _W_CFG = cfg
+    _W_TIMEFRAME = timeframe
+
+
+def _run_params(params: SweepParams) -> Dict[str, Any]:
+    """Backtest every loaded pair with `params`; aggregate across pairs."""
+    cfg = replace(
+        _W_CFG,
+        per_trade_loss_cap=params.per_trade_loss_cap,
+        daily_loss_cap=params.daily_loss_cap,
+        fee_bps=params.fee_bps,
+    )
+    runs = [
+        run_backtest(
+            series, pair, _W_TIMEFRAME, _W_DECIDE, cfg,
+            ema_fast=params.ema_fast, ema_slow=params.ema_slow,
+            rsi_period=params.rsi_period, atr_period=params.atr_period,
+        )
+        for pair, series in _W_SERIES.items()
+        if len(series)
+    ]
+    n = len(runs)
+    trades = sum(r["trades"] for r in runs)
+    row: Dict[str, Any] = params._asdict()
+    row.update(
+        pairs=n,
+        bars=sum(r["bars"] for r in runs),
+        trades=trades,
+        win_rate=sum(r["wins"] for r in runs) / trades if trades else 0.0,
+        total_return=sum(r["total_return"] for r in runs) / n if n else 0.0,
+        max_drawdown=max((r["max_drawdown"] for r in runs), default=0.0),
+        sharpe=sum(r["sharpe"] for r in runs) / n if n else 0.0,
+        fees=sum(r["fees"] for r in runs),
+    )
+    return row
+
+
+# ---------- Driver ----------
+def run_sweep(
+    grid: Sequence[SweepParams],
+    pairs: Sequence[str],
+    timeframe: str,
+    storage_dir: str,
+    decide_spec: str = "ema_cross",
+    cfg: Optional[Config] = None,
+    workers: Optional[int] = None,
+    rank_by: str = "sharpe",
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate every grid point in a process pool and return the result rows
+    ranked by `rank_by` (best first). Pair results are averaged, except
+    max_drawdown (worst pair) and trades/bars/fees (summed).
+    """
+    if rank_by not in RESULT_FIELDS:
+        raise ValueError(f"Unknown rank metric: {rank_by}")
+    cfg = cfg or Config()
+    load_decider(decide_spec)  # fail fast in the parent, not once per worker
+    workers = max(1, min(workers or os.cpu_count() or 1, len(grid) or 1))
+    # a few chunks per worker: small pickling overhead, still balanced at the tail
+    chunksize = max(1, len(grid) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(storage_dir, list(pairs), timeframe, decide_spec, cfg),
+    ) as pool:
+        rows = list(pool.map(_run_params, grid, chunksize=chunksize))
+    rows.sort(key=lambda r: r[rank_by], reverse=rank_by not in _ASCENDING)
+    return rows
+
+
+def write_results_csv(path: str, rows: Sequence[Dict[str, Any]]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=("rank",) + RESULT_FIELDS)
+        w.writeheader()
+        for i, row in enumerate(rows, 1):
+            w.writerow({"rank": i, **row})
+
+
+# ---------- CLI ----------
+def _ints(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def _floats(s: str) -> List[float]:
+    return [float(x) for x in s.split(",") if x.strip()]
+
+
+def _axes(args: argparse.Namespace, cfg: Config) -> Iterator[Sequence[Any]]:
+    yield args.ema_fast
+    yield args.ema_slow
+    yield args.rsi
+    yield args.atr
+    yield args.trade_cap or [cfg.per_trade_loss_cap]
+    yield args.daily_cap or [cfg.daily_loss_cap]
+    yield args.fee_bps or [cfg.fee_bps]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Parallel parameter sweep over stored candles")
+    p.add_argument("--pair", action="append", default=None, help="Pair to include (repeatable; default: config)")
+    p.add_argument("--timeframe", type=str, default=None, help="Candle timeframe (default: config)")
+    p.add_argument("--decide", type=str, default="ema_cross", help="Decision function: built-in name or module:function")
+    p.add_argument("--ema-fast", type=_ints, default=[12], help="Comma-separated fast EMA periods")
+    p.add_argument("--ema-slow", type=_ints, default=[26], help="Comma-separated slow EMA periods")
+    p.add_argument("--rsi", type=_ints, default=[14], help="Comma-separated RSI periods")
+    p.add_argument("--atr", type=_ints, default=[14], help="Comma-separated ATR periods")
+    p.add_argument("--trade-cap", type=_floats, default=None, help="Comma-separated per-trade loss caps (default: config)")
+    p.add_argument("--daily-cap", type=_floats, default=None, help="Comma-separated daily loss caps (default: config)")
+    p.add_argument("--fee-bps", type=_floats, default=None, help="Comma-separated fee_bps values (default: config)")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    p.add_argument("--rank-by", type=str, default="sharpe", help="Metric to rank by (default: sharpe)")
+    p.add_argument("--storage-dir", type=str, default=None, help="Candle store root (default: config storage_dir)")
+    p.add_argument("--out", type=str, default=None, help="Results CSV (default: <storage_dir>/backtests/sweep-<stamp>.csv)")
+    p.add_argument("--config", type=str, default="config.toml", help="Path to TOML config file")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = load_config(args.config)
+    configure_logging(cfg.logs_dir, fmt=cfg.log_format, level=cfg.log_level, rate_limit=cfg.log_rate_limit)
+    timeframe = args.timeframe or cfg.timeframe
+    pairs = args.pair or [cfg.default_pair]
+    storage_dir = args.storage_dir or cfg.storage_dir
+    grid = build_grid(*_axes(args, cfg))
+    if not grid:
+        LOG.error("Empty parameter grid (every ema_fast >= ema_slow?)")
+        return 1
+    store = CandleStore(storage_dir)
+    missing = [p for p in pairs if not store.count(p, timeframe)]
+    if missing:
+        LOG.error("No stored candles for %s (%s) in %s", ", ".join(missing), timeframe, store.root)
+        return 1
+
+    t0 = time.perf_counter()
+    rows = run_sweep(grid, pairs, timeframe, storage_dir, args.decide, cfg, args.workers, args.rank_by)
+    elapsed = time.perf_counter() - t0
+    out = Path(args.out or Path(storage_dir) / "backtests" / f"sweep-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    write_results_csv(str(out), rows)
+    bars = sum(r["bars"] for r in rows)
+    LOG.info("%d configs x %d pairs in %.1fs (%.0f bars/s); results: %s", len(grid), len(pairs), elapsed, bars / elapsed, out)
+    for i, r in enumerate(rows[:5], 1):
+        LOG.info(
+            "#%d ema %d/%d rsi %d atr %d cap %.4g/%.4g fee %.3g -> sharpe %.2f return %.2f%% maxDD %.2f%%",
+            i, r["ema_fast"], r["ema_slow"], r["rsi_period"], r["atr_period"], r["per_trade_loss_cap"],
+            r["daily_loss_cap"], r["fee_bps"], r["sharpe"], r["total_return"] * 100, r["max_drawdown"] * 100,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
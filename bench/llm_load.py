@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the LLM decision path.
+
+Starts `devtools.fake_llm_server` in-process with the given latency/error
+profile, points a real `GroqClient` at it and runs the executor's LLM stage
+(`BatchDecider.decide_all`) for increasing pair counts. Per pair count it
+reports cycle time, throughput (pairs/s), p50/p99 decision latency (cycle
+start -> contract available, deadline for fallbacks) and the fraction of
+pairs that fell back to "hold".
+
+`--scheduler` runs the whole `Scheduler` instead, against a `SyntheticMarket`
+in place of Kraken, so decisions go through its micro-batch window
+(`_decide` -> `_flush` -> `_send`), the `llm_concurrency` limit and the
+deadline fallback, and are gated by the risk engine. Latency is then cycle
+start -> gated contract; one unmeasured cycle seeds the indicators first.
+
+    python -m bench.llm_load --pairs 8,32,128,512 --latency lognormal:0.4:0.6 \
+        --error-rate 0.02 --malformed-rate 0.01 --deadline 5
+    python -m bench.llm_load --scheduler --pairs 8,64 --batch-window 0.05
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from bench.synthetic import SyntheticMarket
+from config import Config
+from devtools.fake_llm_server import FakeLLMServer
+from executor.scheduler import Scheduler
+from llm.batch import BatchDecider
+from llm.groq_client import BatchItem, GroqClient, is_fallback
+from utils.logging import get_logger
+
+LOG = get_logger("bench.llm_load")
+
+_CROSSES = ("bull", "bear", "bull_cross", "bear_cross", None)
+
+
+def _percentile(sorted_vals: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0 when empty)."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, int(round(q / 100.0 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+
+class _TimedClient:
+    """Delegates to a `GroqClient` and records when each pair's answer arrived."""
+
+    def __init__(self, client: GroqClient) -> None:
+        self.client = client
+        self.done_at: Dict[str, float] = {}
+
+    def decide_batch(self, items: Sequence[BatchItem], timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        out = self.client.decide_batch(items, timeout)
+        now = time.monotonic()
+        for pair in out:
+            self.done_at[pair] = now
+        return out
+
+
+def synthetic_requests(n: int, rng: random.Random) -> Dict[str, Any]:
+    position = {"side": "flat", "size": 0.0, "entry_price": None, "stop": None, "take_profit": None}
+    risk = {"per_trade_loss_cap": 0.01, "daily_loss_cap": 0.05, "fee_bps": 5.0}
+    out = {}
+    for i in range(n):
+        price = rng.uniform(0.1, 50_000.0)
+        ind = {
+            "rsi": rng.uniform(10, 90), "ema12": price, "ema26": price * rng.uniform(0.98, 1.02),
+            "ema_cross": rng.choice(_CROSSES), "atr": price * rng.uniform(0.002, 0.02),
+            "vwap": price, "price": price, "timeframe": "5m",
+        }
+        out[f"SYN{i:04d}/EUR"] = (ind, position, risk)
+    return out
+
+
+def run_level(
+    decider: BatchDecider,
+    timed: _TimedClient,
+    n_pairs: int,
+    cycles: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    fallbacks = 0
+    wall = 0.0
+    for _ in range(cycles):
+        requests = synthetic_requests(n_pairs, rng)
+        timed.done_at.clear()
+        t0 = time.monotonic()
+        results = decider.run(requests)
+        t1 = time.monotonic()
+        wall += t1 - t0
+        for pair, contract in results.items():
+            if is_fallback(contract):
+                fallbacks += 1
+            latencies.append(timed.done_at.get(pair, t1) - t0)
+    return _summary(n_pairs, cycles, wall, latencies, fallbacks)
+
+
+def _summary(n_pairs: int, cycles: int, wall: float, latencies: List[float], fallbacks: int) -> Dict[str, Any]:
+    latencies.sort()
+    total = n_pairs * cycles
+    return {
+        "pairs": n_pairs,
+        "cycles": cycles,
+        "cycle_s": wall / cycles if cycles else 0.0,
+        "throughput": total / wall if wall > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000.0,
+        "p99_ms": _percentile(latencies, 99) * 1000.0,
+        "fallback_rate": fallbacks / total if total else 0.0,
+    }
+
+
+def run_scheduler_level(args: argparse.Namespace, base_url: str, n_pairs: int, cycles: int) -> Dict[str, Any]:
+    """`cycles` scheduler cycles over `n_pairs` synthetic pairs, with the stand-in as the LLM."""
+    pairs = [f"SYN{i:04d}/EUR" for i in range(n_pairs)]
+    market = SyntheticMarket(pairs, "5m", seed=args.seed + n_pairs)
+    tmp = tempfile.mkdtemp(prefix="bench-llm-load-")
+    cfg = dataclasses.replace(
+        Config(), storage_dir=tmp, timeframe="5m", scan_rate=1e9, scan_burst=10**9, indicator_checkpoint_every=0,
+        llm_batch_size=args.batch_size, llm_concurrency=args.concurrency, llm_deadline=args.deadline,
+    )
+    client = GroqClient(api_key="bench", base_url=base_url, max_connections=args.concurrency, stream=args.stream)
+    sched = Scheduler(cfg, pairs=pairs, kraken=market, llm=client, batch_window=args.batch_window,  # type: ignore[arg-type]
+                      clock=lambda: market.now_t)
+    latencies: List[float] = []
+    fallbacks = 0
+    t0 = 0.0
+    gate = sched._gate
+
+    def timed_gate(contracts: Dict[str, Dict[str, Any]], prices: Dict[str, float], t: int) -> Dict[str, Dict[str, Any]]:
+        # called by `_send` once a micro-batch's contracts (or its fallbacks) are in
+        nonlocal fallbacks
+        now = time.monotonic()
+        for contract in contracts.values():
+            latencies.append(now - t0)
+            fallbacks += is_fallback(contract)
+        return gate(contracts, prices, t)
+
+    loop = asyncio.new_event_loop()
+    wall = 0.0
+    try:
+        market.advance()
+        loop.run_until_complete(sched.run(max_cycles=sched.cycles + 1))  # seeds the indicators
+        sched._gate = timed_gate  # type: ignore[assignment]
+        for _ in range(cycles):
+            market.advance()
+            t0 = time.monotonic()
+            loop.run_until_complete(sched.run(max_cycles=sched.cycles + 1))
+            wall += time.monotonic() - t0
+    finally:
+        sched.close()
+        loop.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return _summary(n_pairs, cycles, wall, latencies, fallbacks)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark the LLM decision path against a local stand-in")
+    p.add_argument("--pairs", type=str, default="8,32,128,512", help="Comma-separated pair counts")
+    p.add_argument("--cycles", type=int, default=3, help="Cycles per pair count")
+    p.add_argument("--batch-size", type=int, default=8, help="Pairs per LLM request (1 = one request per pair)")
+    p.add_argument("--concurrency", type=int, default=4, help="LLM requests in flight")
+    p.add_argument("--deadline", type=float, default=10.0, help="Per-cycle deadline in seconds")
+    p.add_argument("--latency", type=str, default="lognormal:0.3:0.5", help="Stand-in latency distribution")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Stand-in HTTP 429/500 rate")
+    p.add_argument("--malformed-rate", type=float, default=0.0, help="Stand-in truncated-JSON rate")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--stream", action="store_true", help="Stream replies (SSE) and stop at the first JSON object")
+    p.add_argument("--chunk-delay", type=float, default=0.0, help="Stand-in seconds between streamed deltas")
+    p.add_argument("--chatty", action="store_true", help="Stand-in wraps replies in prose and a code fence")
+    p.add_argument("--scheduler", action="store_true",
+                   help="Run the Scheduler (synthetic market, micro-batched decide -> risk) instead of BatchDecider")
+    p.add_argument("--batch-window", type=float, default=0.05,
+                   help="With --scheduler: seconds decisions are collected before a batch goes out")
+    p.add_argument("--json", type=str, default=None, help="Also write results to this JSON file")
+    p.add_argument("--verbose", action="store_true", help="Keep per-request LLM warnings")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.verbose:
+        for name in ("llm.groq_client", "llm.batch", "executor.scheduler"):
+            get_logger(name).setLevel(logging.ERROR)
+    server = FakeLLMServer(args.latency, args.error_rate, args.malformed_rate, seed=args.seed,
+                           chunk_delay=args.chunk_delay, chatty=args.chatty)
+    port, stop = server.start_in_thread()
+    base_url = f"http://127.0.0.1:{port}/openai/v1"
+    client = GroqClient(api_key="bench", base_url=base_url, max_connections=args.concurrency, stream=args.stream)
+    timed = _TimedClient(client)
+    decider = BatchDecider(timed, batch_size=args.batch_size, max_concurrency=args.concurrency,
+                           deadline=args.deadline)
+    rng = random.Random(args.seed)
+    rows = []
+    try:
+        print(f"{'pairs':>6} {'cycle_s':>8} {'pairs/s':>9} {'p50_ms':>8} {'p99_ms':>8} {'fallback':>9}")
+        for n in [int(x) for x in args.pairs.split(",") if x.strip()]:
+            if args.scheduler:
+                r = run_scheduler_level(args, base_url, n, args.cycles)
+            else:
+                r = run_level(decider, timed, n, args.cycles, rng)
+            rows.append(r)
+            print(f"{r['pairs']:>6} {r['cycle_s']:>8.2f} {r['throughput']:>9.1f} {r['p50_ms']:>8.0f} "
+                  f"{r['p99_ms']:>8.0f} {r['fallback_rate']:>8.1%}")
+    finally:
+        decider.close()
+        client.close()
+        stop()
+    LOG.info("Stand-in served %d requests (%d errors, %d malformed, %d streams cancelled early)",
+             server.requests, server.errors, server.malformed, server.cancelled)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
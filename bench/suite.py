@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Hot-path benchmark suite with JSON baselines.
+
+Every case runs on seeded synthetic data (`bench.synthetic`), offline:
+- `indicators[N]`: `compute_indicators` on N candles
+- `kraken_ohlc_parse[N]`: JSON decode + `_parse_ohlc` of a Kraken OHLC body with N rows
+- `validate_contract[clean|messy]`: a well-formed reply / one that needs coercion
+- `resolve_pair_code`: `KrakenClient._resolve_pair_code` over mixed spellings of 400 pairs
+- `offline_cycle[P]`: one `Scheduler` cycle over P pairs (synthetic feed,
+  in-process stand-in LLM, risk, broker, ledger and state on a temp dir)
+- `screen[P]`: `PairScreener.select` over P pairs' indicators
+
+Each case is timed like `timeit`: loops calibrated to ~0.2s, best of
+`--repeat` runs reported per operation (the median is kept too). A saved
+run is a baseline; `--compare` flags cases slower than it by more than
+`--threshold` percent and exits with status 1 if there are any.
+
+    python -m bench.suite --save bench/baseline.json
+    python -m bench.suite --compare bench/baseline.json --threshold 10
+    python -m bench.suite --filter indicators --repeat 7
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+from bench.synthetic import SyntheticMarket, asset_pairs, generate_series, kraken_ohlc_body
+from config import Config
+from contracts.action_contract import validate_contract
+from data.kraken_client import KrakenClient, _parse_ohlc
+from devtools.fake_llm_server import answer
+from executor.scheduler import Scheduler
+from executor.screener import PairScreener
+from indicators.indicators import compute_indicators
+from llm.groq_client import BatchItem
+from utils.logging import get_logger
+
+LOG = get_logger("bench.suite")
+
+# setup() -> (fn, operations per fn call, cleanup or None)
+Setup = Callable[[], Tuple[Callable[[], Any], int, Optional[Callable[[], None]]]]
+CASES: Dict[str, Setup] = {}
+
+
+def case(name: str) -> Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        CASES[name] = setup
+        return setup
+    return register
+
+
+# ---------- Cases ----------
+def _indicators(n: int) -> Setup:
+    def setup():
+        series = generate_series(n, "5m", seed=n)
+        return (lambda: compute_indicators(series, "5m")), 1, None
+    return setup
+
+
+def _ohlc_parse(n: int) -> Setup:
+    def setup():
+        body = kraken_ohlc_body(generate_series(n, "5m", seed=n))
+        return (lambda: _parse_ohlc(json.loads(body)["result"], "XXBTZEUR")), 1, None
+    return setup
+
+
+for _n in (100, 300, 720, 5000):
+    case(f"indicators[{_n}]")(_indicators(_n))
+for _n in (720, 10000):
+    case(f"kraken_ohlc_parse[{_n}]")(_ohlc_parse(_n))
+
+
+@case("validate_contract[clean]")
+def _validate_clean():
+    reply = {"action": "enter_long", "size_fraction": 0.25, "stop": 99.5, "take_profit": 104.0,
+             "confidence": 0.7, "reason": "bull cross with rising volume"}
+    return (lambda: validate_contract(reply)), 1, None
+
+
+@case("validate_contract[messy]")
+def _validate_messy():
+    reply = {"action": "BUY", "size_fraction": "1.7", "confidence": None, "reason": 42, "extra": [1, 2, 3]}
+    return (lambda: validate_contract(reply)), 1, None
+
+
+@case("resolve_pair_code")
+def _resolve():
+    res = asset_pairs(400)
+    kc = KrakenClient()
+    kc._build_index(res)
+    keys: List[str] = []
+    for code, info in res.items():
+        keys += [info["wsname"], info["altname"].lower(), code]
+    keys += ["BTC/EUR", "btceur", "XBT/EUR"]
+
+    def run():
+        resolve = kc._resolve_pair_code
+        for k in keys:
+            resolve(k)
+    return run, len(keys), None
+
+
+class _StandInLLM:
+    """In-process equivalent of `devtools.fake_llm_server` (no HTTP)."""
+
+    def decide_batch(self, items: List[BatchItem], timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        return {p: validate_contract(answer({"indicators": ind, "position": pos, "risk": risk}))
+                for p, ind, pos, risk in items}
+
+    def close(self) -> None:
+        pass
+
+
+def _offline_cycle(n_pairs: int) -> Setup:
+    def setup():
+        pairs = [f"P{i:03d}/EUR" for i in range(n_pairs)]
+        market = SyntheticMarket(pairs, "5m", seed=n_pairs)
+        tmp = tempfile.mkdtemp(prefix="bench-cycle-")
+        cfg = dataclasses.replace(Config(), storage_dir=tmp, timeframe="5m", scan_rate=1e9, scan_burst=10**9,
+                                  indicator_checkpoint_every=0)
+        sched = Scheduler(cfg, pairs=pairs, kraken=market, llm=_StandInLLM(), batch_window=0.0,
+                          clock=lambda: market.now_t)  # type: ignore[arg-type]
+        loop = asyncio.new_event_loop()
+
+        def run():
+            market.advance()
+            loop.run_until_complete(sched.run(max_cycles=sched.cycles + 1))
+
+        def cleanup():
+            sched.close()
+            loop.close()
+            shutil.rmtree(tmp, ignore_errors=True)
+        return run, 1, cleanup
+    return setup
+
+
+for _n in (8, 64):
+    case(f"offline_cycle[{_n}]")(_offline_cycle(_n))
+
+
+def _screen(n_pairs: int) -> Setup:
+    def setup():
+        screener = PairScreener(top_k=8)
+        indicators = {}
+        for i in range(n_pairs):
+            pair = f"P{i:03d}/EUR"
+            series = generate_series(60, "5m", seed=i)
+            screener.observe_series(pair, series)
+            indicators[pair] = compute_indicators(series, "5m")
+        return (lambda: screener.select(indicators)), 1, None
+    return setup
+
+
+for _n in (64, 512):
+    case(f"screen[{_n}]")(_screen(_n))
+
+
+# ---------- Runner ----------
+def measure(setup: Setup, repeat: int = 5) -> Dict[str, Any]:
+    fn, ops, cleanup = setup()
+    try:
+        fn()  # warm-up (lazy imports, first allocations)
+        timer = timeit.Timer(fn)
+        loops, _ = timer.autorange()
+        runs = [t / loops / ops for t in timer.repeat(repeat, loops)]
+    finally:
+        if cleanup is not None:
+            cleanup()
+    return {"us": min(runs) * 1e6, "median_us": statistics.median(runs) * 1e6, "loops": loops, "ops": ops}
+
+
+def run_suite(names: List[str], repeat: int = 5) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name in names:
+        results[name] = r = measure(CASES[name], repeat)
+        print(f"{name:<28} {r['us']:>12.2f} us  (median {r['median_us']:.2f}, {r['loops']} loops)")
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "cases": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the per-case change against `baseline`; returns the names that regressed."""
+    base, cur = baseline.get("cases", {}), current.get("cases", {})
+    regressed: List[str] = []
+    print(f"\n{'case':<28} {'base_us':>12} {'now_us':>12} {'change':>8}")
+    for name in sorted(set(base) | set(cur)):
+        if name not in base or name not in cur:
+            print(f"{name:<28} {'only in ' + ('run' if name in cur else 'baseline'):>34}")
+            continue
+        b, c = base[name]["us"], cur[name]["us"]
+        change = (c / b - 1.0) * 100.0 if b > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<28} {b:>12.2f} {c:>12.2f} {change:>+7.1f}%{flag}")
+    return regressed
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Hot-path benchmarks on synthetic data, with JSON baselines")
+    p.add_argument("--filter", type=str, default="", help="Only cases whose name contains this")
+    p.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is reported)")
+    p.add_argument("--save", type=str, default=None, help="Write the results to this JSON baseline")
+    p.add_argument("--compare", type=str, default=None, help="Compare against this JSON baseline")
+    p.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown counted as a regression")
+    p.add_argument("--list", action="store_true", help="List the cases and exit")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    names = [n for n in CASES if args.filter in n]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        LOG.error("No case matches %r", args.filter)
+        return 2
+    if args.repeat < 1:
+        LOG.error("--repeat must be >= 1")
+        return 2
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    # per-cycle INFO lines would dominate the offline cycle and flood the console
+    for name in ("executor.scheduler", "llm.batch"):
+        get_logger(name).setLevel(logging.WARNING)
+    current = run_suite(names, args.repeat)
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{args.save}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        os.replace(tmp, args.save)
+        LOG.info("Baseline written to %s", args.save)
+    if baseline is not None:
+        regressed = compare(current, baseline, args.threshold)
+        if regressed:
+            LOG.warning("%d case(s) regressed by more than %.0f%%: %s", len(regressed), args.threshold,
+                        ", ".join(regressed))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Seeded synthetic market data for benchmarks (stdlib only).
+
+- `generate_series`: OHLCV random walk whose volatility switches between
+  regimes (calm / normal / turbulent, a Markov chain); volume rises with
+  volatility. Same seed, same candles.
+- `kraken_ohlc_body`: a series as the raw bytes of a Kraken OHLC response
+  (string prices, vwap and trade count columns), for parser benchmarks.
+- `asset_pairs`: an AssetPairs-shaped result with `n` EUR pairs (plus USD
+  twins), for pair-resolution benchmarks.
+- `SyntheticMarket`: per-pair series extended on demand, with the
+  `get_ohlc_series` signature the executor uses, so a full cycle can run
+  without the network.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import math
+import random
+
+from data.candles import CandleSeries
+from data.kraken_client import _TF_TO_INTERVAL
+
+# (per-bar log-return sigma, mean volume), probability of leaving a regime per bar
+REGIMES: Tuple[Tuple[float, float], ...] = ((0.0008, 40.0), (0.0025, 100.0), (0.008, 320.0))
+SWITCH_PROB = 0.02
+
+
+class _Walk:
+    """State of one random walk, so a series can be continued later."""
+
+    def __init__(self, seed: Any, price: float) -> None:
+        self.rng = random.Random(seed)
+        self.price = float(price)
+        self.regime = 1
+
+    def bar(self) -> Tuple[float, float, float, float, float]:
+        rng = self.rng
+        if rng.random() < SWITCH_PROB:
+            self.regime = rng.randrange(len(REGIMES))
+        sigma, vol = REGIMES[self.regime]
+        o = self.price
+        c = o * math.exp(rng.gauss(0.0, sigma))
+        h = max(o, c) * math.exp(abs(rng.gauss(0.0, sigma * 0.5)))
+        l = min(o, c) * math.exp(-abs(rng.gauss(0.0, sigma * 0.5)))
+        v = vol * rng.lognormvariate(0.0, 0.5)
+        self.price = c
+        return o, h, l, c, v
+
+
+def generate_series(n: int, timeframe: str = "5m", seed: int = 0, start: int = 1_700_000_100,
+                    price: float = 100.0) -> CandleSeries:
+    """`n` candles ending before `start + n * step`, opening at multiples of the timeframe."""
+    step = _TF_TO_INTERVAL[timeframe] * 60
+    t = start - start % step
+    walk = _Walk(seed, price)
+    out = CandleSeries()
+    for _ in range(int(n)):
+        out.append(t, *walk.bar())
+        t += step
+    return out
+
+
+def kraken_ohlc_body(series: CandleSeries, code: str = "XXBTZEUR") -> bytes:
+    """Raw JSON of a Kraken OHLC response carrying `series` (the last row is the forming bar)."""
+    rows = [
+        [t, f"{o:.5f}", f"{h:.5f}", f"{l:.5f}", f"{c:.5f}", f"{(h + l + c) / 3.0:.5f}", f"{v:.8f}", int(v) + 1]
+        for t, o, h, l, c, v in series.rows()
+    ]
+    last = rows[-1][0] if rows else 0
+    return json.dumps({"error": [], "result": {code: rows, "last": last}}).encode("utf-8")
+
+
+def asset_pairs(n: int = 200, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """AssetPairs-like result: XBT/EUR, ETH/EUR, then `n - 2` made-up EUR pairs, each with a USD twin."""
+    rng = random.Random(seed)
+    bases = ["XBT", "ETH"]
+    while len(bases) < n:
+        name = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(3, 5)))
+        if name not in bases:
+            bases.append(name)
+    res: Dict[str, Dict[str, Any]] = {}
+    for base in bases:
+        kbase = f"X{base}" if len(base) == 3 else base
+        for quote, kquote in (("EUR", "ZEUR"), ("USD", "ZUSD")):
+            res[f"{kbase}{kquote}"] = {"wsname": f"{base}/{quote}", "altname": f"{base}{quote}",
+                                      "base": kbase, "quote": kquote}
+    return res
+
+
+class SyntheticMarket:
+    """
+    Candles for `pairs` on one timeframe, generated as far as asked for. Bars
+    up to the one opening at `now_t` exist; that last one is "forming", as on
+    Kraken. `advance` moves time on.
+    """
+
+    def __init__(self, pairs: Sequence[str], timeframe: str = "5m", seed: int = 0,
+                 start: int = 1_700_000_100, history: int = 720) -> None:
+        self.step = _TF_TO_INTERVAL[timeframe] * 60
+        self.timeframe = timeframe
+        self.pairs = list(pairs)
+        self.now_t = start - start % self.step  # open time of the forming bar
+        first = self.now_t - (history - 1) * self.step
+        self._walks = {p: _Walk(f"{seed}:{p}", 100.0 * (1 + i)) for i, p in enumerate(self.pairs)}
+        self._series: Dict[str, CandleSeries] = {p: CandleSeries() for p in self.pairs}
+        self._next_t = {p: first for p in self.pairs}
+        self.calls = 0
+
+    def advance(self, bars: int = 1) -> int:
+        """Move the forming bar forward; returns its open time."""
+        self.now_t += bars * self.step
+        return self.now_t
+
+    def _extend(self, pair: str) -> CandleSeries:
+        s, walk = self._series[pair], self._walks[pair]
+        t = self._next_t[pair]
+        while t <= self.now_t:
+            s.append(t, *walk.bar())
+            t += self.step
+        self._next_t[pair] = t
+        return s
+
+    # KrakenClient-compatible subset
+    def get_eur_pairs(self) -> List[str]:
+        return list(self.pairs)
+
+    def refresh_pairs(self) -> List[str]:
+        return list(self.pairs)
+
+    def get_ohlc_series(self, pair: str, timeframe: str, since: Optional[int] = None, limit: int = 200) -> CandleSeries:
+        if timeframe != self.timeframe:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        self.calls += 1
+        s = self._extend(pair)
+        return s[-limit:] if limit else s[:]  # a copy: the live series keeps growing
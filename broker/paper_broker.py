@@ -1,11 +1,34 @@
 """
-Paper broker (stub). Maintains in-memory position snapshot; later persisted.
+Paper broker. Single position per broker; fills at the given price, charges
+fees and tracks realized PnL. Strictly no live orders.
+
+Fees: `fee_bps` is the round-trip cost, so half of it is charged on each fill
+(entry and exit) against the notional traded.
+
+Stops and take-profits follow `PaperPortfolio`: levels on the wrong side of
+the entry price are dropped on entry (`levels_on_side`), and a bar that
+opens beyond a level fills at its open rather than at the level.
 """
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from contracts.action_contract import levels_on_side
+
+
+def _price_or_none(val: Any) -> Optional[float]:
+    try:
+        f = float(val)
+    except (TypeError, ValueError):
+        return None
+    return f if f > 0 else None
+
 
 class PaperBroker:
-    def __init__(self, fee_bps: float = 5.0) -> None:
+    def __init__(self, fee_bps: float = 5.0, equity: float = 10_000.0) -> None:
         self.fee_bps = float(fee_bps)
+        self.starting_equity = float(equity)
+        self.realized_pnl = 0.0   # net of fees
+        self.fees_paid = 0.0
+        self.trades = 0           # closed round trips
         self.position = {
             "side": "flat",
             "size": 0.0,
@@ -14,16 +37,92 @@ class PaperBroker:
             "take_profit": None,
         }
 
+    @property
+    def equity(self) -> float:
+        """Realized equity (excludes the open position's unrealized PnL)."""
+        return self.starting_equity + self.realized_pnl
+
+    def unrealized(self, price: float) -> float:
+        pos = self.position
+        if pos["side"] == "flat" or pos["entry_price"] is None:
+            return 0.0
+        diff = price - pos["entry_price"]
+        return diff * pos["size"] if pos["side"] == "long" else -diff * pos["size"]
+
+    def _fee(self, notional: float) -> float:
+        return abs(notional) * self.fee_bps / 10_000.0 / 2.0
+
     def submit(self, action: str, size_fraction: float, price: float, stop=None, take_profit=None) -> Dict[str, Any]:
         """
-        Placeholder: records intent; no PnL math yet.
+        Simulate a fill at `price`. Entries size the position as
+        `size_fraction * equity / price` and require a flat book; exits close
+        the whole position on the matching side. Anything else is not filled.
         """
-        return {
-            "filled": True,
+        pos = self.position
+        fill: Dict[str, Any] = {
+            "filled": False,
             "action": action,
             "size_fraction": size_fraction,
             "price": price,
             "fee_bps": self.fee_bps,
             "stop": stop,
             "take_profit": take_profit,
+            "size": 0.0,
+            "fee": 0.0,
+            "pnl": 0.0,
         }
+        if price is None or price <= 0:
+            return fill
+        if action in ("enter_long", "enter_short"):
+            if pos["side"] != "flat" or size_fraction <= 0.0 or self.equity <= 0.0:
+                return fill
+            size = size_fraction * self.equity / price
+            fee = self._fee(size * price)
+            sl, tp = levels_on_side(1 if action == "enter_long" else -1, price, stop, take_profit)
+            fill.update(stop=sl, take_profit=tp)
+            self.position = {
+                "side": "long" if action == "enter_long" else "short",
+                "size": size,
+                "entry_price": price,
+                "stop": sl,
+                "take_profit": tp,
+            }
+            self.realized_pnl -= fee
+            self.fees_paid += fee
+            fill.update(filled=True, size=size, fee=fee, pnl=-fee)
+        elif (action == "exit_long" and pos["side"] == "long") or (action == "exit_short" and pos["side"] == "short"):
+            size = pos["size"]
+            fee = self._fee(size * price)
+            pnl = self.unrealized(price) - fee
+            self.realized_pnl += pnl
+            self.fees_paid += fee
+            self.trades += 1
+            self.position = {"side": "flat", "size": 0.0, "entry_price": None, "stop": None, "take_profit": None}
+            fill.update(filled=True, size=size, fee=fee, pnl=pnl)
+        fill["equity"] = self.equity
+        return fill
+
+    def check_stops(self, high: float, low: float, open_: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Exit the open position if the bar's range touched its stop or take-profit.
+        The stop wins when both are inside the same bar (conservative). Given
+        the bar's open, a gap through the level fills at the open.
+        """
+        pos = self.position
+        side = pos["side"]
+        if side == "flat":
+            return None
+        stop, tp = pos["stop"], pos["take_profit"]
+        exit_action = "exit_long" if side == "long" else "exit_short"
+        o = _price_or_none(open_)
+        if side == "long":
+            if stop is not None and low <= stop:
+                return self.submit(exit_action, 1.0, min(stop, o) if o else stop)
+            if tp is not None and high >= tp:
+                return self.submit(exit_action, 1.0, max(tp, o) if o else tp)
+        else:
+            if stop is not None and high >= stop:
+                return self.submit(exit_action, 1.0, max(stop, o) if o else stop)
+            if tp is not None and low <= tp:
+                return self.submit(exit_action, 1.0, min(tp, o) if o else tp)
+        return None
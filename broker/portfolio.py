@@ -0,0 +1,324 @@
+"""
+Multi-position paper portfolio. Strictly no live orders.
+
+Positions live in parallel arrays indexed by a per-pair slot: side (+1 long,
+-1 short, 0 flat), size, entry, stop, take_profit (NaN = none), last mark and
+unrealized PnL. Once per cycle, `mark` revalues every position and
+`check_stops` finds every stop/take-profit hit in one vectorized pass (NumPy
+when installed, a plain loop over the arrays otherwise); only the triggered
+slots are then filled one by one, at the level, or at the bar's open when
+the bar gapped through it. Levels on the wrong side of the entry price are
+dropped when the position is opened (`levels_on_side`), so they can never
+trigger at once and fill better than the market.
+
+Totals (`equity`, `unrealized`, `exposure`) are cached and kept current on
+every fill and mark, so the risk layer reads them in O(1).
+
+Fees follow `PaperBroker`: `fee_bps` is the round-trip cost, half of it is
+charged on each fill against the notional traded.
+"""
+from array import array
+from typing import Any, Dict, List, Mapping, Tuple
+import math
+
+from broker.paper_broker import _price_or_none
+from contracts.action_contract import levels_on_side
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover
+    np = None  # falls back to array('d') storage and Python loops
+
+_NAN = float("nan")
+_COLUMNS = ("side", "size", "entry", "stop", "take_profit", "last", "upnl")
+_SIDE_NAMES = {1: "long", -1: "short", 0: "flat"}
+
+
+def _alloc(n: int, fill: float) -> Any:
+    if np is not None:
+        return np.full(n, fill, dtype=np.float64)
+    return array("d", [fill]) * n
+
+
+def _grow(col: Any, n: int, fill: float) -> Any:
+    if np is not None:
+        return np.concatenate([col, np.full(n - len(col), fill)])
+    col.extend(array("d", [fill]) * (n - len(col)))
+    return col
+
+
+class PaperPortfolio:
+    def __init__(self, fee_bps: float = 5.0, equity: float = 10_000.0, capacity: int = 64) -> None:
+        self.fee_bps = float(fee_bps)
+        self.starting_equity = float(equity)
+        self.realized_pnl = 0.0   # net of fees
+        self.fees_paid = 0.0
+        self.trades = 0           # closed round trips
+        self.unrealized = 0.0     # sum of upnl over open positions (cached)
+        self.exposure = 0.0       # sum of |size * last| over open positions (cached)
+        self.pairs: List[str] = []
+        self._slot: Dict[str, int] = {}
+        self._cap = max(1, int(capacity))
+        self.side = _alloc(self._cap, 0.0)
+        self.size = _alloc(self._cap, 0.0)
+        self.entry = _alloc(self._cap, _NAN)
+        self.stop = _alloc(self._cap, _NAN)
+        self.take_profit = _alloc(self._cap, _NAN)
+        self.last = _alloc(self._cap, _NAN)
+        self.upnl = _alloc(self._cap, 0.0)
+
+    # ---------- Totals (O(1)) ----------
+    @property
+    def realized_equity(self) -> float:
+        return self.starting_equity + self.realized_pnl
+
+    @property
+    def equity(self) -> float:
+        """Realized equity plus unrealized PnL at the latest marks."""
+        return self.starting_equity + self.realized_pnl + self.unrealized
+
+    # ---------- Slots ----------
+    def slot(self, pair: str) -> int:
+        """Array index of `pair`, allocating one (and growing the arrays) if new."""
+        i = self._slot.get(pair)
+        if i is not None:
+            return i
+        i = len(self.pairs)
+        if i >= self._cap:
+            self._cap *= 2
+            for name in _COLUMNS:
+                fill = _NAN if name in ("entry", "stop", "take_profit", "last") else 0.0
+                setattr(self, name, _grow(getattr(self, name), self._cap, fill))
+        self._slot[pair] = i
+        self.pairs.append(pair)
+        return i
+
+    def position(self, pair: str) -> Dict[str, Any]:
+        """Position dict in the `PaperBroker.position` shape (for the LLM/risk inputs)."""
+        i = self._slot.get(pair)
+        side = int(self.side[i]) if i is not None else 0
+        if not side:
+            return {"side": "flat", "size": 0.0, "entry_price": None, "stop": None, "take_profit": None}
+        return {
+            "side": _SIDE_NAMES[side],
+            "size": float(self.size[i]),
+            "entry_price": float(self.entry[i]),
+            "stop": None if math.isnan(self.stop[i]) else float(self.stop[i]),
+            "take_profit": None if math.isnan(self.take_profit[i]) else float(self.take_profit[i]),
+        }
+
+    def open_pairs(self) -> List[str]:
+        return [p for p, i in self._slot.items() if self.side[i]]
+
+    def restore(self, pair: str, position: Mapping[str, Any]) -> None:
+        """
+        Reopen a position saved in the `position` shape (e.g. from the state
+        store after a restart), marked at its entry. No fill, no fee.
+        """
+        side = {"long": 1.0, "short": -1.0}.get(position.get("side"))
+        size, entry = _price_or_none(position.get("size")), _price_or_none(position.get("entry_price"))
+        if side is None or size is None or entry is None:
+            raise ValueError(f"Not an open position for {pair}: {position!r}")
+        sl, tp = _price_or_none(position.get("stop")), _price_or_none(position.get("take_profit"))
+        i = self.slot(pair)
+        if self.side[i]:
+            raise ValueError(f"{pair} already has an open position")
+        self.side[i] = side
+        self.size[i] = size
+        self.entry[i] = entry
+        self.stop[i] = _NAN if sl is None else sl
+        self.take_profit[i] = _NAN if tp is None else tp
+        self.upnl[i] = 0.0
+        self.last[i] = _NAN
+        self._set_upnl(i, entry)
+
+    # ---------- Fills ----------
+    def _fee(self, notional: float) -> float:
+        return abs(notional) * self.fee_bps / 10_000.0 / 2.0
+
+    def _set_upnl(self, i: int, price: float) -> None:
+        """Revalue slot `i` at `price` and adjust the cached totals."""
+        side = self.side[i]
+        new_upnl = side * self.size[i] * (price - self.entry[i]) if side else 0.0
+        new_exp = abs(self.size[i] * price) if side else 0.0
+        old_exp = abs(self.size[i] * self.last[i]) if side and not math.isnan(self.last[i]) else 0.0
+        self.unrealized += new_upnl - self.upnl[i]
+        self.exposure += new_exp - old_exp
+        self.upnl[i] = new_upnl
+        self.last[i] = price
+
+    def submit(self, pair: str, action: str, size_fraction: float, price: float,
+               stop: Any = None, take_profit: Any = None) -> Dict[str, Any]:
+        """
+        Simulate a fill for `pair` at `price`. Entries need that pair flat and
+        are sized as `size_fraction * realized equity / price` (a stop or
+        take-profit on the wrong side of `price` is dropped); exits close the
+        whole position on the matching side. Anything else is not filled.
+        """
+        fill: Dict[str, Any] = {
+            "filled": False,
+            "pair": pair,
+            "action": action,
+            "size_fraction": size_fraction,
+            "price": price,
+            "fee_bps": self.fee_bps,
+            "stop": stop,
+            "take_profit": take_profit,
+            "size": 0.0,
+            "fee": 0.0,
+            "pnl": 0.0,
+        }
+        if price is None or price <= 0:
+            fill["equity"] = self.equity
+            return fill
+        i = self.slot(pair)
+        side = int(self.side[i])
+        if action in ("enter_long", "enter_short"):
+            if side or size_fraction <= 0.0 or self.realized_equity <= 0.0:
+                fill["equity"] = self.equity
+                return fill
+            size = size_fraction * self.realized_equity / price
+            fee = self._fee(size * price)
+            new_side = 1.0 if action == "enter_long" else -1.0
+            sl, tp = levels_on_side(new_side, price, stop, take_profit)
+            fill.update(stop=sl, take_profit=tp)
+            self.side[i] = new_side
+            self.size[i] = size
+            self.entry[i] = price
+            self.stop[i] = _NAN if sl is None else sl
+            self.take_profit[i] = _NAN if tp is None else tp
+            self.upnl[i] = 0.0
+            self.last[i] = _NAN
+            self._set_upnl(i, price)
+            self.realized_pnl -= fee
+            self.fees_paid += fee
+            fill.update(filled=True, size=size, fee=fee, pnl=-fee)
+        elif (action == "exit_long" and side == 1) or (action == "exit_short" and side == -1):
+            size = float(self.size[i])
+            fee = self._fee(size * price)
+            pnl = side * size * (price - self.entry[i]) - fee
+            self._set_upnl(i, price)
+            self.unrealized -= self.upnl[i]
+            self.exposure -= abs(size * price)
+            self.realized_pnl += pnl
+            self.fees_paid += fee
+            self.trades += 1
+            self.side[i] = 0.0
+            self.size[i] = 0.0
+            self.entry[i] = self.stop[i] = self.take_profit[i] = _NAN
+            self.upnl[i] = 0.0
+            fill.update(filled=True, size=size, fee=fee, pnl=pnl)
+        fill["equity"] = self.equity
+        return fill
+
+    # ---------- Per-cycle passes ----------
+    def _column(self, values: Mapping[str, float]) -> Any:
+        """Values aligned to the slots (NaN where missing)."""
+        col = _alloc(len(self.pairs), _NAN)
+        for pair, v in values.items():
+            i = self._slot.get(pair)
+            if i is not None and v is not None:
+                col[i] = v
+        return col
+
+    def mark(self, prices: Mapping[str, float]) -> float:
+        """Revalue every open position at `prices` (pairs missing keep their last mark); returns equity."""
+        n = len(self.pairs)
+        if not n:
+            return self.equity
+        px = self._column(prices)
+        if np is not None:
+            side, size = self.side[:n], self.size[:n]
+            last = np.where(np.isnan(px), self.last[:n], px)
+            is_open = side != 0
+            self.last[:n] = last
+            self.upnl[:n] = np.where(is_open, side * size * (last - self.entry[:n]), 0.0)
+            self.unrealized = float(np.nansum(self.upnl[:n]))
+            self.exposure = float(np.nansum(np.where(is_open, np.abs(size * last), 0.0)))
+        else:
+            unreal = 0.0
+            exposure = 0.0
+            for i in range(n):
+                p = px[i]
+                if not math.isnan(p):
+                    self.last[i] = p
+                if self.side[i]:
+                    last = self.last[i]
+                    u = self.side[i] * self.size[i] * (last - self.entry[i])
+                    if not math.isnan(u):
+                        self.upnl[i] = u
+                        unreal += u
+                        exposure += abs(self.size[i] * last)
+            self.unrealized = unreal
+            self.exposure = exposure
+        return self.equity
+
+    def _triggers(self, highs: Any, lows: Any, opens: Any) -> List[Tuple[int, float]]:
+        """
+        (slot, exit price) for every position whose stop or take-profit was
+        hit; stop wins ties. The exit is at the level, or at the open when the
+        bar opened beyond it (a gap); a NaN open means the level.
+        """
+        n = len(self.pairs)
+        if np is not None:
+            side, sl, tp = self.side[:n], self.stop[:n], self.take_profit[:n]
+            with np.errstate(invalid="ignore"):
+                long_sl = (side > 0) & (lows <= sl)
+                long_tp = (side > 0) & (highs >= tp) & ~long_sl
+                short_sl = (side < 0) & (highs >= sl)
+                short_tp = (side < 0) & (lows <= tp) & ~short_sl
+            hit_sl = long_sl | short_sl
+            hit = hit_sl | long_tp | short_tp
+            level = np.where(hit_sl, sl, tp)
+            # the exit moves to the open when it is past the level in the direction of the trigger
+            down = long_sl | short_tp
+            px = np.where(down, np.fmin(level, opens), np.fmax(level, opens))
+            idx = np.flatnonzero(hit)
+            return [(int(i), float(px[i])) for i in idx]
+        out = []
+        for i in range(n):
+            side = self.side[i]
+            if not side:
+                continue
+            sl, tp, h, l, o = self.stop[i], self.take_profit[i], highs[i], lows[i], opens[i]
+            gap = not math.isnan(o)
+            if side > 0:
+                if l <= sl:
+                    out.append((i, min(sl, o) if gap else sl))
+                elif h >= tp:
+                    out.append((i, max(tp, o) if gap else tp))
+            else:
+                if h >= sl:
+                    out.append((i, max(sl, o) if gap else sl))
+                elif l <= tp:
+                    out.append((i, min(tp, o) if gap else tp))
+        return out
+
+    def check_stops(self, bars: Mapping[str, Tuple[float, ...]]) -> List[Dict[str, Any]]:
+        """
+        Exit every position whose bar range ({pair: (high, low)} or
+        {pair: (high, low, open)}) touched its stop or take-profit; returns
+        the fills. With the open, a bar that gapped through a level fills at
+        the open instead of the level.
+        """
+        if not self.pairs:
+            return []
+        highs = self._column({p: b[0] for p, b in bars.items()})
+        lows = self._column({p: b[1] for p, b in bars.items()})
+        opens = self._column({p: b[2] for p, b in bars.items() if len(b) > 2})
+        fills = []
+        for i, price in self._triggers(highs, lows, opens):
+            side = self.side[i]
+            action = "exit_long" if side > 0 else "exit_short"
+            fills.append(self.submit(self.pairs[i], action, 1.0, price))
+        return fills
+
+    def step(self, bars: Mapping[str, Tuple[float, ...]]) -> List[Dict[str, Any]]:
+        """
+        One cycle: {pair: (high, low, close)} or {pair: (high, low, close,
+        open)} -> stop/take-profit exits, then mark everything at the close.
+        Returns the stop fills.
+        """
+        fills = self.check_stops({p: (b[0], b[1]) + tuple(b[3:4]) for p, b in bars.items()})
+        self.mark({p: b[2] for p, b in bars.items()})
+        return fills
@@ -34,11 +34,40 @@ class Config:
 
     # Runtime toggles
     auto_eur: bool = False                  # discover/trade EUR-quoted pairs (later step)
-    loop_interval: int = 15                 # seconds between cycles (used later)
+    loop_interval: int = 15                 # seconds between re-polls while a closed candle is not published yet
+
+    # Multi-pair OHLC scanning (Kraken public endpoints are rate limited per IP)
+    scan_concurrency: int = 4               # max OHLC requests in flight
+    scan_rate: float = 1.0                  # sustained public calls per second
+    scan_burst: int = 5                     # token bucket capacity
+    pairs_ttl: int = 21600                  # seconds to trust the on-disk AssetPairs snapshot
+    ws_feed: bool = False                   # drive cycles from the WebSocket ohlc feed; REST only seeds/fills gaps
+    ws_url: str = "wss://ws.kraken.com/v2"  # Kraken WebSocket v2 endpoint
 
     # Integrations (public data for Kraken; Groq needs API key)
     groq_api_key: Optional[str] = None
     groq_model: str = "llama3.1-70b"
+    groq_stream: bool = False               # stream replies; stop at the first complete JSON object
+    llm_batch_size: int = 8                 # pairs packed into one LLM request
+    llm_concurrency: int = 4                # LLM batch requests in flight
+    llm_deadline: float = 10.0              # seconds per cycle before pending pairs default to hold
+    screen_top_k: int = 0                   # auto-EUR: only the K best-scoring pairs (+ open positions) go to the LLM (0 = all)
+    decision_cache_size: int = 4096         # max cached LLM decisions (LRU)
+    decision_cache_ttl: float = 300.0       # seconds a cached decision stays valid
+    decision_cache_persist: bool = False    # keep the cache in storage_dir across restarts
+
+    # Warm start
+    indicator_checkpoint_every: int = 1     # cycles between indicator state checkpoints (0 = off)
+
+    # Metrics (Prometheus text format; off by default)
+    metrics_enabled: bool = False           # collect stage timers and counters
+    metrics_file: str = ""                  # write the exposition here after each cycle ("" = no file)
+    metrics_port: int = 0                   # serve /metrics on 127.0.0.1:<port> (0 = no server)
+
+    # Logging
+    log_level: str = "INFO"
+    log_format: str = "text"                # "text" or "json" (one JSON object per line)
+    log_rate_limit: float = 0.0             # max lines/s per call site below WARNING (0 = unlimited)
 
     # Storage
     storage_dir: str = "storage"
@@ -96,10 +125,52 @@ def _from_env() -> Dict[str, Any]:
         cfg["auto_eur"] = _coerce_bool(env["AUTO_EUR"])
     if "LOOP_INTERVAL" in env:
         cfg["loop_interval"] = env["LOOP_INTERVAL"]
+    if "SCAN_CONCURRENCY" in env:
+        cfg["scan_concurrency"] = env["SCAN_CONCURRENCY"]
+    if "SCAN_RATE" in env:
+        cfg["scan_rate"] = env["SCAN_RATE"]
+    if "SCAN_BURST" in env:
+        cfg["scan_burst"] = env["SCAN_BURST"]
+    if "PAIRS_TTL" in env:
+        cfg["pairs_ttl"] = env["PAIRS_TTL"]
+    if "WS_FEED" in env:
+        cfg["ws_feed"] = _coerce_bool(env["WS_FEED"])
+    if "WS_URL" in env:
+        cfg["ws_url"] = env["WS_URL"]
     if "GROQ_API_KEY" in env:
         cfg["groq_api_key"] = env["GROQ_API_KEY"]
     if "GROQ_MODEL" in env:
         cfg["groq_model"] = env["GROQ_MODEL"]
+    if "GROQ_STREAM" in env:
+        cfg["groq_stream"] = _coerce_bool(env["GROQ_STREAM"])
+    if "LLM_BATCH_SIZE" in env:
+        cfg["llm_batch_size"] = env["LLM_BATCH_SIZE"]
+    if "LLM_CONCURRENCY" in env:
+        cfg["llm_concurrency"] = env["LLM_CONCURRENCY"]
+    if "LLM_DEADLINE" in env:
+        cfg["llm_deadline"] = env["LLM_DEADLINE"]
+    if "SCREEN_TOP_K" in env:
+        cfg["screen_top_k"] = env["SCREEN_TOP_K"]
+    if "DECISION_CACHE_SIZE" in env:
+        cfg["decision_cache_size"] = env["DECISION_CACHE_SIZE"]
+    if "DECISION_CACHE_TTL" in env:
+        cfg["decision_cache_ttl"] = env["DECISION_CACHE_TTL"]
+    if "DECISION_CACHE_PERSIST" in env:
+        cfg["decision_cache_persist"] = _coerce_bool(env["DECISION_CACHE_PERSIST"])
+    if "INDICATOR_CHECKPOINT_EVERY" in env:
+        cfg["indicator_checkpoint_every"] = env["INDICATOR_CHECKPOINT_EVERY"]
+    if "METRICS_ENABLED" in env:
+        cfg["metrics_enabled"] = _coerce_bool(env["METRICS_ENABLED"])
+    if "METRICS_FILE" in env:
+        cfg["metrics_file"] = env["METRICS_FILE"]
+    if "METRICS_PORT" in env:
+        cfg["metrics_port"] = env["METRICS_PORT"]
+    if "LOG_LEVEL" in env:
+        cfg["log_level"] = env["LOG_LEVEL"]
+    if "LOG_FORMAT" in env:
+        cfg["log_format"] = env["LOG_FORMAT"]
+    if "LOG_RATE_LIMIT" in env:
+        cfg["log_rate_limit"] = env["LOG_RATE_LIMIT"]
     if "STORAGE_DIR" in env:
         cfg["storage_dir"] = env["STORAGE_DIR"]
     if "LOGS_DIR" in env:
@@ -110,16 +181,19 @@ def _from_env() -> Dict[str, Any]:
 def _coerce_types(raw: Dict[str, Any]) -> Dict[str, Any]:
     out: Dict[str, Any] = dict(raw)
     # floats
-    for k in ("fee_bps", "per_trade_loss_cap", "daily_loss_cap"):
+    for k in ("fee_bps", "per_trade_loss_cap", "daily_loss_cap", "scan_rate", "llm_deadline",
+              "decision_cache_ttl", "log_rate_limit"):
         if k in out:
             out[k] = float(out[k])
     # ints
-    for k in ("loop_interval",):
+    for k in ("loop_interval", "scan_concurrency", "scan_burst", "pairs_ttl", "llm_batch_size",
+              "llm_concurrency", "screen_top_k", "decision_cache_size", "metrics_port", "indicator_checkpoint_every"):
         if k in out:
             out[k] = int(out[k])
     # bools
-    if "auto_eur" in out:
-        out["auto_eur"] = _coerce_bool(out["auto_eur"])
+    for k in ("auto_eur", "ws_feed", "groq_stream", "decision_cache_persist", "metrics_enabled"):
+        if k in out:
+            out[k] = _coerce_bool(out[k])
     # strings remain as-is
     return out
 
@@ -133,6 +207,39 @@ def _validate(cfg: Config) -> Config:
         raise ValueError("fee_bps must be within [0, 5000]")
     if cfg.loop_interval <= 0:
         raise ValueError("loop_interval must be > 0")
+    if cfg.scan_concurrency <= 0:
+        raise ValueError("scan_concurrency must be > 0")
+    if cfg.scan_rate <= 0.0:
+        raise ValueError("scan_rate must be > 0")
+    if cfg.scan_burst < 1:
+        raise ValueError("scan_burst must be >= 1")
+    if cfg.pairs_ttl < 0:
+        raise ValueError("pairs_ttl must be >= 0")
+    if not str(cfg.ws_url).startswith(("ws://", "wss://")):
+        raise ValueError("ws_url must start with ws:// or wss://")
+    if cfg.llm_batch_size <= 0:
+        raise ValueError("llm_batch_size must be > 0")
+    if cfg.llm_concurrency <= 0:
+        raise ValueError("llm_concurrency must be > 0")
+    if cfg.llm_deadline <= 0.0:
+        raise ValueError("llm_deadline must be > 0")
+    if cfg.screen_top_k < 0:
+        raise ValueError("screen_top_k must be >= 0")
+    if cfg.decision_cache_size <= 0:
+        raise ValueError("decision_cache_size must be > 0")
+    if cfg.decision_cache_ttl <= 0.0:
+        raise ValueError("decision_cache_ttl must be > 0")
+    if cfg.indicator_checkpoint_every < 0:
+        raise ValueError("indicator_checkpoint_every must be >= 0")
+    if not (0 <= cfg.metrics_port <= 65535):
+        raise ValueError("metrics_port must be within [0, 65535]")
+    cfg.log_level = str(cfg.log_level).upper()
+    if cfg.log_level not in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
+        raise ValueError("log_level must be one of DEBUG, INFO, WARNING, ERROR, CRITICAL")
+    if cfg.log_format not in ("text", "json"):
+        raise ValueError("log_format must be 'text' or 'json'")
+    if cfg.log_rate_limit < 0.0:
+        raise ValueError("log_rate_limit must be >= 0")
     if cfg.timeframe not in _ALLOWED_TIMEFRAMES:
         # allow custom, but warn later; here we normalize to default
         cfg.timeframe = "5m"
@@ -2,7 +2,8 @@
 Strict action contract schema and validation (stub).
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+import math
 
 VALID_ACTIONS = {"enter_long", "exit_long", "enter_short", "exit_short", "hold"}
 
@@ -45,3 +46,20 @@ def validate_contract(obj: Dict[str, Any]) -> Dict[str, Any]:
         "confidence": conf,
         "reason": str(obj.get("reason", "placeholder")),
     }
+
+def levels_on_side(side: float, price: float, stop: Any, take_profit: Any) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Stop and take-profit of a position on `side` (> 0 long, < 0 short) opened
+    at `price`, as floats; each is None when missing, not a positive number,
+    or on the wrong side (a long's stop must be below the price and its
+    take-profit above it, a short's the other way round).
+    """
+    levels = []
+    for val, below in ((stop, side > 0), (take_profit, side < 0)):
+        try:
+            f = float(val)
+        except (TypeError, ValueError):
+            f = math.nan
+        ok = math.isfinite(f) and f > 0 and (f < price if below else f > price)
+        levels.append(f if ok else None)
+    return levels[0], levels[1]
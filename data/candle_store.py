@@ -0,0 +1,205 @@
+"""
+Append-only on-disk candle store (stdlib only).
+
+Layout: one file per pair and timeframe under `<storage_dir>/candles/`, e.g.
+`candles/BTC-EUR_5m.bin`. Each file is a sequence of fixed-width little-endian
+records of six float64 fields: t, o, h, l, c, v (48 bytes per candle),
+ascending by t.
+
+Notes:
+- Writers only append, except for the last record, which is overwritten in
+  place while the candle is still forming (same t, revised values).
+- Readers map the file with mmap; `CandleView` exposes zero-copy memoryviews
+  (and NumPy arrays when available) over the records.
+- A torn trailing record (crash mid-write) is truncated on the next write.
+"""
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from pathlib import Path
+import mmap
+import os
+import struct
+
+from data.candles import CandleSeries
+
+_RECORD = struct.Struct("<6d")
+_FIELDS = ("t", "o", "h", "l", "c", "v")
+
+
+def _file_key(pair: str, timeframe: str) -> str:
+    return f"{pair.replace('/', '-')}_{timeframe}.bin"
+
+
+class CandleView:
+    """
+    Read-only memory-mapped view over a candle file. Close it (or use it as a
+    context manager) to release the mapping.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._mm: Optional[mmap.mmap] = None
+        self._mv: Optional[memoryview] = None
+        self.count = 0
+        size = path.stat().st_size if path.exists() else 0
+        n = size // _RECORD.size
+        if n == 0:
+            return
+        with path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), n * _RECORD.size, access=mmap.ACCESS_READ)
+        self._mv = memoryview(self._mm).cast("d")
+        self.count = n
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "CandleView":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mv is not None:
+            self._mv.release()
+            self._mv = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self.count = 0
+
+    def flat(self) -> memoryview:
+        """All fields as one flat float64 memoryview: [t0, o0, h0, l0, c0, v0, t1, ...]."""
+        return self._mv if self._mv is not None else memoryview(b"").cast("d")
+
+    def column(self, field: str) -> memoryview:
+        """Strided zero-copy view of one field, e.g. column('c') for closes."""
+        return self.flat()[_FIELDS.index(field) :: len(_FIELDS)]
+
+    def array(self) -> Any:
+        """(count, 6) NumPy array backed by the mapping (requires numpy)."""
+        import numpy as np
+
+        return np.frombuffer(self.flat(), dtype="<f8").reshape(-1, len(_FIELDS))
+
+    def rows(self) -> Iterator[Tuple[int, float, float, float, float, float]]:
+        """Iterate (t, o, h, l, c, v) tuples straight from the mapping (same shape as `CandleSeries.rows`)."""
+        if self._mm is None:
+            return iter(())
+        return ((int(r[0]),) + r[1:] for r in _RECORD.iter_unpack(self._mm))
+
+    def series(self, limit: Optional[int] = None) -> CandleSeries:
+        """Last `limit` candles (all when None) copied out into a columnar `CandleSeries`."""
+        out = CandleSeries()
+        if self._mm is None:
+            return out
+        start = 0 if not limit else max(0, self.count - int(limit))
+        flat = self.flat()[start * len(_FIELDS) :]
+        for i, col in enumerate(out.columns()):
+            # strided view -> contiguous bytes in one C-level copy
+            data = array("d")
+            data.frombytes(flat[i :: len(_FIELDS)].tobytes())
+            if col.typecode == "d":
+                col.extend(data)
+            else:
+                col.extend(map(int, data))
+        return out
+
+    def tail(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Last `limit` candles (all when None) as dicts {"t","o","h","l","c","v"}."""
+        if self._mm is None:
+            return []
+        start = 0 if not limit else max(0, self.count - int(limit))
+        buf = self._mm[start * _RECORD.size :]
+        return [
+            {"t": int(t), "o": o, "h": h, "l": l, "c": c, "v": v}
+            for t, o, h, l, c, v in _RECORD.iter_unpack(buf)
+        ]
+
+
+class CandleStore:
+    def __init__(self, storage_dir: str = "storage") -> None:
+        self.root = Path(storage_dir) / "candles"
+
+    def path(self, pair: str, timeframe: str) -> Path:
+        return self.root / _file_key(pair, timeframe)
+
+    def count(self, pair: str, timeframe: str) -> int:
+        p = self.path(pair, timeframe)
+        return p.stat().st_size // _RECORD.size if p.exists() else 0
+
+    def last_t(self, pair: str, timeframe: str) -> Optional[int]:
+        """Open time of the newest stored candle, or None if the file is empty."""
+        p = self.path(pair, timeframe)
+        n = self.count(pair, timeframe)
+        if n == 0:
+            return None
+        with p.open("rb") as f:
+            f.seek((n - 1) * _RECORD.size)
+            return int(_RECORD.unpack(f.read(_RECORD.size))[0])
+
+    def reset(self, pair: str, timeframe: str) -> None:
+        p = self.path(pair, timeframe)
+        if p.exists():
+            p.unlink()
+
+    def write(self, pair: str, timeframe: str, candles: Union[CandleSeries, Iterable[Dict[str, Any]]]) -> int:
+        """
+        Merge `candles` (ascending by t) into the file:
+        - t older than the last stored candle: ignored
+        - t equal to the last stored candle: overwritten in place (still forming)
+        - t newer: appended
+        Returns the number of records written.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        p = self.path(pair, timeframe)
+        written = 0
+        with open(p, "a+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            n = size // _RECORD.size
+            if size != n * _RECORD.size:
+                f.truncate(n * _RECORD.size)
+            last: Optional[int] = None
+            if n:
+                f.seek((n - 1) * _RECORD.size)
+                last = int(_RECORD.unpack(f.read(_RECORD.size))[0])
+            # "a+b" forces appends; reopen r+b only when the last record is revised
+            tail = bytearray()
+            revised: Optional[bytes] = None
+            if isinstance(candles, CandleSeries):
+                rows: Iterable[Any] = candles.rows()
+            else:
+                rows = ((c["t"], c["o"], c["h"], c["l"], c["c"], c["v"]) for c in candles)
+            for row in rows:
+                t = int(row[0])
+                rec = _RECORD.pack(t, *row[1:])
+                if last is not None and t < last:
+                    continue
+                if last is not None and t == last:
+                    if tail:
+                        # duplicate of a candle appended in this same batch
+                        tail[-_RECORD.size :] = rec
+                    else:
+                        revised = rec
+                    written += 1
+                    continue
+                tail += rec
+                last = t
+                written += 1
+            if tail:
+                f.write(tail)
+        if revised is not None:
+            with open(p, "r+b") as f:
+                f.seek((n - 1) * _RECORD.size)
+                f.write(revised)
+        return written
+
+    def open_view(self, pair: str, timeframe: str) -> CandleView:
+        return CandleView(self.path(pair, timeframe))
+
+    def read(self, pair: str, timeframe: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self.open_view(pair, timeframe) as view:
+            return view.tail(limit)
+
+    def read_series(self, pair: str, timeframe: str, limit: Optional[int] = None) -> CandleSeries:
+        with self.open_view(pair, timeframe) as view:
+            return view.series(limit)
@@ -0,0 +1,118 @@
+"""
+Columnar candle series (stdlib only).
+
+`CandleSeries` stores t/o/h/l/c/v as typed arrays (`array('q')` for t,
+`array('d')` for the rest) instead of one dict per candle: 48 bytes per
+candle, no per-row objects, and columns the indicators can consume directly.
+
+For code that still expects the list-of-dicts form, indexing and iteration
+return {"t","o","h","l","c","v"} dicts, and `to_dicts()` materializes them.
+"""
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+_FIELDS = ("t", "o", "h", "l", "c", "v")
+
+
+class CandleSeries:
+    __slots__ = _FIELDS
+
+    def __init__(
+        self,
+        t: Optional[array] = None,
+        o: Optional[array] = None,
+        h: Optional[array] = None,
+        l: Optional[array] = None,
+        c: Optional[array] = None,
+        v: Optional[array] = None,
+    ) -> None:
+        self.t = t if t is not None else array("q")
+        self.o = o if o is not None else array("d")
+        self.h = h if h is not None else array("d")
+        self.l = l if l is not None else array("d")
+        self.c = c if c is not None else array("d")
+        self.v = v if v is not None else array("d")
+
+    # ---------- Construction ----------
+    @classmethod
+    def from_kraken_rows(cls, rows: Sequence[Sequence[Any]]) -> "CandleSeries":
+        """
+        Parse Kraken OHLC rows [time, o, h, l, c, vwap, volume, count] column by
+        column. Malformed rows are skipped (slow path only when one is present).
+        """
+        try:
+            series = cls(
+                array("q", [int(r[0]) for r in rows]),
+                array("d", [float(r[1]) for r in rows]),
+                array("d", [float(r[2]) for r in rows]),
+                array("d", [float(r[3]) for r in rows]),
+                array("d", [float(r[4]) for r in rows]),
+                array("d", [float(r[6]) for r in rows]),  # "volume" field
+            )
+        except Exception:
+            series = cls()
+            for r in rows:
+                try:
+                    vals = (int(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), float(r[6]))
+                except Exception:
+                    continue
+                series.append(*vals)
+        return series.sorted()
+
+    @classmethod
+    def from_dicts(cls, candles: Iterable[Dict[str, Any]]) -> "CandleSeries":
+        series = cls()
+        for r in candles:
+            series.append(int(r["t"]), float(r["o"]), float(r["h"]), float(r["l"]), float(r["c"]), float(r["v"]))
+        return series
+
+    def append(self, t: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        self.t.append(t)
+        self.o.append(o)
+        self.h.append(h)
+        self.l.append(l)
+        self.c.append(c)
+        self.v.append(v)
+
+    def sorted(self) -> "CandleSeries":
+        """Return self if ascending by t (the normal case), else a sorted copy."""
+        t = self.t
+        if all(t[i] <= t[i + 1] for i in range(len(t) - 1)):
+            return self
+        order = sorted(range(len(t)), key=t.__getitem__)
+        return CandleSeries(*(array(col.typecode, [col[i] for i in order]) for col in self.columns()))
+
+    # ---------- Access ----------
+    def columns(self) -> Tuple[array, array, array, array, array, array]:
+        return self.t, self.o, self.h, self.l, self.c, self.v
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Any:
+        if isinstance(idx, slice):
+            return CandleSeries(*(col[idx] for col in self.columns()))
+        return {"t": self.t[idx], "o": self.o[idx], "h": self.h[idx], "l": self.l[idx], "c": self.c[idx], "v": self.v[idx]}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for t, o, h, l, c, v in zip(*self.columns()):
+            yield {"t": t, "o": o, "h": h, "l": l, "c": c, "v": v}
+
+    def rows(self) -> Iterator[Tuple[int, float, float, float, float, float]]:
+        """Iterate (t, o, h, l, c, v) tuples without building dicts."""
+        return zip(*self.columns())
+
+    def tail(self, n: int) -> "CandleSeries":
+        """Last `n` candles (copies only those n)."""
+        if n <= 0:
+            return CandleSeries()
+        if n >= len(self):
+            return self
+        return self[-n:]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        last = self.t[-1] if len(self) else None
+        return f"CandleSeries(n={len(self)}, last_t={last})"
@@ -9,16 +9,28 @@ Notes:
 - We normalize pair names to 'BTC/EUR' style for the user.
 - Kraken prefers internal pair codes (e.g., 'XXBTZEUR'); we map both ways.
 - No private endpoints are used; this project is paper-trading only.
+- Requests share a keep-alive connection pool (utils/http_pool.py) guarded by a
+  circuit breaker; retries back off exponentially with jitter.
 """
 from typing import List, Any, Dict, Optional, Tuple
+from pathlib import Path
+import hashlib
 import json
+import os
+import threading
 import time
-import urllib.request
-import urllib.parse
+import urllib.error
+
+from data.candle_store import CandleStore
+from data.candles import CandleSeries
+from utils import metrics
+from utils.http_pool import HTTPPool, CircuitBreaker, backoff_delay
 
 _BASE_URL = "https://api.kraken.com"
 _UA = "paper-bot/0.1 (+https://example.invalid)"
 
+_PAIRS_FILE = "asset_pairs.json"
+
 _TF_TO_INTERVAL = {
     "1m": 1,
     "5m": 5,
@@ -27,31 +39,75 @@ _TF_TO_INTERVAL = {
     "4h": 240,
 }
 
-def _http_get(path: str, params: Dict[str, Any], timeout: float = 10.0, retries: int = 3, backoff: float = 0.5) -> Dict[str, Any]:
-    url = f"{_BASE_URL}{path}"
-    if params:
-        url = f"{url}?{urllib.parse.urlencode(params)}"
+_POOL: Optional[HTTPPool] = None
+_BREAKER = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+
+def configure_transport(base_url: Optional[str] = None, max_connections: int = 8,
+                        failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+    """Rebuild the shared connection pool/circuit breaker (e.g. to point at a local stand-in server)."""
+    global _BASE_URL, _POOL, _BREAKER
+    if base_url:
+        _BASE_URL = base_url.rstrip("/")
+    if _POOL is not None:
+        _POOL.close()
+    _POOL = HTTPPool(_BASE_URL, max_size=max_connections, user_agent=_UA)
+    _BREAKER = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+
+def _pool() -> HTTPPool:
+    global _POOL
+    if _POOL is None:
+        _POOL = HTTPPool(_BASE_URL, user_agent=_UA)
+    return _POOL
+
+
+def _http_request(path: str, params: Dict[str, Any], timeout: float = 10.0, retries: int = 3, backoff: float = 0.5,
+                  headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any, Dict[str, Any]]:
+    """
+    GET `path` and return (status, response headers, result). A 304 reply to a
+    conditional request returns an empty result.
+    """
     last_err: Optional[Exception] = None
     for attempt in range(retries):
+        # Fails fast (no retries) while the breaker is open
+        _BREAKER.before_call()
         try:
-            req = urllib.request.Request(url, headers={"User-Agent": _UA})
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                data = resp.read()
-            obj = json.loads(data.decode("utf-8"))
+            try:
+                with metrics.timer("kraken_http_seconds", path=path):
+                    status, resp_headers, data = _pool().request("GET", path, params=params, headers=headers, timeout=timeout)
+                if status == 429 or status >= 500:
+                    raise urllib.error.HTTPError(f"{_BASE_URL}{path}", status, "HTTP error", resp_headers, None)
+            except Exception:
+                # transport-level failure: counts towards the circuit breaker
+                _BREAKER.record_failure()
+                raise
+            _BREAKER.record_success()
+            if status == 304:
+                return status, resp_headers, {}
+            if status >= 400:
+                raise urllib.error.HTTPError(f"{_BASE_URL}{path}", status, "HTTP error", resp_headers, None)
+            with metrics.timer("kraken_json_parse_seconds", path=path):
+                obj = json.loads(data.decode("utf-8"))
             if obj.get("error"):
                 # Kraken returns a list of error strings; surface the first
                 raise RuntimeError(f"Kraken API error: {obj['error'][0]}")
-            return obj.get("result", {})
+            return status, resp_headers, obj.get("result", {})
         except Exception as e:
             last_err = e
             if attempt < retries - 1:
-                time.sleep(backoff * (2 ** attempt))
+                metrics.inc("kraken_http_retries_total", path=path)
+                time.sleep(backoff_delay(backoff, attempt))
             else:
                 raise
     # Should not reach
     if last_err:
         raise last_err
-    return {}
+    return 0, None, {}
+
+
+def _http_get(path: str, params: Dict[str, Any], timeout: float = 10.0, retries: int = 3, backoff: float = 0.5) -> Dict[str, Any]:
+    return _http_request(path, params, timeout=timeout, retries=retries, backoff=backoff)[2]
 
 
 def _normalize_wsname(wsname: str) -> str:
@@ -64,80 +120,180 @@ def _normalize_wsname(wsname: str) -> str:
     return f"{base}/{quote}" if sep else wsname
 
 
+def _parse_ohlc(res: Dict[str, Any], code: str) -> CandleSeries:
+    # Result is { "<code>": [[time, open, high, low, close, vwap, volume, count], ...], "last": <id> }
+    rows = None
+    # Kraken sometimes keys by the canonical code; fetch first list-like value
+    if code in res:
+        rows = res.get(code, [])
+    else:
+        # pick first array in result
+        for v in res.values():
+            if isinstance(v, list):
+                rows = v
+                break
+    if rows is None:
+        return CandleSeries()
+    # Parsed column-wise and returned ascending by time
+    return CandleSeries.from_kraken_rows(rows)
+
+
+_ALIASES = {"XBT": ("XBT", "BTC"), "BTC": ("XBT", "BTC")}
+
+
+def _pair_keys(code: str, info: Dict[str, Any]) -> List[str]:
+    """Every spelling that should resolve to `code`: wsname, altname and BTC/XBT variants."""
+    wsname = str(info.get("wsname", "")).upper()
+    norm = _normalize_wsname(wsname)
+    keys = {code.upper(), wsname, norm, wsname.replace("/", ""), norm.replace("/", "")}
+    altname = info.get("altname")
+    if isinstance(altname, str):
+        keys.add(altname.upper())
+    base, sep, quote = wsname.partition("/")
+    if sep:
+        for b in _ALIASES.get(base, (base,)):
+            for q in _ALIASES.get(quote, (quote,)):
+                keys.update({f"{b}/{q}", f"{b}{q}"})
+    return [k for k in keys if k]
+
+
 class KrakenClient:
-    def __init__(self) -> None:
+    def __init__(self, store: Optional[CandleStore] = None, cache_dir: Optional[str] = None,
+                 pairs_ttl: float = 6 * 3600.0) -> None:
+        # optional on-disk candle cache; when set, get_ohlc only fetches new bars
+        self._store = store
+        # optional AssetPairs snapshot in `cache_dir`, trusted for `pairs_ttl` seconds
+        self._pairs_path = Path(cache_dir) / _PAIRS_FILE if cache_dir else None
+        self._pairs_ttl = float(pairs_ttl)
         self._pairs_cache: Optional[Dict[str, Dict[str, Any]]] = None  # raw AssetPairs
-        # indices for quick lookup
-        self._by_wsname: Dict[str, str] = {}   # "BTC/EUR" -> kraken_code
-        self._by_altname: Dict[str, str] = {}  # "XBTEUR"  -> kraken_code
+        self._pairs_digest: Optional[str] = None  # digest of the AssetPairs the index was built from
+        self._pairs_lock = threading.Lock()  # scanner threads may race the first load
+        # normalized spelling ("BTC/EUR", "XBTEUR", "XXBTZEUR", ...) -> (kraken_code, "BTC/EUR")
+        self._index: Dict[str, Tuple[str, str]] = {}
+        self._eur_pairs: List[str] = []
 
     # ---------- Pair metadata ----------
     def _ensure_pairs(self) -> None:
         if self._pairs_cache is not None:
             return
-        res = _http_get("/0/public/AssetPairs", params={})
+        with self._pairs_lock:
+            if self._pairs_cache is None:
+                self._load_pairs()
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        if self._pairs_path is None or not self._pairs_path.exists():
+            return None
+        try:
+            with self._pairs_path.open("r", encoding="utf-8") as f:
+                snap = json.load(f)
+            return snap if isinstance(snap.get("result"), dict) else None
+        except Exception:
+            return None
+
+    def _write_snapshot(self, snap: Dict[str, Any]) -> None:
+        if self._pairs_path is None:
+            return
+        self._pairs_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._pairs_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(snap, f, separators=(",", ":"))
+        os.replace(tmp, self._pairs_path)
+
+    def _load_pairs(self) -> None:
+        """
+        Load AssetPairs from the disk snapshot while it is younger than the TTL;
+        otherwise revalidate with If-None-Match/If-Modified-Since. The index is
+        only rebuilt when the content digest differs from the one it was built
+        from, since Kraken may not send validators and a periodic refresh
+        usually finds nothing new. A stale snapshot is still used if Kraken
+        cannot be reached.
+        """
+        snap = self._read_snapshot()
+        now = time.time()
+        if snap is not None and now - float(snap.get("fetched_at", 0)) < self._pairs_ttl:
+            self._use_pairs(snap["result"], snap.get("digest"))
+            return
+        headers: Dict[str, str] = {}
+        if snap is not None and snap.get("etag"):
+            headers["If-None-Match"] = snap["etag"]
+        if snap is not None and snap.get("last_modified"):
+            headers["If-Modified-Since"] = snap["last_modified"]
+        try:
+            status, resp_headers, res = _http_request("/0/public/AssetPairs", params={}, headers=headers or None)
+        except Exception:
+            if snap is None:
+                raise
+            self._use_pairs(snap["result"], snap.get("digest"))
+            return
+        if status == 304 and snap is not None:
+            result = snap["result"]
+        else:
+            # keep only the fields we use; the full document is much larger
+            result = {
+                code: {k: info.get(k) for k in ("wsname", "altname", "base", "quote")}
+                for code, info in res.items()
+                if info.get("wsname") and info.get("quote")
+            }
+        digest = hashlib.sha256(json.dumps(result, sort_keys=True).encode("utf-8")).hexdigest()
+        self._write_snapshot({
+            "fetched_at": now,
+            "etag": resp_headers.get("ETag") if resp_headers is not None else None,
+            "last_modified": resp_headers.get("Last-Modified") if resp_headers is not None else None,
+            "digest": digest,
+            "result": result,
+        })
+        self._use_pairs(result, digest)
+
+    def _use_pairs(self, res: Dict[str, Dict[str, Any]], digest: Optional[str]) -> None:
+        if digest is not None and digest == self._pairs_digest and self._pairs_cache is not None:
+            return  # same AssetPairs as the live index
+        self._build_index(res)
+        self._pairs_digest = digest
+
+    def _build_index(self, res: Dict[str, Dict[str, Any]]) -> None:
         # res is dict keyed by kraken pair code: e.g., "XXBTZEUR"
-        self._pairs_cache = {}
-        self._by_wsname.clear()
-        self._by_altname.clear()
+        pairs: Dict[str, Dict[str, Any]] = {}
+        index: Dict[str, Tuple[str, str]] = {}
+        eur = set()
         for code, info in res.items():
             # Some pairs may be deprecated or dark; we keep those with wsname.
             wsname = info.get("wsname")
-            altname = info.get("altname")
             quote = info.get("quote")
             if not wsname or not quote:
                 continue
-            self._pairs_cache[code] = info
+            pairs[code] = info
             norm = _normalize_wsname(wsname)
-            self._by_wsname[norm] = code
-            if isinstance(altname, str):
-                self._by_altname[altname] = code
+            for key in _pair_keys(code, info):
+                index.setdefault(key, (code, norm))
+            if quote == "ZEUR":  # Kraken internal quote for EUR
+                eur.add(norm)
+        self._index = index
+        self._eur_pairs = sorted(eur)
+        # publish last so lock-free readers never see a half-built cache
+        self._pairs_cache = pairs
 
     def get_eur_pairs(self) -> List[str]:
         """Return sorted list of EUR-quoted pairs in normalized form, e.g., 'BTC/EUR'."""
         self._ensure_pairs()
-        assert self._pairs_cache is not None
-        out: List[str] = []
-        for code, info in self._pairs_cache.items():
-            wsname = info.get("wsname")
-            quote = info.get("quote")  # Kraken internal: 'ZEUR'
-            if wsname and quote == "ZEUR":
-                out.append(_normalize_wsname(wsname))
-        # Unique + sorted
-        return sorted(set(out))
+        return list(self._eur_pairs)
+
+    def refresh_pairs(self) -> List[str]:
+        """Reload pair metadata (from the snapshot while fresh, else from Kraken); returns the EUR pairs."""
+        with self._pairs_lock:
+            self._load_pairs()
+        return list(self._eur_pairs)
 
     def _resolve_pair_code(self, user_pair: str) -> Tuple[str, str]:
         """
-        Resolve a user-friendly pair like 'BTC/EUR' to Kraken's internal pair code.
+        Resolve a user-friendly pair like 'BTC/EUR' (or 'XBT/EUR', 'XBTEUR',
+        'XXBTZEUR') to Kraken's internal pair code with a single index lookup.
         Returns (kraken_code, normalized_user_pair).
         """
         self._ensure_pairs()
-        assert self._pairs_cache is not None
-        # Normalize user input to Kraken's wsname style
-        up = user_pair.strip().upper()
-        if "/" in up:
-            base, _, quote = up.partition("/")
-            if base == "BTC":
-                base = "XBT"  # Kraken base ticker
-            norm_ws = f"{base}/{quote}"
-        else:
-            # Support altname like XBTEUR
-            norm_ws = up
-
-        # Direct wsname match?
-        code = self._by_wsname.get(_normalize_wsname(norm_ws))
-        if code:
-            return code, _normalize_wsname(norm_ws)
-        # altname fallback (e.g., XBTEUR)
-        code = self._by_altname.get(up.replace("/", ""))
-        if code:
-            wsname = self._pairs_cache[code].get("wsname", "XBT/EUR")
-            return code, _normalize_wsname(wsname)
-        # Final attempt: scan wsname normalized values
-        for wsname, c in self._by_wsname.items():
-            if wsname == _normalize_wsname(norm_ws):
-                return c, wsname
-        raise ValueError(f"Unknown or unsupported pair: {user_pair}")
+        hit = self._index.get(user_pair.strip().upper())
+        if hit is None:
+            raise ValueError(f"Unknown or unsupported pair: {user_pair}")
+        return hit
 
     # ---------- OHLC ----------
     def get_ohlc(self, pair: str, timeframe: str, since: Optional[int] = None, limit: int = 200) -> List[Dict[str, Any]]:
@@ -147,41 +303,46 @@ class KrakenClient:
         - `timeframe`: one of {'1m','5m','15m','1h','4h'}
         - `since`: optional epoch seconds (aligns with Kraken's 'since' which expects a time index)
         - `limit`: maximum number of candles to return (slice locally)
+        With a candle store and no explicit `since`, only new bars are downloaded.
         Returns a list of dicts: [{"t","o","h","l","c","v"}, ...] ascending by time.
+        Prefer `get_ohlc_series` on hot paths; this is its dict-form view.
         """
+        return self.get_ohlc_series(pair, timeframe, since=since, limit=limit).to_dicts()
+
+    def get_ohlc_series(self, pair: str, timeframe: str, since: Optional[int] = None, limit: int = 200) -> CandleSeries:
+        """Same as `get_ohlc` but returns a columnar `CandleSeries`."""
         if timeframe not in _TF_TO_INTERVAL:
             raise ValueError(f"Unsupported timeframe: {timeframe}")
         interval = _TF_TO_INTERVAL[timeframe]
-        code, _norm = self._resolve_pair_code(pair)
+        code, norm = self._resolve_pair_code(pair)
+        if self._store is not None and since is None:
+            return self._get_ohlc_stored(code, norm, timeframe, limit)
         params: Dict[str, Any] = {"pair": code, "interval": interval}
         if since is not None:
             params["since"] = int(since)
         res = _http_get("/0/public/OHLC", params=params)
-        # Result is { "<code>": [[time, open, high, low, close, vwap, volume, count], ...], "last": <id> }
-        rows = None
-        # Kraken sometimes keys by the canonical code; fetch first list-like value
-        if code in res:
-            rows = res.get(code, [])
-        else:
-            # pick first array in result
-            for v in res.values():
-                if isinstance(v, list):
-                    rows = v
-                    break
-        if rows is None:
-            return []
-        out: List[Dict[str, Any]] = []
-        for r in rows:
-            # r: [time, o, h, l, c, vwap, volume, count]
-            try:
-                t = int(r[0])
-                o = float(r[1]); h = float(r[2]); l = float(r[3]); c = float(r[4])
-                v = float(r[6])  # "volume" field
-                out.append({"t": t, "o": o, "h": h, "l": l, "c": c, "v": v})
-            except Exception:
-                continue
-        # Ensure ascending by time and slice to limit
-        out.sort(key=lambda x: x["t"])
+        out = _parse_ohlc(res, code)
+        # Slice to limit
         if limit and len(out) > limit:
-            out = out[-limit:]
+            out = out.tail(limit)
         return out
+
+    def _get_ohlc_stored(self, code: str, pair: str, timeframe: str, limit: int) -> CandleSeries:
+        """
+        Incremental fetch through the candle store: ask Kraken only for bars from
+        the last stored candle onward (it may have been still forming), merge, and
+        serve the tail from disk.
+        """
+        assert self._store is not None
+        interval = _TF_TO_INTERVAL[timeframe]
+        last_t = self._store.last_t(pair, timeframe)
+        params: Dict[str, Any] = {"pair": code, "interval": interval}
+        if last_t is not None:
+            params["since"] = last_t - 1
+        res = _http_get("/0/public/OHLC", params=params)
+        fresh = _parse_ohlc(res, code)
+        if last_t is not None and len(fresh) and fresh.t[0] > last_t + interval * 60:
+            # Kraken only serves the most recent 720 bars; anything older is a gap.
+            self._store.reset(pair, timeframe)
+        self._store.write(pair, timeframe, fresh)
+        return self._store.read_series(pair, timeframe, limit=limit or None)
@@ -0,0 +1,194 @@
+"""
+Local multi-timeframe resampling from one base timeframe (stdlib only).
+
+Fetch only the finest timeframe (e.g. 1m) and derive 5m/15m/1h/4h here
+instead of making one OHLC request per timeframe. Each derived timeframe
+keeps an incremental aggregate of its open bar:
+
+- a new base candle folds the previous one into the aggregate (or starts a
+  new bucket when it falls in a later one) and updates the open bar;
+- a base candle sent again with the same t (still forming) replaces the
+  previous version without double counting: the aggregate only holds base
+  candles that can no longer change, the newest one is kept aside;
+- older base candles are ignored.
+
+Bars are stored in `CandleRing`s (the base timeframe too), so
+`compute_indicators` can read any timeframe from the same in-memory source.
+A derived bar is final once a base candle from a later bucket has arrived,
+the same rule Kraken's OHLC endpoint follows. Derived history is bounded by
+the base history fed in (720 1m bars = 12h), so seed from the candle store
+when a long 1h/4h history is needed.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from data.candles import CandleSeries
+from data.kraken_client import _TF_TO_INTERVAL
+from data.ring_buffer import CandleRing
+from indicators.indicators import compute_indicators
+
+Bar = Tuple[int, float, float, float, float, float]  # t, o, h, l, c, v
+
+
+def _seconds(timeframe: str) -> int:
+    if timeframe not in _TF_TO_INTERVAL:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return _TF_TO_INTERVAL[timeframe] * 60
+
+
+class OHLCVAggregator:
+    """Open-bar aggregate of base candles for one derived timeframe."""
+
+    __slots__ = ("step", "bucket", "n", "o", "h", "l", "v", "last")
+
+    def __init__(self, step: int) -> None:
+        self.step = int(step)
+        self.bucket: Optional[int] = None  # open time of the open bar
+        self.n = 0                         # final base candles folded into o/h/l/v
+        self.o = self.h = self.l = self.v = 0.0
+        self.last: Optional[Bar] = None    # newest base candle, may still be revised
+
+    def _fold(self, bar: Bar) -> None:
+        if self.n == 0:
+            self.o, self.h, self.l, self.v = bar[1], bar[2], bar[3], bar[5]
+        else:
+            self.h = max(self.h, bar[2])
+            self.l = min(self.l, bar[3])
+            self.v += bar[5]
+        self.n += 1
+
+    def push(self, bar: Bar) -> Tuple[Optional[Bar], Optional[Bar]]:
+        """
+        Apply one base candle. Returns (open bar after the update, bar that
+        just became final or None); (None, None) for a stale candle.
+        """
+        t = bar[0]
+        last = self.last
+        finished: Optional[Bar] = None
+        if last is not None and t < last[0]:
+            return None, None
+        if last is None or t > last[0]:
+            bucket = t - t % self.step
+            if last is not None:
+                if bucket == self.bucket:
+                    self._fold(last)
+                else:
+                    finished = self.current()
+            if bucket != self.bucket:
+                self.bucket = bucket
+                self.n = 0
+        self.last = bar
+        return self.current(), finished
+
+    def current(self) -> Optional[Bar]:
+        """The open bar: folded candles combined with the newest one."""
+        last = self.last
+        if last is None or self.bucket is None:
+            return None
+        if self.n == 0:
+            return (self.bucket, last[1], last[2], last[3], last[4], last[5])
+        return (self.bucket, self.o, max(self.h, last[2]), min(self.l, last[3]), last[4], self.v + last[5])
+
+
+class Resampler:
+    """
+    Per-pair rings for a base timeframe and the timeframes derived from it.
+
+        rs = Resampler("1m", ("5m", "15m", "1h"))
+        rs.ingest(pair, kc.get_ohlc_series(pair, "1m", limit=720))
+        ind = rs.indicators(pair)            # {"1m": {...}, "5m": {...}, ...}
+    """
+
+    def __init__(self, base: str = "1m", targets: Sequence[str] = ("5m", "15m", "1h", "4h"),
+                 capacity: int = 720) -> None:
+        self.base = base
+        self.base_step = _seconds(base)
+        self.targets: List[str] = []
+        self._steps: Dict[str, int] = {}
+        for tf in targets:
+            step = _seconds(tf)
+            if step <= self.base_step or step % self.base_step:
+                raise ValueError(f"{tf} is not a multiple of the base timeframe {base}")
+            self.targets.append(tf)
+            self._steps[tf] = step
+        self.capacity = int(capacity)
+        self._rings: Dict[str, Dict[str, CandleRing]] = {}
+        self._aggs: Dict[str, Dict[str, OHLCVAggregator]] = {}
+
+    def timeframes(self) -> List[str]:
+        return [self.base] + self.targets
+
+    def _pair(self, pair: str) -> Tuple[Dict[str, CandleRing], Dict[str, OHLCVAggregator]]:
+        rings = self._rings.get(pair)
+        if rings is None:
+            rings = self._rings[pair] = {tf: CandleRing(self.capacity) for tf in self.timeframes()}
+            self._aggs[pair] = {tf: OHLCVAggregator(step) for tf, step in self._steps.items()}
+        return rings, self._aggs[pair]
+
+    def push(self, pair: str, t: int, o: float, h: float, l: float, c: float, v: float) -> List[Tuple[str, Bar]]:
+        """
+        Apply one base candle (new or a revision of the newest) to every
+        timeframe. Returns the derived bars that became final, as (timeframe, bar).
+        """
+        rings, aggs = self._pair(pair)
+        bar = (int(t), float(o), float(h), float(l), float(c), float(v))
+        if rings[self.base].push(*bar) == "stale":
+            return []
+        closed: List[Tuple[str, Bar]] = []
+        for tf, agg in aggs.items():
+            cur, finished = agg.push(bar)
+            if cur is not None:
+                rings[tf].push(*cur)
+            if finished is not None:
+                closed.append((tf, finished))
+        return closed
+
+    def ingest(self, pair: str, candles: Iterable[Any]) -> List[Tuple[str, Bar]]:
+        """
+        Feed base candles (a `CandleSeries` or dicts, ascending). Candles older
+        than the newest one already seen are skipped, so the same overlapping
+        window can be passed every cycle.
+        """
+        rings, _ = self._pair(pair)
+        last = rings[self.base].last_t
+        rows = candles.rows() if isinstance(candles, CandleSeries) else (
+            (c["t"], c["o"], c["h"], c["l"], c["c"], c["v"]) for c in candles)
+        closed: List[Tuple[str, Bar]] = []
+        for row in rows:
+            if last is not None and row[0] < last:
+                continue
+            closed.extend(self.push(pair, *row))
+        return closed
+
+    def series(self, pair: str, timeframe: str, limit: Optional[int] = None) -> CandleSeries:
+        """The newest `limit` bars of `timeframe` (the last one may still be open)."""
+        rings = self._rings.get(pair)
+        if rings is None:
+            return CandleSeries()
+        if timeframe not in rings:
+            raise ValueError(f"{timeframe} is not resampled here (have: {', '.join(rings)})")
+        return rings[timeframe].series(limit)
+
+    def indicators(self, pair: str, timeframes: Optional[Sequence[str]] = None,
+                   limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """`compute_indicators` for several timeframes of `pair` from the in-memory bars."""
+        return {tf: compute_indicators(self.series(pair, tf, limit), tf) for tf in (timeframes or self.timeframes())}
+
+    def pairs(self) -> List[str]:
+        return sorted(self._rings)
+
+
+def resample_series(series: CandleSeries, base: str, timeframe: str) -> CandleSeries:
+    """One-shot resample of a base-timeframe `CandleSeries` (e.g. read from the candle store)."""
+    step = _seconds(timeframe)
+    if step % _seconds(base):
+        raise ValueError(f"{timeframe} is not a multiple of {base}")
+    out = CandleSeries()
+    agg = OHLCVAggregator(step)
+    for row in series.rows():
+        _, finished = agg.push(row)
+        if finished is not None:
+            out.append(*finished)
+    cur = agg.current()
+    if cur is not None:
+        out.append(*cur)
+    return out
@@ -0,0 +1,128 @@
+"""
+Fixed-size per-pair candle ring buffer (stdlib only).
+
+Columns live in preallocated `array('d')` storage; pushing a candle overwrites
+the oldest slot, and pushing the same t again revises the newest slot in place
+(the still-forming candle). Readers get the window back as at most two
+zero-copy memoryview segments per column, in chronological order.
+
+Single writer. `version` is bumped on every write so a reader on another
+thread can detect a concurrent update (read version, read data, re-check).
+"""
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.candles import CandleSeries
+
+_FIELDS = ("t", "o", "h", "l", "c", "v")
+
+
+class CandleRing:
+    __slots__ = ("capacity", "_cols", "_head", "_size", "version")
+
+    def __init__(self, capacity: int = 720) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = int(capacity)
+        self._cols = {f: array("d", bytes(8 * self.capacity)) for f in _FIELDS}
+        self._head = 0  # next slot to write
+        self._size = 0
+        self.version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_t(self) -> Optional[int]:
+        if not self._size:
+            return None
+        return int(self._cols["t"][(self._head - 1) % self.capacity])
+
+    def push(self, t: int, o: float, h: float, l: float, c: float, v: float) -> str:
+        """
+        Insert a candle. Returns "append" for a new candle, "revise" when it
+        replaced the newest one (same t) and "stale" when t is older and ignored.
+        """
+        last = self.last_t
+        if last is not None and t < last:
+            return "stale"
+        if last is not None and t == last:
+            slot = (self._head - 1) % self.capacity
+            kind = "revise"
+        else:
+            slot = self._head
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            kind = "append"
+        cols = self._cols
+        cols["t"][slot] = t
+        cols["o"][slot] = o
+        cols["h"][slot] = h
+        cols["l"][slot] = l
+        cols["c"][slot] = c
+        cols["v"][slot] = v
+        self.version += 1
+        return kind
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        cols = self._cols
+        return {"t": int(cols["t"][i]), "o": cols["o"][i], "h": cols["h"][i],
+                "l": cols["l"][i], "c": cols["c"][i], "v": cols["v"][i]}
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Newest candle as a dict, or None when empty."""
+        if not self._size:
+            return None
+        return self._row((self._head - 1) % self.capacity)
+
+    def since(self, t: float) -> List[Dict[str, Any]]:
+        """Candles opening after `t`, oldest first; only those rows are copied out."""
+        ts = self._cols["t"]
+        n = 0
+        while n < self._size and ts[(self._head - 1 - n) % self.capacity] > t:
+            n += 1
+        return [self._row((self._head - k) % self.capacity) for k in range(n, 0, -1)]
+
+    def segments(self, field: str) -> Tuple[memoryview, ...]:
+        """Zero-copy views of `field` over the window, oldest first (one or two segments)."""
+        mv = memoryview(self._cols[field])
+        start = (self._head - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            return (mv[start : start + self._size],)
+        return (mv[start:], mv[: self._head])
+
+    def series(self, limit: Optional[int] = None) -> CandleSeries:
+        """Copy the newest `limit` candles (all when None) into a `CandleSeries`."""
+        n = self._size if not limit else min(int(limit), self._size)
+        out = CandleSeries()
+        for field, col in zip(_FIELDS, out.columns()):
+            data = array("d")
+            for seg in self.segments(field):
+                data.frombytes(seg.tobytes())
+            data = data[len(data) - n :]
+            if col.typecode == "d":
+                col.extend(data)
+            else:
+                col.extend(map(int, data))
+        return out
+
+
+class RingStore:
+    """Per-pair `CandleRing`s with a shared capacity."""
+
+    def __init__(self, capacity: int = 720) -> None:
+        self.capacity = int(capacity)
+        self._rings: Dict[str, CandleRing] = {}
+
+    def ring(self, pair: str) -> CandleRing:
+        r = self._rings.get(pair)
+        if r is None:
+            r = CandleRing(self.capacity)
+            self._rings[pair] = r
+        return r
+
+    def get(self, pair: str) -> Optional[CandleRing]:
+        return self._rings.get(pair)
+
+    def pairs(self) -> List[str]:
+        return sorted(self._rings)
@@ -0,0 +1,98 @@
+"""
+Concurrent multi-pair OHLC scanner on top of `KrakenClient`.
+
+`KrakenClient` is blocking; each `get_ohlc_series` runs in a worker thread and the
+pooled keep-alive transport is shared between them. Two limits apply:
+- a token bucket for Kraken's public-endpoint call budget (calls/second + burst)
+- a semaphore capping requests in flight
+
+Results are yielded as each pair completes, so the caller can start computing
+indicators before the slowest pair has arrived.
+"""
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Sequence
+import asyncio
+import time
+
+from data.candles import CandleSeries
+from data.kraken_client import KrakenClient
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens/second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be > 0 and capacity >= 1")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._stamp = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # One waiter at a time keeps tokens handed out in FIFO order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1.0
+
+
+class ScanResult(NamedTuple):
+    pair: str
+    candles: Optional[CandleSeries]
+    error: Optional[Exception]
+    elapsed: float  # seconds spent fetching
+
+
+class AsyncOHLCScanner:
+    def __init__(
+        self,
+        client: KrakenClient,
+        max_concurrency: int = 4,
+        rate: float = 1.0,
+        burst: int = 5,
+        bucket: Optional[TokenBucket] = None,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be > 0")
+        self.client = client
+        self.max_concurrency = int(max_concurrency)
+        # Kraken limits per IP, so callers may share one bucket between scanners
+        self.bucket = bucket or TokenBucket(rate, burst)
+
+    async def _fetch(self, sem: asyncio.Semaphore, pair: str, timeframe: str, limit: int) -> ScanResult:
+        async with sem:
+            await self.bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                candles = await asyncio.to_thread(self.client.get_ohlc_series, pair, timeframe, None, limit)
+                return ScanResult(pair, candles, None, time.perf_counter() - t0)
+            except Exception as e:
+                return ScanResult(pair, None, e, time.perf_counter() - t0)
+
+    async def scan(self, pairs: Sequence[str], timeframe: str, limit: int = 300) -> AsyncIterator[ScanResult]:
+        """Yield a `ScanResult` per pair in completion order. Errors are returned, not raised."""
+        if not pairs:
+            return
+        # Load pair metadata once up front rather than racing it in every worker
+        await asyncio.to_thread(self.client.get_eur_pairs)
+        sem = asyncio.Semaphore(self.max_concurrency)
+        tasks = [asyncio.ensure_future(self._fetch(sem, p, timeframe, limit)) for p in pairs]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    async def scan_all(self, pairs: Sequence[str], timeframe: str, limit: int = 300) -> Dict[str, ScanResult]:
+        return {r.pair: r async for r in self.scan(pairs, timeframe, limit)}
@@ -0,0 +1,231 @@
+"""
+Kraken WebSocket v2 market-data consumer.
+
+Endpoint: wss://ws.kraken.com/v2 (public; no auth needed)
+
+Subscribes to the `ohlc` channel (and optionally `ticker`) for a set of pairs
+and writes candles into per-pair `CandleRing`s. Message shapes handled:
+- {"channel": "ohlc", "type": "snapshot"|"update", "data": [{"symbol": "BTC/EUR",
+   "open", "high", "low", "close", "volume", "interval_begin": ISO-8601, "interval"}]}
+- {"channel": "ticker", "type": ..., "data": [{"symbol", "bid", "ask", "last", ...}]}
+- {"channel": "heartbeat"} / {"channel": "status", ...} (ignored)
+- {"method": "subscribe", "success": bool, ...} acks
+
+A candle counts as closed when an update for a later interval arrives, or when
+its interval end (+ `close_grace` seconds) passes, whichever comes first;
+`on_close(pair, candle)` fires once per candle right then. The consumer
+reconnects with jittered backoff and resubscribes after any disconnect.
+Kraken sends a heartbeat every second once subscribed, so `recv_timeout`
+seconds of silence mean a dead connection (e.g. a NAT dropped it without a
+FIN) and are treated as a disconnect too.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Union
+import asyncio
+import calendar
+import json
+import time
+
+from data.kraken_client import _TF_TO_INTERVAL
+from data.ring_buffer import RingStore
+from utils.http_pool import backoff_delay
+from utils.logging import get_logger
+from utils.websocket import ConnectionClosed, connect
+
+LOG = get_logger("data.ws_feed")
+
+WS_URL = "wss://ws.kraken.com/v2"
+
+CloseCallback = Callable[[str, Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+def _parse_iso(ts: str) -> int:
+    # "2023-10-04T16:25:00.000000000Z" -> epoch seconds (sub-second part ignored)
+    return calendar.timegm(time.strptime(ts[:19], "%Y-%m-%dT%H:%M:%S"))
+
+
+class KrakenWSFeed:
+    def __init__(
+        self,
+        pairs: Sequence[str],
+        timeframe: str,
+        url: str = WS_URL,
+        capacity: int = 720,
+        on_close: Optional[CloseCallback] = None,
+        ticker: bool = False,
+        close_grace: float = 0.25,
+        record_path: Optional[str] = None,
+        recv_timeout: float = 5.0,
+    ) -> None:
+        if timeframe not in _TF_TO_INTERVAL:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        if recv_timeout <= 0:
+            raise ValueError("recv_timeout must be > 0")
+        self.pairs = list(pairs)
+        self.timeframe = timeframe
+        self.interval = _TF_TO_INTERVAL[timeframe]
+        self.url = url
+        self.rings = RingStore(capacity)
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.on_close = on_close
+        self.ticker = ticker
+        self.close_grace = float(close_grace)
+        self.record_path = record_path
+        self.recv_timeout = float(recv_timeout)
+        self.connects = 0
+        self._closed_t: Dict[str, int] = {}  # last candle t reported via on_close
+        self._seeded: Set[str] = set()  # pairs that already got their first snapshot
+        self._ws: Optional[Any] = None
+        self._stop = asyncio.Event()
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    # ---------- Lifecycle ----------
+    def stop(self) -> None:
+        """Stop consuming (call from the event loop thread)."""
+        self._stop.set()
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
+
+    async def run(self, max_backoff: float = 30.0) -> None:
+        """Consume until `stop()`; reconnects and resubscribes on any disconnect."""
+        closer = asyncio.ensure_future(self._close_timer())
+        attempt = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    await self._session()
+                    attempt = 0
+                except (ConnectionClosed, OSError, asyncio.TimeoutError) as e:
+                    if not self._stop.is_set():
+                        LOG.warning("WebSocket disconnected: %s", e)
+                if self._stop.is_set():
+                    break
+                delay = min(max_backoff, backoff_delay(0.5, min(attempt, 6)))
+                attempt += 1
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            closer.cancel()
+            for t in list(self._tasks):
+                t.cancel()
+
+    async def _session(self) -> None:
+        ws = await connect(self.url)
+        self._ws = ws
+        self.connects += 1
+        rec = open(self.record_path, "a", encoding="utf-8") if self.record_path else None
+        try:
+            await self._subscribe(ws)
+            while not self._stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=self.recv_timeout)
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(f"nothing received for {self.recv_timeout:.1f}s") from None
+                if rec is not None:
+                    rec.write(json.dumps({"ts": time.time(), "msg": raw}) + "\n")
+                self.handle_message(raw)
+        finally:
+            self._ws = None
+            if rec is not None:
+                rec.close()
+            try:
+                # a dead peer may never drain the close frame
+                await asyncio.wait_for(ws.close(), timeout=self.recv_timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def set_pairs(self, pairs: Sequence[str]) -> None:
+        """
+        Change the subscribed pairs (call from the event loop thread). Applied
+        right away on a live connection, otherwise on the next connect.
+        """
+        added = [p for p in pairs if p not in self.pairs]
+        removed = [p for p in self.pairs if p not in pairs]
+        self.pairs = list(pairs)
+        if self._ws is None or not (added or removed):
+            return
+        task = asyncio.ensure_future(self._resubscribe(self._ws, added, removed))
+        self._tasks.append(task)
+        task.add_done_callback(self._tasks.remove)
+
+    async def _resubscribe(self, ws: Any, added: List[str], removed: List[str]) -> None:
+        try:
+            if removed:
+                await self._subscribe(ws, removed, "unsubscribe")
+            if added:
+                await self._subscribe(ws, added)
+        except (ConnectionClosed, OSError) as e:
+            LOG.warning("Subscription change failed (applied on reconnect): %s", e)
+
+    async def _subscribe(self, ws: Any, pairs: Optional[List[str]] = None, method: str = "subscribe") -> None:
+        pairs = self.pairs if pairs is None else pairs
+        params: Dict[str, Any] = {"channel": "ohlc", "symbol": pairs, "interval": self.interval}
+        if method == "subscribe":
+            params["snapshot"] = True
+        await ws.send(json.dumps({"method": method, "params": params}))
+        if self.ticker:
+            await ws.send(json.dumps({"method": method, "params": {"channel": "ticker", "symbol": pairs}}))
+
+    # ---------- Messages ----------
+    def handle_message(self, raw: str) -> None:
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            LOG.warning("Dropping non-JSON message: %.80s", raw)
+            return
+        channel = msg.get("channel")
+        if channel == "ohlc":
+            # The first snapshot is history; later ones (after a reconnect) may
+            # carry candles that closed while we were away, so they count as live.
+            update = msg.get("type") == "update"
+            items = msg.get("data") or []
+            for item in items:
+                self._on_ohlc(item, update or item.get("symbol") in self._seeded)
+            if not update:
+                self._seeded.update(i.get("symbol") for i in items)
+        elif channel == "ticker":
+            for item in msg.get("data") or []:
+                if "symbol" in item:
+                    self.tickers[item["symbol"]] = item
+        elif msg.get("method") == "subscribe" and not msg.get("success", True):
+            LOG.warning("Subscribe rejected: %s", msg.get("error"))
+
+    def _on_ohlc(self, item: Dict[str, Any], live: bool) -> None:
+        try:
+            pair = item["symbol"]
+            t = _parse_iso(item["interval_begin"])
+            vals = (float(item["open"]), float(item["high"]), float(item["low"]),
+                    float(item["close"]), float(item["volume"]))
+        except (KeyError, TypeError, ValueError):
+            return
+        ring = self.rings.ring(pair)
+        prev = ring.last()
+        if ring.push(t, *vals) == "append" and live and prev is not None:
+            self._fire_close(pair, prev)
+
+    def _fire_close(self, pair: str, candle: Dict[str, Any]) -> None:
+        if self._closed_t.get(pair, -1) >= candle["t"]:
+            return
+        self._closed_t[pair] = candle["t"]
+        if self.on_close is None:
+            return
+        res = self.on_close(pair, candle)
+        if asyncio.iscoroutine(res):
+            task = asyncio.ensure_future(res)
+            self._tasks.append(task)
+            task.add_done_callback(self._tasks.remove)
+
+    async def _close_timer(self) -> None:
+        """Close candles at their interval end even if no later trade arrives."""
+        step = self.interval * 60
+        while True:
+            now = time.time()
+            next_end = (int(now) // step + 1) * step
+            await asyncio.sleep(max(0.0, next_end + self.close_grace - now))
+            boundary = next_end
+            for pair in self.rings.pairs():
+                ring = self.rings.get(pair)
+                last = ring.last() if ring is not None else None
+                if last is not None and last["t"] + step <= boundary:
+                    self._fire_close(pair, last)
@@ -0,0 +1,277 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions endpoint.
+
+Serves `POST <prefix>/chat/completions` over HTTP/1.1 keep-alive and answers
+with action contracts derived from the request's indicators (bull cross ->
+enter_long, bear cross -> exit_long, otherwise hold), for both the single
+(`{"indicators", "position", "risk"}`) and batched (`{pair: {...}}`) payloads
+that `GroqClient` sends. Failure modes for load testing:
+- latency drawn per request from a distribution (see `parse_latency`)
+- `error_rate`: fraction of requests answered with HTTP 500 (or 429)
+- `malformed_rate`: fraction answered 200 with truncated, non-JSON content
+
+Requests with `"stream": true` get server-sent events (chunked transfer), one
+`chunk_chars`-sized delta every `chunk_delay` seconds, like a model emitting
+tokens. `chatty` wraps the object in prose and a ```json fence and keeps
+"generating" a rationale after it; `cancelled` counts streams the client
+closed early and `chunks_sent` the deltas actually written.
+
+Usage:
+    python -m devtools.fake_llm_server --port 8766 --latency lognormal:0.4:0.6 --error-rate 0.02
+    python -m devtools.fake_llm_server --chunk-delay 0.01 --chatty
+    # then GroqClient(api_key="x", base_url="http://127.0.0.1:8766/openai/v1")
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+
+from utils.logging import get_logger
+
+LOG = get_logger("devtools.fake_llm")
+
+LatencyFn = Callable[[random.Random], float]
+
+_CHATTY_PREFIX = "Here is my decision based on the indicators provided:\n\n```json\n"
+_CHATTY_SUFFIX = (
+    "\n```\n\nRationale: the EMA crossover state, RSI and ATR were weighed against the "
+    "current position and the risk limits. Momentum is the main input; volatility scales "
+    "the size. No position is added when the signal is ambiguous, and exits take priority "
+    "over entries when the trend turns. Let me know if you want a more detailed breakdown."
+)
+
+
+def parse_latency(spec: str) -> LatencyFn:
+    """
+    Latency distribution from a spec string (seconds):
+    "fixed:S", "uniform:LO:HI", "exp:MEAN", "lognormal:MEDIAN:SIGMA".
+    """
+    kind, _, rest = spec.partition(":")
+    try:
+        args = [float(x) for x in rest.split(":")] if rest else []
+    except ValueError:
+        raise ValueError(f"Bad latency spec: {spec}") from None
+    if kind == "fixed" and len(args) == 1:
+        return lambda rng: args[0]
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "exp" and len(args) == 1:
+        return lambda rng: rng.expovariate(1.0 / args[0]) if args[0] > 0 else 0.0
+    if kind == "lognormal" and len(args) == 2:
+        mu = math.log(args[0]) if args[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, args[1]) if args[0] > 0 else 0.0
+    raise ValueError(f"Bad latency spec: {spec}")
+
+
+def _contract_for(indicators: Dict[str, Any], position: Dict[str, Any]) -> Dict[str, Any]:
+    x = indicators.get("ema_cross")
+    side = (position or {}).get("side", "flat")
+    if x == "bull_cross" and side == "flat":
+        return {"action": "enter_long", "size_fraction": 0.25, "stop": None, "take_profit": None,
+                "confidence": 0.6, "reason": "bull cross (stand-in)"}
+    if x == "bear_cross" and side == "long":
+        return {"action": "exit_long", "size_fraction": 1.0, "stop": None, "take_profit": None,
+                "confidence": 0.6, "reason": "bear cross (stand-in)"}
+    return {"action": "hold", "size_fraction": 0.0, "stop": None, "take_profit": None,
+            "confidence": 0.5, "reason": "no signal (stand-in)"}
+
+
+def answer(payload: Any) -> Dict[str, Any]:
+    """Reply object for a single or batched decision payload."""
+    if isinstance(payload, dict) and "indicators" in payload:
+        return _contract_for(payload.get("indicators") or {}, payload.get("position") or {})
+    decisions = {}
+    for pair, item in (payload or {}).items():
+        item = item if isinstance(item, dict) else {}
+        decisions[pair] = _contract_for(item.get("indicators") or {}, item.get("position") or {})
+    return {"decisions": decisions}
+
+
+class FakeLLMServer:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = None,
+        chunk_chars: int = 16,
+        chunk_delay: float = 0.0,
+        chatty: bool = False,
+    ) -> None:
+        self.latency = parse_latency(latency)
+        self.error_rate = float(error_rate)
+        self.malformed_rate = float(malformed_rate)
+        self.chunk_chars = max(1, int(chunk_chars))
+        self.chunk_delay = float(chunk_delay)
+        self.chatty = bool(chatty)
+        self.requests = 0
+        self.errors = 0
+        self.malformed = 0
+        self.streamed = 0
+        self.cancelled = 0
+        self.chunks_sent = 0
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conns: Dict["asyncio.Task[None]", asyncio.StreamWriter] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # close() leaves open keep-alive connections (and streams mid-send) running
+            for writer in list(self._conns.values()):
+                writer.close()
+            await asyncio.gather(*self._conns, return_exceptions=True)
+            await self._server.wait_closed()
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[int, Callable[[], None]]:
+        """Run the server on a daemon thread's event loop; returns (port, stop)."""
+        loop = asyncio.new_event_loop()
+        bound: Dict[str, int] = {}
+        ready = threading.Event()
+
+        def _run() -> None:
+            asyncio.set_event_loop(loop)
+            bound["port"] = loop.run_until_complete(self.start(host, port))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=_run, name="fake-llm", daemon=True).start()
+        ready.wait()
+
+        def _stop() -> None:
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+        return bound["port"], _stop
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._conns[task] = writer
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                method, path = (lines[0].split(" ") + ["", ""])[:2]
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, out, deltas = await self._respond(method, path, body)
+                if deltas is not None:
+                    if not await self._write_stream(writer, deltas):
+                        return
+                    continue
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(out)}\r\n\r\n".encode("latin-1") + out
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conns.pop(task, None)
+            writer.close()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, deltas: List[str]) -> bool:
+        """SSE body in chunked encoding; False if the client went away before the end."""
+        self.streamed += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\n\r\n")
+        events = [{"choices": [{"index": 0, "delta": {"content": d}, "finish_reason": None}]} for d in deltas]
+        events.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        try:
+            for i, ev in enumerate(events):
+                if i and self.chunk_delay > 0:
+                    await asyncio.sleep(self.chunk_delay)
+                if writer.is_closing():
+                    raise ConnectionResetError
+                data = b"data: " + json.dumps(ev).encode("utf-8") + b"\n\n"
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+                self.chunks_sent += 1
+            done = b"data: [DONE]\n\n"
+            writer.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(done), done))
+            await writer.drain()
+            return True
+        except ConnectionError:
+            self.cancelled += 1
+            return False
+
+    async def _respond(self, method: str, path: str, body: bytes) -> Tuple[int, bytes, Optional[List[str]]]:
+        """(status, body, None) or, for a streamed reply, (200, b"", content deltas)."""
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, b'{"error": {"message": "not found"}}', None
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency(self._rng)))
+        roll = self._rng.random()
+        if roll < self.error_rate:
+            self.errors += 1
+            status = 429 if self._rng.random() < 0.5 else 500
+            return status, b'{"error": {"message": "injected failure"}}', None
+        try:
+            req = json.loads(body.decode("utf-8"))
+            payload = json.loads(req["messages"][-1]["content"])
+        except (ValueError, KeyError, IndexError, TypeError):
+            return 400, b'{"error": {"message": "bad request"}}', None
+        content = json.dumps(answer(payload))
+        if roll < self.error_rate + self.malformed_rate:
+            self.malformed += 1
+            content = content[: max(1, len(content) // 2)]  # truncated JSON
+        if self.chatty:
+            content = _CHATTY_PREFIX + content + _CHATTY_SUFFIX
+        if req.get("stream"):
+            n = self.chunk_chars
+            return 200, b"", [content[i:i + n] for i in range(0, len(content), n)]
+        return 200, json.dumps({
+            "id": f"fake-{self.requests}",
+            "object": "chat.completion",
+            "model": req.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }).encode("utf-8"), None
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Local Groq/OpenAI chat-completions stand-in")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8766)
+    p.add_argument("--latency", default="fixed:0", help="fixed:S | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 429/500")
+    p.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction answered with truncated JSON")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--chunk-chars", type=int, default=16, help="Characters per streamed delta")
+    p.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed deltas")
+    p.add_argument("--chatty", action="store_true", help="Wrap replies in prose and a code fence")
+    args = p.parse_args()
+
+    async def _serve() -> None:
+        srv = FakeLLMServer(args.latency, args.error_rate, args.malformed_rate, args.seed,
+                            args.chunk_chars, args.chunk_delay, args.chatty)
+        port = await srv.start(args.host, args.port)
+        LOG.info("Fake LLM on http://%s:%d/openai/v1 (latency %s)", args.host, port, args.latency)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,129 @@
+"""
+Local stand-in for Kraken's WebSocket v2 endpoint that replays recorded messages.
+
+Recordings are JSON lines as written by `KrakenWSFeed(record_path=...)`:
+    {"ts": <epoch seconds received>, "msg": "<raw message text>"}
+Plain lines holding a bare JSON message are accepted too (replayed back to back).
+
+Each client gets a subscribe ack per subscribe request, then the recording
+from the start; gaps between `ts` values are replayed divided by `--speed`.
+`--drop-after N` closes every connection after N messages to exercise the
+client's reconnect/resubscribe path.
+
+Usage:
+    python -m devtools.ws_replay_server storage/ws_recording.jsonl --port 8765
+    # then point KrakenWSFeed(url="ws://127.0.0.1:8765") at it
+"""
+from typing import List, Optional, Tuple
+import argparse
+import asyncio
+import json
+
+from utils.logging import get_logger
+from utils.websocket import ConnectionClosed, accept
+
+LOG = get_logger("devtools.ws_replay")
+
+
+def load_recording(path: str) -> List[Tuple[Optional[float], str]]:
+    out: List[Tuple[Optional[float], str]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            if isinstance(obj, dict) and "msg" in obj:
+                out.append((obj.get("ts"), obj["msg"]))
+            else:
+                out.append((None, line))
+    return out
+
+
+class ReplayServer:
+    def __init__(self, messages: List[Tuple[Optional[float], str]], speed: float = 0.0,
+                 drop_after: Optional[int] = None) -> None:
+        self.messages = messages
+        self.speed = float(speed)  # 0 = as fast as possible
+        self.drop_after = drop_after
+        self.connections = 0
+        self.subscriptions: List[dict] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            ws = await accept(reader, writer)
+        except (ConnectionClosed, asyncio.IncompleteReadError):
+            return
+        self.connections += 1
+        try:
+            # Wait for the first subscribe before replaying, like the real endpoint
+            req = json.loads(await ws.recv())
+            await self._ack(ws, req)
+            replay = asyncio.ensure_future(self._replay(ws))
+            try:
+                while True:
+                    await self._ack(ws, json.loads(await ws.recv()))
+            finally:
+                replay.cancel()
+        except (ConnectionClosed, ValueError):
+            pass
+        finally:
+            await ws.close()
+
+    async def _ack(self, ws, req: dict) -> None:
+        if req.get("method") != "subscribe":
+            return
+        self.subscriptions.append(req)
+        params = req.get("params", {})
+        await ws.send(json.dumps({
+            "method": "subscribe",
+            "result": {"channel": params.get("channel"), "symbol": params.get("symbol")},
+            "success": True,
+        }))
+
+    async def _replay(self, ws) -> None:
+        prev_ts: Optional[float] = None
+        for i, (ts, msg) in enumerate(self.messages):
+            if self.drop_after is not None and i >= self.drop_after:
+                await ws.close(1001)
+                return
+            if self.speed > 0 and ts is not None and prev_ts is not None and ts > prev_ts:
+                await asyncio.sleep((ts - prev_ts) / self.speed)
+            prev_ts = ts if ts is not None else prev_ts
+            await ws.send(msg)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description="Replay recorded Kraken WS v2 messages")
+    p.add_argument("recording", help="JSON-lines recording")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--speed", type=float, default=1.0, help="Playback speed (0 = no delays)")
+    p.add_argument("--drop-after", type=int, default=None, help="Close connections after N messages")
+    args = p.parse_args()
+
+    async def _serve() -> None:
+        srv = ReplayServer(load_recording(args.recording), speed=args.speed, drop_after=args.drop_after)
+        port = await srv.start(args.host, args.port)
+        LOG.info("Replaying %d messages on ws://%s:%d", len(srv.messages), args.host, port)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
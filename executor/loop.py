@@ -1,10 +1,85 @@
+from typing import Any, Dict, Optional, List
+import asyncio
+import time
 from utils.logging import get_logger
+from config import Config
 from data.kraken_client import KrakenClient
+from data.candle_store import CandleStore
+from data.scanner import AsyncOHLCScanner
+from executor.screener import PairScreener
 from indicators.indicators import compute_indicators
+from llm.batch import BatchDecider
+from llm.decision_cache import CachedDecider, DecisionCache
+from llm.groq_client import GroqClient
+from utils import metrics
 
 LOG = get_logger("executor.loop")
 
-def run_single_cycle(pair: str, timeframe: str, dry_run: bool = True) -> None:
+
+def _scan_pairs(kc: KrakenClient, pairs: List[str], timeframe: str, cfg: Config) -> None:
+    """
+    Fetch all `pairs` concurrently, compute indicators as each one arrives,
+    optionally keep only the `screen_top_k` best-scoring pairs, then ask the
+    LLM for those in batches under the cycle deadline.
+    """
+    scanner = AsyncOHLCScanner(
+        kc, max_concurrency=cfg.scan_concurrency, rate=cfg.scan_rate, burst=cfg.scan_burst
+    )
+    decider = CachedDecider(
+        cache=DecisionCache.from_config(cfg),
+        batch=BatchDecider(
+            GroqClient(model=cfg.groq_model, api_key=cfg.groq_api_key, stream=cfg.groq_stream),
+            batch_size=cfg.llm_batch_size,
+            max_concurrency=cfg.llm_concurrency,
+            deadline=cfg.llm_deadline,
+        ),
+    )
+    position = {"side": "flat", "size": 0.0, "entry_price": None, "stop": None, "take_profit": None}
+    risk = {
+        "per_trade_loss_cap": cfg.per_trade_loss_cap,
+        "daily_loss_cap": cfg.daily_loss_cap,
+        "fee_bps": cfg.fee_bps,
+    }
+
+    screener = PairScreener(cfg.screen_top_k) if cfg.screen_top_k > 0 else None
+
+    async def _run() -> Dict[str, Dict[str, Any]]:
+        requests = {}
+        async for res in scanner.scan(pairs, timeframe, limit=300):
+            metrics.observe("cycle_stage_seconds", res.elapsed, stage="fetch")
+            if res.error is not None or not res.candles:
+                LOG.warning("Scan failed for %s: %s", res.pair, res.error or "no candles")
+                continue
+            requests[res.pair] = (compute_indicators(res.candles, timeframe), position, risk)
+            if screener is not None:
+                screener.observe_series(res.pair, res.candles)
+        if screener is not None:
+            screened = screener.select({p: req[0] for p, req in requests.items()})
+            LOG.info("Screened %d pairs, forwarding %d to the LLM: %s", len(requests),
+                     len(screened.forwarded), ", ".join(screened.forwarded))
+            requests = {p: requests[p] for p in screened.forwarded}
+        with metrics.timer("cycle_stage_seconds", stage="decide"):
+            return await decider.decide_all(requests)
+
+    t0 = time.perf_counter()
+    try:
+        decisions = asyncio.run(_run())
+    finally:
+        decider.close()
+    metrics.observe("cycle_seconds", time.perf_counter() - t0)
+    acting = sum(1 for d in decisions.values() if d["action"] != "hold")
+    LOG.info("Decided %d/%d EUR pairs in %.2fs; %d non-hold decisions",
+             len(decisions), len(pairs), time.perf_counter() - t0, acting)
+
+
+def run_single_cycle(
+    pair: str,
+    timeframe: str,
+    dry_run: bool = True,
+    storage_dir: Optional[str] = None,
+    auto_eur: bool = False,
+    cfg: Optional[Config] = None,
+) -> None:
     """
     Step 1 placeholder: log a heartbeat and return.
     Later this will:
@@ -18,11 +93,19 @@ def run_single_cycle(pair: str, timeframe: str, dry_run: bool = True) -> None:
     LOG.info("Heartbeat: pair=%s timeframe=%s dry_run=%s", pair, timeframe, dry_run)
     # Step 3: Demonstrate data fetch lightly in dry-run
     try:
-        kc = KrakenClient()
+        cfg = cfg or Config()
+        kc = KrakenClient(
+            store=CandleStore(storage_dir) if storage_dir else None,
+            cache_dir=storage_dir,
+            pairs_ttl=cfg.pairs_ttl,
+        )
         pairs = kc.get_eur_pairs()
         LOG.info("Discovered %d EUR pairs (sample): %s", len(pairs), ", ".join(pairs[:5]))
+        if auto_eur:
+            _scan_pairs(kc, pairs, timeframe, cfg)
         # Fetch enough history for EMA26/RSI14/ATR14 to be valid
-        candles = kc.get_ohlc(pair=pair, timeframe=timeframe, limit=300)
+        with metrics.timer("cycle_stage_seconds", stage="fetch"):
+            candles = kc.get_ohlc_series(pair=pair, timeframe=timeframe, limit=300)
         if candles:
             last = candles[-1]
             LOG.info("Fetched %d candles for %s %s. Last close=%.2f t=%s",
@@ -42,3 +125,4 @@ def run_single_cycle(pair: str, timeframe: str, dry_run: bool = True) -> None:
             LOG.warning("No candles returned for %s %s", pair, timeframe)
     except Exception as e:
         LOG.warning("Data fetch demo failed: %s", e)
+    metrics.write_metrics()
@@ -0,0 +1,598 @@
+"""
+Long-running paper-trading scheduler.
+
+One `Scheduler` owns everything that should outlive a cycle: the Kraken
+client (pair metadata, candle store, pooled transport), the scan token
+bucket, the LLM client and `BatchDecider` (behind the decision cache), per-pair incremental indicators,
+the `PaperPortfolio`, the `RiskGate`, the ledger and the state store.
+
+Timing: wakeups are computed from the wall clock as the next multiple of the
+timeframe (plus `grace` seconds for Kraken to close the bar), never by adding
+sleeps together, so cycles do not drift. A pair is only processed once per
+closed candle; pairs whose new bar is not published yet are re-polled every
+`poll_interval` seconds until the next boundary, and a wakeup with nothing
+new does no LLM, risk or broker work.
+
+Indicator state is checkpointed to `<storage_dir>/indicators_<tf>.json`
+every `indicator_checkpoint_every` cycles and on close. A restart loads it
+and fetches/applies only the bars each pair missed, so the first decision
+comes in the first cycle instead of after a full history reload. The state
+store (saved every cycle) is read back the same way: the last candle handled
+per pair, open positions with their marks, realized PnL/fees and the risk
+gate's day, so a restart neither re-decides a candle (nor folds it into the
+indicators twice) nor forgets positions or today's losses.
+
+Each pair runs through fetch -> indicators -> decide -> risk -> broker as its
+own task. Fetches are bounded by the token bucket and `scan_concurrency`;
+decisions are collected for up to `batch_window` seconds (or `llm_batch_size`
+pairs) and sent as one `BatchDecider` call, so pair N+1 is being fetched
+while pair N waits on the LLM. Each batch's contracts are gated together
+(`RiskGate.gate_batch`) against what is left of the daily loss budget after
+the entries already admitted for the same candle, so concurrent pairs cannot
+each spend the full budget. Indicator, risk and broker stages run on the
+event loop thread and need no locking.
+
+In auto-EUR mode with `screen_top_k` > 0 a `PairScreener` sits between
+indicators and decide: each polling round first brings every pending pair
+through indicators, then only the best-scoring pairs (at most `screen_top_k`
+per cycle) plus pairs with open positions go on to the LLM. The others hold
+for this candle.
+
+With `ws_feed` on, a `KrakenWSFeed` streams candles into per-pair rings while
+`run` is active. Its `on_close` wakes the scheduler as soon as a candle
+closes, and the pipeline reads the bars it has not applied yet straight from
+the ring instead of waiting `grace` seconds and polling REST. REST is left
+for seeding (cold indicators, the first cycle) and gap fill: a pair whose
+ring does not reach back to its last applied bar, or whose candle the feed
+has not closed by `grace` seconds after the boundary, is fetched as before.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import asyncio
+import logging
+import signal
+import time
+
+from broker.portfolio import PaperPortfolio
+from config import Config
+from data.candle_store import CandleStore
+from data.kraken_client import _TF_TO_INTERVAL, KrakenClient
+from data.scanner import TokenBucket
+from data.ws_feed import KrakenWSFeed
+from executor.screener import PairScreener
+from indicators.incremental import IndicatorEngine
+from llm.batch import BatchDecider
+from llm.decision_cache import CachedDecider, DecisionCache
+from llm.groq_client import GroqClient, _placeholder
+from persistence.ledger import Ledger
+from persistence.state import StateStore
+from risk.risk_engine import RiskGate
+from utils import metrics
+from utils.logging import get_logger
+
+LOG = get_logger("executor.scheduler")
+
+_Request = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+
+class _Ready(NamedTuple):
+    """A pair past the indicator stage, waiting for decide -> risk -> broker."""
+    ind: Dict[str, Any]
+    bar: Dict[str, Any]   # the candle that just closed
+    t: int                # its close time
+    t0: float             # perf_counter at the start of the pair's fetch
+
+
+def next_boundary(now: float, step: float) -> float:
+    """First multiple of `step` (epoch seconds) strictly after `now`."""
+    return (int(now // step) + 1) * step
+
+
+class Scheduler:
+    def __init__(
+        self,
+        cfg: Config,
+        pairs: Optional[Sequence[str]] = None,
+        timeframe: Optional[str] = None,
+        auto_eur: bool = False,
+        ws_feed: Optional[bool] = None,
+        poll_interval: Optional[float] = None,
+        grace: float = 2.0,
+        batch_window: float = 0.05,
+        history: int = 300,
+        kraken: Optional[KrakenClient] = None,
+        llm: Optional[GroqClient] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.cfg = cfg
+        self.timeframe = timeframe or cfg.timeframe
+        if self.timeframe not in _TF_TO_INTERVAL:
+            raise ValueError(f"Unsupported timeframe: {self.timeframe}")
+        self.step = _TF_TO_INTERVAL[self.timeframe] * 60
+        self.poll_interval = float(poll_interval if poll_interval is not None else cfg.loop_interval)
+        if self.poll_interval <= 0:
+            raise ValueError("poll_interval must be > 0")
+        self.grace = float(grace)
+        self.batch_window = float(batch_window)
+        self.history = int(history)
+        self.auto_eur = bool(auto_eur)
+        self.ws_feed = cfg.ws_feed if ws_feed is None else bool(ws_feed)
+        self.clock = clock
+
+        self.kraken = kraken or KrakenClient(
+            store=CandleStore(cfg.storage_dir), cache_dir=cfg.storage_dir, pairs_ttl=cfg.pairs_ttl
+        )
+        self.llm = llm or GroqClient(model=cfg.groq_model, api_key=cfg.groq_api_key, stream=cfg.groq_stream)
+        self.decider = CachedDecider(
+            cache=DecisionCache.from_config(cfg),
+            batch=BatchDecider(
+                self.llm, batch_size=cfg.llm_batch_size, max_concurrency=cfg.llm_concurrency, deadline=cfg.llm_deadline
+            ),
+        )
+        self.bucket = TokenBucket(cfg.scan_rate, cfg.scan_burst)
+        self.indicators = IndicatorEngine(self.timeframe)
+        self.checkpoint_path = Path(cfg.storage_dir) / f"indicators_{self.timeframe}.json"
+        self.checkpoint_every = int(cfg.indicator_checkpoint_every)
+        if self.checkpoint_every:
+            self._load_checkpoint()
+        self.screener = PairScreener(cfg.screen_top_k) if self.auto_eur and cfg.screen_top_k > 0 else None
+        self.portfolio = PaperPortfolio(fee_bps=cfg.fee_bps)
+        self.gate = RiskGate(cfg.per_trade_loss_cap, cfg.daily_loss_cap, equity=self.portfolio.starting_equity)
+        self.ledger = Ledger(cfg.storage_dir)
+        self.state = StateStore(cfg.storage_dir)
+        self.risk = {
+            "per_trade_loss_cap": cfg.per_trade_loss_cap,
+            "daily_loss_cap": cfg.daily_loss_cap,
+            "fee_bps": cfg.fee_bps,
+        }
+
+        self.pairs: List[str] = list(pairs or [cfg.default_pair])
+        self._pairs_at = 0.0
+        self.done_t: Dict[str, int] = {}  # open time of the last closed candle processed, per pair
+        self.cycles = 0
+        self.decisions = 0
+        self.fills = 0
+        self.screened = 0   # pairs scored by the screener / sent on to the LLM (totals)
+        self.forwarded = 0
+        self._screen_left = 0  # top-K slots left in the current cycle
+        # fetch threads; the LLM calls run on the BatchDecider's own pool
+        self._io = ThreadPoolExecutor(max_workers=cfg.scan_concurrency, thread_name_prefix="sched-fetch")
+        self._fetch_sem: Optional[asyncio.Semaphore] = None
+        self._llm_sem: Optional[asyncio.Semaphore] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._wake: Optional[asyncio.Event] = None  # set by stop() and by feed candle closes
+        self.feed: Optional[KrakenWSFeed] = None  # only while `run` is active with `ws_feed`
+        self._feed_closed: Dict[str, int] = {}  # open time of the last candle the feed closed, per pair
+        self._queued: Dict[str, Tuple[_Request, float, int, asyncio.Future]] = {}  # request, price, close t
+        self._admitted: Tuple[int, float] = (0, 0.0)  # (candle close t, equity put at risk by its entries)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+        self._restore_state()
+
+    # ---------- Lifecycle ----------
+    def stop(self) -> None:
+        """Ask `run` to return after the stage currently in flight."""
+        if self._stop is not None:
+            self._stop.set()
+            self._wake.set()
+
+    def close(self) -> None:
+        if self.checkpoint_every:
+            self._save_checkpoint()
+        self.decider.close()
+        self.llm.close()
+        self._io.shutdown(wait=False, cancel_futures=True)
+        self.ledger.close()
+        self.state.close()
+
+    async def run(self, max_cycles: Optional[int] = None) -> None:
+        """
+        Process the latest closed candle right away, then once per timeframe
+        boundary until `stop()` (or SIGINT/SIGTERM) or `max_cycles` wakeups.
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._fetch_sem = asyncio.Semaphore(self.cfg.scan_concurrency)
+        self._llm_sem = asyncio.Semaphore(self.cfg.llm_concurrency)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):  # pragma: no cover - non-Unix / non-main thread
+                pass
+        feed_task = None
+        if self.ws_feed:
+            self._feed_closed = {}
+            self.feed = KrakenWSFeed(self.pairs, self.timeframe, url=self.cfg.ws_url, capacity=self.history,
+                                     on_close=self._on_close)
+            feed_task = asyncio.ensure_future(self.feed.run())
+        try:
+            boundary = next_boundary(self.clock(), self.step) - self.step
+            while not self._stop.is_set():
+                await self._cycle(boundary)
+                self.cycles += 1
+                if max_cycles is not None and self.cycles >= max_cycles:
+                    break
+                now = self.clock()
+                if now >= boundary + 2 * self.step:
+                    LOG.warning("Cycle overran the timeframe by %.1fs; skipping to the next boundary",
+                                now - boundary - self.step)
+                boundary = next_boundary(now, self.step)
+                await self._wait_for_close(boundary)
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(sig)
+                except (NotImplementedError, RuntimeError):  # pragma: no cover
+                    pass
+            await self._drain()
+            if feed_task is not None:
+                self.feed.stop()
+                await asyncio.gather(feed_task, return_exceptions=True)
+                self.feed = None
+
+    async def _sleep_until(self, wall: float) -> bool:
+        """
+        Sleep until wall-clock time `wall`; True if woken early by `stop()`. A
+        candle close from the feed also ends the sleep early (False).
+        """
+        delay = wall - self.clock()
+        if delay > 0 and not self._wake.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        self._wake.clear()
+        return self._stop.is_set()
+
+    async def _wait_for_close(self, boundary: float) -> None:
+        """Until `grace` seconds past `boundary`, or until the feed closes the candle ending there for a pair."""
+        expected = int(boundary) - self.step
+        while self.clock() < boundary + self.grace and not self._feed_ready(self.pairs, expected):
+            if await self._sleep_until(boundary + self.grace):
+                return
+
+    # ---------- WebSocket feed ----------
+    def _on_close(self, pair: str, candle: Dict[str, Any]) -> None:
+        """`KrakenWSFeed` callback: the candle opening at `candle["t"]` is final for `pair`."""
+        self._feed_closed[pair] = max(self._feed_closed.get(pair, -1), int(candle["t"]))
+        if self._wake is not None:
+            self._wake.set()
+
+    def _feed_ready(self, pairs: Sequence[str], expected: int) -> List[str]:
+        """The `pairs` whose candle opening at `expected` the feed has closed."""
+        closed = self._feed_closed
+        return [p for p in pairs if closed.get(p, -1) >= expected]
+
+    def _ring_bars(self, pair: str, expected: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Closed bars from the feed's ring, from the last one applied to the
+        indicators up to `expected`; None when REST is needed instead (no feed,
+        the candle is not closed on the feed, cold indicators or a gap).
+        """
+        if self.feed is None or self._feed_closed.get(pair, -1) < expected:
+            return None
+        ring = self.feed.rings.get(pair)
+        last_t = self.indicators.get(pair).last_t
+        if ring is None or last_t is None:
+            return None
+        closed = [c for c in ring.since(last_t - 1) if c["t"] <= expected]
+        if not closed or closed[0]["t"] != last_t:
+            return None
+        return closed
+
+    async def _drain(self) -> None:
+        if self._queued:
+            self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    # ---------- Cycle ----------
+    async def _refresh_pairs(self) -> None:
+        if not self.auto_eur or self.clock() - self._pairs_at < self.cfg.pairs_ttl:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            pairs = await loop.run_in_executor(self._io, self.kraken.refresh_pairs)
+        except Exception as e:
+            LOG.warning("Pair refresh failed, keeping %d pairs: %s", len(self.pairs), e)
+            return
+        if pairs:
+            self.pairs = pairs
+            if self.screener is not None:
+                self.screener.forget(pairs)
+            if self.feed is not None:
+                self.feed.set_pairs(pairs)
+        self._pairs_at = self.clock()
+
+    async def _cycle(self, boundary: float) -> None:
+        """Handle the candle that closed at `boundary` for every pair, re-polling stragglers."""
+        await self._refresh_pairs()
+        expected = int(boundary) - self.step  # open time of the candle that just closed
+        t0 = time.perf_counter()
+        pending = [p for p in self.pairs if self.done_t.get(p, -1) < expected]
+        skipped = len(self.pairs) - len(pending)
+        decided0, fills0 = self.decisions, self.fills
+        screened0, forwarded0 = self.screened, self.forwarded
+        self._screen_left = self.screener.top_k if self.screener is not None else 0
+        next_at = boundary + self.step
+        while pending and not self._stop.is_set():
+            # before `grace` is up only the pairs the feed has closed are due; REST polls the rest after
+            early = self.feed is not None and self.clock() < boundary + self.grace
+            due = self._feed_ready(pending, expected) if early else pending
+            if due:
+                if self.screener is not None:
+                    results = await self._screened_round(due, expected)
+                else:
+                    results = await asyncio.gather(*(self._pipeline(p, expected) for p in due),
+                                                   return_exceptions=True)
+                for p, res in zip(due, results):
+                    if isinstance(res, Exception):
+                        LOG.error("Pipeline failed for %s: %s", p, res)
+                handled = {p for p, ok in zip(due, results) if ok is True}
+                pending = [p for p in pending if p not in handled]
+            if not pending or self.clock() + self.poll_interval >= next_at:
+                break
+            wall = boundary + self.grace if early else self.clock() + self.poll_interval
+            if await self._sleep_until(wall):
+                break
+        screen = ""
+        if self.screener is not None:
+            screen = f"screened {self.screened - screened0}, forwarded {self.forwarded - forwarded0}; "
+        LOG.info(
+            "Cycle %d (t=%d): %d pairs, %d up to date, %d not yet closed; %s%d decisions, %d fills in %.2fs; equity=%.2f",
+            self.cycles, expected, len(self.pairs), skipped, len(pending), screen,
+            self.decisions - decided0, self.fills - fills0, time.perf_counter() - t0, self.portfolio.equity,
+        )
+        metrics.observe("cycle_seconds", time.perf_counter() - t0)
+        with metrics.timer("cycle_stage_seconds", stage="persist"):
+            self._save_state()
+            if self.checkpoint_every and (self.cycles + 1) % self.checkpoint_every == 0:
+                self._save_checkpoint()
+        metrics.write_metrics()
+
+    async def _pipeline(self, pair: str, expected: int) -> bool:
+        """
+        fetch -> indicators -> decide -> risk -> broker for one pair. Returns
+        False when the candle opening at `expected` has not closed on Kraken
+        yet (retry later), True once it is handled or there was nothing to do.
+        """
+        ready = await self._prepare(pair, expected)
+        if isinstance(ready, _Ready):
+            return await self._act(pair, ready)
+        return ready
+
+    async def _screened_round(self, pending: List[str], expected: int) -> List[Any]:
+        """
+        One polling round with the screener: bring every pending pair through
+        indicators, then decide only the forwarded ones (stragglers compete for
+        what is left of this cycle's top-K). Results line up with `pending`, as
+        `_pipeline`'s would.
+        """
+        assert self.screener is not None
+        prepared = await asyncio.gather(*(self._prepare(p, expected) for p in pending), return_exceptions=True)
+        ready = {p: r for p, r in zip(pending, prepared) if isinstance(r, _Ready)}
+        if not ready:
+            return list(prepared)
+        open_pairs = set(self.portfolio.open_pairs())
+        res = self.screener.select({p: r.ind for p, r in ready.items()}, keep=open_pairs, top_k=self._screen_left)
+        self._screen_left -= sum(1 for p in res.forwarded if p not in open_pairs)
+        self.screened += len(ready)
+        self.forwarded += len(res.forwarded)
+        for p in res.dropped:
+            self.done_t[p] = int(ready[p].bar["t"])  # not worth a request: hold on this candle
+        acted = await asyncio.gather(*(self._act(p, ready[p]) for p in res.forwarded), return_exceptions=True)
+        outcome: Dict[str, Any] = dict(zip(res.forwarded, acted))
+        return [outcome.get(p, True) if p in ready else r for p, r in zip(pending, prepared)]
+
+    async def _fetch_closed(self, pair: str, expected: int) -> List[Dict[str, Any]]:
+        """Closed bars up to `expected` from REST; empty when the fetch failed or the candle is not final yet."""
+        # with warm indicator state only the bars since its last candle are needed
+        loop = asyncio.get_running_loop()
+        last_t = self.indicators.get(pair).last_t
+        limit = self.history
+        if last_t is not None and last_t <= expected:
+            limit = min(self.history, (expected - last_t) // self.step + 2)  # + last applied + forming bar
+        async with self._fetch_sem:
+            await self.bucket.acquire()
+            try:
+                with metrics.timer("cycle_stage_seconds", stage="fetch"):
+                    series = await loop.run_in_executor(
+                        self._io, self.kraken.get_ohlc_series, pair, self.timeframe, None, limit
+                    )
+            except Exception as e:
+                LOG.warning("Fetch failed for %s: %s", pair, e)
+                return []
+        # Kraken's last row is the bar still forming; `expected` is final once a later bar exists
+        if not len(series) or series.t[-1] <= expected:
+            return []
+        return [c for c in series if c["t"] <= expected]
+
+    async def _prepare(self, pair: str, expected: int) -> Union[bool, _Ready]:
+        """fetch -> indicators -> stops/mark. Returns `_Ready`, or `_pipeline`'s result when there is nothing to decide."""
+        t0 = time.perf_counter()
+        closed = self._ring_bars(pair, expected)
+        if closed is None:
+            closed = await self._fetch_closed(pair, expected)
+            if not closed:
+                return False
+        if closed[-1]["t"] <= self.done_t.get(pair, -1):
+            return True
+
+        # indicators: feed only the bars not applied yet (reseed after a gap)
+        with metrics.timer("cycle_stage_seconds", stage="indicators"):
+            inc = self.indicators.get(pair)
+            if inc.last_t is None or inc.last_t < closed[0]["t"]:
+                ind = self.indicators.seed(pair, closed)
+            else:
+                ind = inc.values()
+                for c in closed:
+                    if c["t"] > inc.last_t:
+                        ind = inc.update(c)
+        bar = closed[-1]
+        t = bar["t"] + self.step  # close time
+
+        if self.screener is not None:
+            self.screener.observe_series(pair, closed)
+
+        # stops on every bar closed since the last one handled (a catch-up fetch
+        # brings several), oldest first, then mark at the newest close
+        done = self.done_t.get(pair)
+        with metrics.timer("cycle_stage_seconds", stage="broker"):
+            for c in (closed if done is not None else closed[-1:]):
+                if done is not None and c["t"] <= done:
+                    continue
+                for fill in self.portfolio.check_stops({pair: (c["h"], c["l"], c["o"])}):
+                    self._record(fill, c["t"] + self.step)
+            self.portfolio.mark({pair: bar["c"]})
+            self.gate.mark(self.portfolio.unrealized, t)
+        return _Ready(ind, bar, t, t0)
+
+    async def _act(self, pair: str, ready: _Ready) -> bool:
+        """decide -> risk -> broker for a prepared pair; always True (the candle is handled)."""
+        ind, bar, t, t0 = ready
+        # decide + risk (gated with the rest of its batch)
+        with metrics.timer("cycle_stage_seconds", stage="decide"):
+            gated = await self._decide(pair, (ind, self.portfolio.position(pair), self.risk), bar["c"], t)
+        self.decisions += 1
+
+        # broker
+        metrics.inc("decisions_total", action=gated["action"])
+        if gated["action"] != "hold":
+            with metrics.timer("cycle_stage_seconds", stage="broker"):
+                fill = self.portfolio.submit(
+                    pair, gated["action"], float(gated.get("size_fraction") or 0.0), bar["c"],
+                    stop=gated.get("stop"), take_profit=gated.get("take_profit"),
+                )
+                self._record(fill, t, reason=gated.get("reason"))
+        self.done_t[pair] = int(bar["t"])
+        elapsed = time.perf_counter() - t0
+        metrics.observe("pair_cycle_seconds", elapsed, pair=pair)
+        if LOG.isEnabledFor(logging.DEBUG):
+            LOG.debug("%s -> %s", pair, gated["action"],
+                      extra={"pair": pair, "stage": "pipeline", "latency_ms": round(elapsed * 1000.0, 2)})
+        return True
+
+    def _record(self, fill: Dict[str, Any], t: float, reason: Optional[str] = None) -> None:
+        if not fill.get("filled"):
+            return
+        self.gate.on_fill(fill, t)
+        rec = dict(fill, t=t)
+        if reason is not None:
+            rec["reason"] = reason
+        self.ledger.append(rec)
+        self.fills += 1
+        metrics.inc("fills_total", action=fill["action"])
+
+    def _load_checkpoint(self) -> None:
+        try:
+            restored = self.indicators.load(str(self.checkpoint_path))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            LOG.warning("Ignoring unreadable indicator checkpoint %s: %s", self.checkpoint_path, e)
+            return
+        if restored:
+            LOG.info("Warm start: restored indicator state for %d pairs", restored)
+
+    def _save_checkpoint(self) -> None:
+        try:
+            self.indicators.save(str(self.checkpoint_path))
+        except OSError as e:
+            LOG.error("Indicator checkpoint failed: %s", e)
+
+    def _save_state(self) -> None:
+        pf = self.portfolio
+        try:
+            self.state.save({
+                "scheduler": {"cycles": self.cycles, "timeframe": self.timeframe},
+                "last_t": dict(self.done_t),
+                "positions": {p: dict(pf.position(p), mark=float(pf.last[pf.slot(p)])) for p in pf.open_pairs()},
+                "equity": {"equity": pf.equity, "realized_pnl": pf.realized_pnl, "fees_paid": pf.fees_paid,
+                           "trades": pf.trades},
+                "gate": {"day": self.gate.day, "day_start_equity": self.gate.day_start_equity},
+            })
+        except OSError as e:
+            LOG.error("State save failed: %s", e)
+
+    def _restore_state(self) -> None:
+        """Continue from the state store: handled candles, positions, equity and today's loss budget."""
+        saved = self.state.state
+        if not saved:
+            return
+        pf, gate = self.portfolio, self.gate
+        if saved.get("scheduler", {}).get("timeframe") == self.timeframe:
+            self.done_t.update({p: int(t) for p, t in saved.get("last_t", {}).items()})
+        eq = saved.get("equity", {})
+        pf.realized_pnl = float(eq.get("realized_pnl", 0.0))
+        pf.fees_paid = float(eq.get("fees_paid", 0.0))
+        pf.trades = int(eq.get("trades", 0))
+        for pair, pos in saved.get("positions", {}).items():
+            try:
+                pf.restore(pair, pos)
+            except ValueError as e:
+                LOG.warning("Dropping saved position: %s", e)
+                continue
+            if pos.get("mark"):
+                pf.mark({pair: float(pos["mark"])})
+            notional = abs(pos["size"] * pos["entry_price"])  # what `RiskGate.on_fill` booked at entry
+            gate.exposure[pair] = notional
+            gate.total_exposure += notional
+        gate.realized_equity = pf.realized_equity
+        gate.unrealized = pf.unrealized
+        day = saved.get("gate", {})
+        if day.get("day") is not None:
+            gate.day = int(day["day"])
+            gate.day_start_equity = float(day["day_start_equity"])
+        LOG.info("Restored state: %d open positions, last candle for %d pairs, equity=%.2f",
+                 len(pf.open_pairs()), len(self.done_t), pf.equity)
+
+    # ---------- Decide stage (micro-batching) ----------
+    async def _decide(self, pair: str, request: _Request, price: float, t: int) -> Dict[str, Any]:
+        """Queue one pair for the next LLM batch and wait for its risk-gated contract."""
+        fut = asyncio.get_running_loop().create_future()
+        self._queued[pair] = (request, price, t, fut)
+        if len(self._queued) >= self.decider.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._queued = self._queued, {}
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send(self, batch: Dict[str, Tuple[_Request, float, int, asyncio.Future]]) -> None:
+        # the deadline starts once a request slot is free, not while queued behind other batches
+        async with self._llm_sem:
+            try:
+                out = await self.decider.decide_all({p: req for p, (req, _, _, _) in batch.items()})
+            except Exception as e:
+                LOG.warning("LLM batch failed: %s", e)
+                out = {}
+        contracts = {p: out.get(p) or _placeholder("batch failed") for p in batch}
+        prices = {p: price for p, (_, price, _, _) in batch.items()}
+        t = max(t for _, _, t, _ in batch.values())
+        with metrics.timer("cycle_stage_seconds", stage="risk"):
+            gated = self._gate(contracts, prices, t)
+        for pair, (_, _, _, fut) in batch.items():
+            if not fut.done():
+                fut.set_result(gated[pair])
+
+    def _gate(self, contracts: Dict[str, Dict[str, Any]], prices: Dict[str, float], t: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Gate one batch as a whole; entries for the same candle share what is
+        left of the daily budget across batches.
+        """
+        at, used = self._admitted
+        if at != t:
+            used = 0.0
+        gated = self.gate.gate_batch(contracts, prices, t, budget=self.gate.daily_budget - used)
+        used += sum(self.gate.entry_risk(g, prices[p]) for p, g in gated.items())
+        self._admitted = (t, used)
+        return gated
@@ -0,0 +1,151 @@
+"""
+Pre-screen between indicators and the LLM: in auto-EUR mode only the most
+promising pairs are worth a decision request.
+
+Every ready pair gets a score in one vectorized pass (NumPy when installed,
+the same arithmetic in plain Python otherwise):
+
+    score = z(log quote volume) + z(ATR / price) + RSI extremity + 2 * fresh cross
+
+- quote volume: EMA of close * volume over ~`volume_bars` bars, fed by
+  `observe` as closed bars arrive (indicator state is warm, so a cycle may
+  only fetch the newest bar);
+- z(...): standardized across the pairs being screened;
+- RSI extremity: 0 between 30 and 70, rising to 1 at 0 / 100;
+- fresh cross: `ema_cross` is "bull_cross" or "bear_cross".
+
+`select` forwards the `top_k` best plus every pair with an open position
+(they need exits whatever their score); pairs without a price are dropped.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import math
+
+from utils import metrics
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover
+    np = None  # scored with the pure-Python fallback
+
+_FRESH = ("bull_cross", "bear_cross")
+W_VOLUME = 1.0
+W_VOLATILITY = 1.0
+W_RSI = 1.0
+W_CROSS = 2.0
+
+
+class ScreenResult(NamedTuple):
+    forwarded: List[str]        # pairs to send to the LLM, best first (open positions included)
+    dropped: List[str]
+    scores: Dict[str, float]    # -inf for pairs that could not be scored
+
+
+def _features(rows: Sequence[Dict[str, Any]], qvol: Sequence[float]) -> Tuple[List[float], ...]:
+    nan = float("nan")
+    price, atr, rsi, cross = [], [], [], []
+    for ind in rows:
+        p, a, r = ind.get("price"), ind.get("atr"), ind.get("rsi")
+        price.append(float(p) if p is not None else nan)
+        atr.append(float(a) if a is not None else nan)
+        rsi.append(float(r) if r is not None else nan)
+        cross.append(1.0 if ind.get("ema_cross") in _FRESH else 0.0)
+    return price, atr, rsi, cross, [float(q) for q in qvol]
+
+
+def _scores_numpy(price: List[float], atr: List[float], rsi: List[float], cross: List[float],
+                  qvol: List[float]) -> List[float]:
+    price_a, atr_a, rsi_a = np.array(price), np.array(atr), np.array(rsi)
+    valid = np.isfinite(price_a) & (price_a > 0)
+
+    def z(x: "np.ndarray") -> "np.ndarray":
+        ok = valid & np.isfinite(x)
+        if not ok.any():
+            return np.zeros_like(x)
+        sd = x[ok].std()
+        out = (x - x[ok].mean()) / sd if sd > 0 else np.zeros_like(x)
+        return np.where(ok, out, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volat = atr_a / price_a
+        liq = np.log1p(np.maximum(np.array(qvol), 0.0))
+    rsi_ext = np.nan_to_num(np.clip((np.abs(rsi_a - 50.0) - 20.0) / 30.0, 0.0, 1.0))
+    score = W_VOLUME * z(liq) + W_VOLATILITY * z(volat) + W_RSI * rsi_ext + W_CROSS * np.array(cross)
+    return np.where(valid, score, -np.inf).tolist()
+
+
+def _scores_py(price: List[float], atr: List[float], rsi: List[float], cross: List[float],
+               qvol: List[float]) -> List[float]:
+    valid = [math.isfinite(p) and p > 0 for p in price]
+
+    def z(x: List[float]) -> List[float]:
+        ok = [xi for xi, v in zip(x, valid) if v and math.isfinite(xi)]
+        if not ok:
+            return [0.0] * len(x)
+        mean = sum(ok) / len(ok)
+        sd = math.sqrt(sum((xi - mean) ** 2 for xi in ok) / len(ok))
+        return [(xi - mean) / sd if sd > 0 and v and math.isfinite(xi) else 0.0 for xi, v in zip(x, valid)]
+
+    volat = [a / p if v else float("nan") for a, p, v in zip(atr, price, valid)]
+    liq = [math.log1p(max(q, 0.0)) for q in qvol]
+    zl, zv = z(liq), z(volat)
+    out = []
+    for i, v in enumerate(valid):
+        ext = min(1.0, max(0.0, (abs(rsi[i] - 50.0) - 20.0) / 30.0)) if math.isfinite(rsi[i]) else 0.0
+        s = W_VOLUME * zl[i] + W_VOLATILITY * zv[i] + W_RSI * ext + W_CROSS * cross[i]
+        out.append(s if v else float("-inf"))
+    return out
+
+
+class PairScreener:
+    def __init__(self, top_k: int, volume_bars: int = 24) -> None:
+        if top_k <= 0:
+            raise ValueError("top_k must be > 0")
+        self.top_k = int(top_k)
+        self._alpha = 2.0 / (max(1, int(volume_bars)) + 1.0)
+        self._qvol: Dict[str, Tuple[int, float]] = {}  # pair -> (last bar t, quote-volume EMA)
+
+    def observe(self, pair: str, t: int, close: float, volume: float) -> None:
+        """Fold one closed bar into the pair's quote-volume average (repeats/older bars ignored)."""
+        qv = float(close) * float(volume)
+        prev = self._qvol.get(pair)
+        if prev is None:
+            self._qvol[pair] = (int(t), qv)
+        elif t > prev[0]:
+            self._qvol[pair] = (int(t), prev[1] + self._alpha * (qv - prev[1]))
+
+    def observe_series(self, pair: str, candles: Iterable[Dict[str, Any]]) -> None:
+        for c in candles:
+            self.observe(pair, c["t"], c["c"], c["v"])
+
+    def scores(self, indicators: Mapping[str, Dict[str, Any]]) -> Dict[str, float]:
+        pairs = list(indicators)
+        if not pairs:
+            return {}
+        feats = _features([indicators[p] for p in pairs], [self._qvol.get(p, (0, 0.0))[1] for p in pairs])
+        vals = (_scores_numpy if np is not None else _scores_py)(*feats)
+        return dict(zip(pairs, vals))
+
+    def select(self, indicators: Mapping[str, Dict[str, Any]], keep: Iterable[str] = (),
+               top_k: Optional[int] = None) -> ScreenResult:
+        """
+        Screen the pairs in `indicators`: forward pairs in `keep` (open
+        positions) plus the `top_k` (default `self.top_k`) best-scoring others.
+        """
+        with metrics.timer("cycle_stage_seconds", stage="screen"):
+            scores = self.scores(indicators)
+            keep_set = set(keep)
+            k = self.top_k if top_k is None else max(0, int(top_k))
+            ranked = sorted(scores, key=lambda p: (-scores[p], p))
+            best = [p for p in ranked if p not in keep_set and scores[p] != float("-inf")][:k]
+            chosen = keep_set.union(best)
+            forwarded = [p for p in ranked if p in chosen]
+            dropped = [p for p in ranked if p not in chosen]
+        metrics.inc("screen_pairs_total", len(forwarded), result="forwarded")
+        metrics.inc("screen_pairs_total", len(dropped), result="dropped")
+        return ScreenResult(forwarded, dropped, scores)
+
+    def forget(self, keep: Iterable[str]) -> None:
+        """Drop volume state for pairs no longer traded."""
+        keep_set = set(keep)
+        for p in [p for p in self._qvol if p not in keep_set]:
+            del self._qvol[p]
@@ -0,0 +1,324 @@
+"""
+Incremental indicator engine (stdlib only).
+
+Keeps the recursion state of the indicators in `indicators.py` so that each new
+candle costs O(1) instead of a full pass over the history:
+- EMA(fast) / EMA(slow), SMA-seeded, and crossover detection
+- RSI (Wilder): avg_gain / avg_loss
+- ATR (Wilder)
+- VWAP (cumulative): sum(tp * v) / sum(v)
+
+Fed the same candles from the start, `update()` returns exactly what
+`compute_indicators()` returns for that list. The last candle may be sent
+again with the same "t" while it is still forming; it is then re-applied on
+top of the state as it was before that candle.
+
+The state is a handful of floats per pair, so `IndicatorEngine.save` can
+checkpoint every pair to JSON each cycle and `IndicatorEngine.load` resumes
+from it: after a restart only the bars newer than each pair's `last_t` need
+to be fetched and applied.
+"""
+from typing import Dict, Any, List, Optional
+import json
+import os
+from pathlib import Path
+
+
+class _State:
+    """Recursion state after `n` candles. Fixed size, so copies are O(1)."""
+
+    __slots__ = (
+        "n", "t", "close",
+        "ema_fast", "ema_fast_sum", "ema_slow", "ema_slow_sum",
+        "avg_gain", "gain_sum", "avg_loss", "loss_sum",
+        "atr", "tr_sum",
+        "vwap_num", "vwap_den",
+    )
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.t: Optional[int] = None
+        self.close = 0.0
+        # EMA values stay 0.0 until seeded, like the padded `_ema` output.
+        self.ema_fast = 0.0
+        self.ema_fast_sum = 0.0
+        self.ema_slow = 0.0
+        self.ema_slow_sum = 0.0
+        self.avg_gain = 0.0
+        self.gain_sum = 0.0
+        self.avg_loss = 0.0
+        self.loss_sum = 0.0
+        self.atr = 0.0
+        self.tr_sum = 0.0
+        self.vwap_num = 0.0
+        self.vwap_den = 0.0
+
+    def copy(self) -> "_State":
+        other = _State.__new__(_State)
+        for name in _State.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in _State.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_State":
+        s = cls()
+        for name in _State.__slots__:
+            if name in data:
+                setattr(s, name, data[name])
+        s.n = int(s.n)
+        s.t = None if s.t is None else int(s.t)
+        return s
+
+
+class IncrementalIndicators:
+    """
+    Streaming indicators for a single pair/timeframe.
+    Periods default to the ones used by `compute_indicators` (12/26/14/14).
+    """
+
+    __slots__ = ("timeframe", "ema_fast", "ema_slow", "rsi_period", "atr_period", "_base", "_cur")
+
+    def __init__(
+        self,
+        timeframe: str,
+        ema_fast: int = 12,
+        ema_slow: int = 26,
+        rsi_period: int = 14,
+        atr_period: int = 14,
+    ) -> None:
+        if min(ema_fast, ema_slow, rsi_period, atr_period) <= 0:
+            raise ValueError("indicator periods must be > 0")
+        self.timeframe = timeframe
+        self.ema_fast = int(ema_fast)
+        self.ema_slow = int(ema_slow)
+        self.rsi_period = int(rsi_period)
+        self.atr_period = int(atr_period)
+        self._base = _State()  # state before the last candle
+        self._cur = _State()   # state including the last candle
+
+    @property
+    def count(self) -> int:
+        """Number of candles applied so far."""
+        return self._cur.n
+
+    @property
+    def last_t(self) -> Optional[int]:
+        """Open time of the last applied candle, or None if empty."""
+        return self._cur.t
+
+    def seed(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Feed a history of candles (ascending by time) and return the latest values."""
+        for c in candles:
+            self.update(c)
+        return self.values()
+
+    def update(self, candle: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply one candle {"t","o","h","l","c","v"} and return the indicator dict.
+        A candle with the same "t" as the last one replaces it (in-progress revision).
+        """
+        t = int(candle["t"])
+        cur = self._cur
+        if cur.t is not None and t == cur.t:
+            self._cur = self._base.copy()
+        elif cur.t is not None and t < cur.t:
+            raise ValueError(f"Out-of-order candle: t={t} < last t={cur.t}")
+        else:
+            self._base = cur
+            self._cur = cur.copy()
+        self._apply(self._cur, candle)
+        return self.values()
+
+    def periods(self) -> List[int]:
+        return [self.ema_fast, self.ema_slow, self.rsi_period, self.atr_period]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe snapshot of the recursion state (both the current and the pre-last-candle one)."""
+        return {"periods": self.periods(), "base": self._base.to_dict(), "cur": self._cur.to_dict()}
+
+    @classmethod
+    def from_dict(cls, timeframe: str, data: Dict[str, Any]) -> "IncrementalIndicators":
+        ema_fast, ema_slow, rsi_period, atr_period = data["periods"]
+        ind = cls(timeframe, ema_fast, ema_slow, rsi_period, atr_period)
+        ind._base = _State.from_dict(data["base"])
+        ind._cur = _State.from_dict(data["cur"])
+        return ind
+
+    def _apply(self, s: _State, candle: Dict[str, Any]) -> None:
+        h = float(candle["h"])
+        l = float(candle["l"])
+        c = float(candle["c"])
+        v = float(candle["v"])
+        prev_close = s.close
+        s.n += 1
+        n = s.n
+        s.t = int(candle["t"])
+        s.close = c
+
+        # EMA: SMA seed over the first `period` closes, then recursive
+        p = self.ema_fast
+        if n < p:
+            s.ema_fast_sum += c
+        elif n == p:
+            s.ema_fast_sum += c
+            s.ema_fast = s.ema_fast_sum / p
+        else:
+            k = 2.0 / (p + 1.0)
+            s.ema_fast = c * k + s.ema_fast * (1.0 - k)
+        p = self.ema_slow
+        if n < p:
+            s.ema_slow_sum += c
+        elif n == p:
+            s.ema_slow_sum += c
+            s.ema_slow = s.ema_slow_sum / p
+        else:
+            k = 2.0 / (p + 1.0)
+            s.ema_slow = c * k + s.ema_slow * (1.0 - k)
+
+        # RSI / ATR work on deltas, so they start at the second candle
+        m = n - 1
+        if m < 1:
+            s.vwap_num += ((h + l + c) / 3.0) * v
+            s.vwap_den += v
+            return
+        delta = c - prev_close
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        p = self.rsi_period
+        if m < p:
+            s.gain_sum += gain
+            s.loss_sum += loss
+        elif m == p:
+            s.gain_sum += gain
+            s.loss_sum += loss
+            s.avg_gain = s.gain_sum / p
+            s.avg_loss = s.loss_sum / p
+        else:
+            s.avg_gain = (s.avg_gain * (p - 1) + gain) / p
+            s.avg_loss = (s.avg_loss * (p - 1) + loss) / p
+
+        tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
+        p = self.atr_period
+        if m < p:
+            s.tr_sum += tr
+        elif m == p:
+            s.tr_sum += tr
+            s.atr = s.tr_sum / p
+        else:
+            s.atr = (s.atr * (p - 1) + tr) / p
+
+        s.vwap_num += ((h + l + c) / 3.0) * v
+        s.vwap_den += v
+
+    def values(self) -> Dict[str, Any]:
+        """Return the same dict shape as `compute_indicators`."""
+        s = self._cur
+        out = {
+            "rsi": None,
+            "ema12": None,
+            "ema26": None,
+            "ema_cross": None,
+            "atr": None,
+            "vwap": None,
+            "price": s.close if s.n else None,
+            "timeframe": self.timeframe,
+        }
+        n = s.n
+        if n < 2:
+            return out
+        if n >= self.ema_fast:
+            out["ema12"] = s.ema_fast
+        if n >= self.ema_slow:
+            out["ema26"] = s.ema_slow
+        if n - 1 >= self.rsi_period:
+            rs = (s.avg_gain / s.avg_loss) if s.avg_loss != 0 else float("inf")
+            out["rsi"] = 100.0 - (100.0 / (1.0 + rs))
+        if n - 1 >= self.atr_period:
+            out["atr"] = s.atr
+        if s.vwap_den != 0.0:
+            out["vwap"] = s.vwap_num / s.vwap_den
+
+        if n >= self.ema_fast and n >= self.ema_slow:
+            e12_now = s.ema_fast
+            e26_now = s.ema_slow
+            regime = "bull" if e12_now > e26_now else ("bear" if e12_now < e26_now else "none")
+            label = regime
+            b = self._base
+            prev_regime = "bull" if b.ema_fast > b.ema_slow else ("bear" if b.ema_fast < b.ema_slow else "none")
+            if regime != "none" and prev_regime != "none" and regime != prev_regime:
+                label = "bull_cross" if regime == "bull" else "bear_cross"
+            out["ema_cross"] = label
+        return out
+
+
+class IndicatorEngine:
+    """Per-pair collection of `IncrementalIndicators` for one timeframe."""
+
+    def __init__(self, timeframe: str, **periods: int) -> None:
+        self.timeframe = timeframe
+        self._periods = periods
+        self._pairs: Dict[str, IncrementalIndicators] = {}
+
+    def get(self, pair: str) -> IncrementalIndicators:
+        ind = self._pairs.get(pair)
+        if ind is None:
+            ind = IncrementalIndicators(self.timeframe, **self._periods)
+            self._pairs[pair] = ind
+        return ind
+
+    def seed(self, pair: str, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Reset `pair` and rebuild its state from a full candle history."""
+        self._pairs.pop(pair, None)
+        return self.get(pair).seed(candles)
+
+    def update(self, pair: str, candle: Dict[str, Any]) -> Dict[str, Any]:
+        return self.get(pair).update(candle)
+
+    def values(self, pair: str) -> Optional[Dict[str, Any]]:
+        ind = self._pairs.get(pair)
+        return ind.values() if ind is not None else None
+
+    def pairs(self) -> List[str]:
+        return sorted(self._pairs)
+
+    # ---------- Checkpoint ----------
+    def save(self, path: str) -> int:
+        """Write every pair's state to `path` atomically (tmp + fsync + rename); returns the pair count."""
+        doc = {
+            "timeframe": self.timeframe,
+            "pairs": {pair: ind.to_dict() for pair, ind in self._pairs.items() if ind.count},
+        }
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(doc, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, p)
+        return len(doc["pairs"])
+
+    def load(self, path: str) -> int:
+        """
+        Restore pairs from a checkpoint written by `save`; returns how many.
+        A missing file, another timeframe, or pairs saved with different
+        periods are skipped (those pairs are simply seeded again).
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except FileNotFoundError:
+            return 0
+        if doc.get("timeframe") != self.timeframe:
+            return 0
+        want = IncrementalIndicators(self.timeframe, **self._periods).periods()
+        restored = 0
+        for pair, data in doc.get("pairs", {}).items():
+            if list(data.get("periods", [])) != want:
+                continue
+            self._pairs[pair] = IncrementalIndicators.from_dict(self.timeframe, data)
+            restored += 1
+        return restored
@@ -4,12 +4,18 @@ Indicator implementations (stdlib only):
 - EMA(12) / EMA(26) and crossover detection
 - ATR (Wilder 14)
 - VWAP (cumulative or windowed)
+
+Inputs may be a list of candle dicts or a columnar `CandleSeries`; the series
+is consumed column-wise without building per-candle dicts.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+from data.candles import CandleSeries
+from utils import metrics
 
 # ---------- Helpers ----------
-def _ema(values: List[float], period: int) -> Optional[List[float]]:
-    if period <= 0 or not values or len(values) < period:
+def _ema(values: Sequence[float], period: int) -> Optional[List[float]]:
+    if period <= 0 or not len(values) or len(values) < period:
         return None
     k = 2.0 / (period + 1.0)
     out: List[float] = [0.0] * len(values)
@@ -21,7 +27,7 @@ def _ema(values: List[float], period: int) -> Optional[List[float]]:
     return out
 
 
-def _rsi(prices: List[float], period: int = 14) -> Optional[List[float]]:
+def _rsi(prices: Sequence[float], period: int = 14) -> Optional[List[float]]:
     if period <= 0 or len(prices) < period + 1:
         return None
     gains: List[float] = [0.0] * len(prices)
@@ -46,15 +52,21 @@ def _rsi(prices: List[float], period: int = 14) -> Optional[List[float]]:
 
 
 def _atr(candles: List[Dict[str, float]], period: int = 14) -> Optional[List[float]]:
-    n = len(candles)
+    return _atr_hlc(
+        [r["h"] for r in candles], [r["l"] for r in candles], [r["c"] for r in candles], period
+    )
+
+
+def _atr_hlc(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], period: int = 14) -> Optional[List[float]]:
+    n = len(closes)
     if period <= 0 or n < period + 1:
         return None
     # True Range per bar starting from index 1 (needs previous close)
     trs: List[float] = [0.0] * n
     for i in range(1, n):
-        h = candles[i]["h"]
-        l = candles[i]["l"]
-        pc = candles[i - 1]["c"]
+        h = highs[i]
+        l = lows[i]
+        pc = closes[i - 1]
         tr = max(h - l, abs(h - pc), abs(l - pc))
         trs[i] = tr
     # Wilder ATR: first ATR = SMA of TR over 'period', then recursive
@@ -71,11 +83,18 @@ def _vwap(candles: List[Dict[str, float]], window: Optional[int] = None) -> Opti
     if not candles:
         return None
     data = candles[-window:] if (window and window > 0) else candles
+    return _vwap_hlcv(
+        [r["h"] for r in data], [r["l"] for r in data], [r["c"] for r in data], [r["v"] for r in data]
+    )
+
+
+def _vwap_hlcv(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float], volumes: Sequence[float]) -> Optional[float]:
+    if not len(closes):
+        return None
     num = 0.0
     den = 0.0
-    for r in data:
-        tp = (r["h"] + r["l"] + r["c"]) / 3.0
-        v = r["v"]
+    for h, l, c, v in zip(highs, lows, closes, volumes):
+        tp = (h + l + c) / 3.0
         num += tp * v
         den += v
     if den == 0.0:
@@ -84,9 +103,11 @@ def _vwap(candles: List[Dict[str, float]], window: Optional[int] = None) -> Opti
 
 
 # ---------- Public API ----------
-def compute_indicators(candles: List[Dict[str, Any]], timeframe: str) -> Dict[str, Any]:
+@metrics.timed("indicators_seconds")
+def compute_indicators(candles: Union[CandleSeries, List[Dict[str, Any]]], timeframe: str) -> Dict[str, Any]:
     """
     Expect candles like: [{"t": epoch_sec, "o": ..., "h": ..., "l": ..., "c": ..., "v": ...}, ...]
+    or a `CandleSeries` (read column-wise).
     Returns a dict with keys: rsi, ema12, ema26, ema_cross, atr, vwap, price, timeframe.
     All values are floats where available; otherwise None if insufficient data.
     """
@@ -103,12 +124,21 @@ def compute_indicators(candles: List[Dict[str, Any]], timeframe: str) -> Dict[st
     if not candles or len(candles) < 2:
         return out
 
-    closes = [float(r["c"]) for r in candles]
+    if isinstance(candles, CandleSeries):
+        closes: Sequence[float] = candles.c
+        highs: Sequence[float] = candles.h
+        lows: Sequence[float] = candles.l
+        volumes: Sequence[float] = candles.v
+    else:
+        closes = [float(r["c"]) for r in candles]
+        highs = [r["h"] for r in candles]
+        lows = [r["l"] for r in candles]
+        volumes = [r["v"] for r in candles]
     ema12_series = _ema(closes, 12)
     ema26_series = _ema(closes, 26)
     rsi_series = _rsi(closes, 14)
-    atr_series = _atr(candles, 14)
-    vwap_val = _vwap(candles)  # cumulative
+    atr_series = _atr_hlc(highs, lows, closes, 14)
+    vwap_val = _vwap_hlcv(highs, lows, closes, volumes)  # cumulative
 
     # Fill current values if available
     if ema12_series:
@@ -0,0 +1,102 @@
+"""
+Deadline-bounded multi-pair decisions.
+
+`BatchDecider` splits the pairs of one cycle into batches of `batch_size`,
+sends them through `GroqClient.decide_batch` concurrently (at most
+`max_concurrency` requests in flight) and waits until the cycle deadline.
+Any pair without an answer by then gets `empty_contract()` ("hold"), so a
+slow reply never stalls the loop.
+
+Requests run on the decider's own thread pool, not the event loop's default
+executor: `asyncio.run` waits for the default executor on exit, which would
+let a late HTTP call hold up the cycle after the deadline had passed.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import asyncio
+import time
+
+from contracts.action_contract import empty_contract, validate_contract
+from llm.groq_client import FALLBACK_PREFIX, BatchItem, GroqClient
+from utils.logging import get_logger
+
+LOG = get_logger("llm.batch")
+
+
+class BatchDecider:
+    def __init__(
+        self,
+        client: GroqClient,
+        batch_size: int = 8,
+        max_concurrency: int = 4,
+        deadline: float = 10.0,
+    ) -> None:
+        if batch_size <= 0 or max_concurrency <= 0:
+            raise ValueError("batch_size and max_concurrency must be > 0")
+        if deadline <= 0:
+            raise ValueError("deadline must be > 0")
+        self.client = client
+        self.batch_size = int(batch_size)
+        self.max_concurrency = int(max_concurrency)
+        self.deadline = float(deadline)
+        self.timed_out = 0  # pairs that fell back to hold on the deadline (cumulative)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-batch")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _batches(self, requests: Mapping[str, Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]) -> List[List[BatchItem]]:
+        items = [(pair, ind, pos, risk) for pair, (ind, pos, risk) in requests.items()]
+        return [items[i : i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    async def decide_all(
+        self,
+        requests: Mapping[str, Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]],
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Decide every pair in `requests` ({pair: (indicators, position, risk)})
+        within `deadline` seconds (default: the decider's). Always returns a
+        contract for each pair.
+        """
+        budget = self.deadline if deadline is None else float(deadline)
+        end = time.monotonic() + budget
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[str, Dict[str, Any]] = {}
+
+        async def _one(batch: List[BatchItem]) -> None:
+            async with sem:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return
+                # the HTTP timeout tracks the deadline so the worker thread frees up soon after it
+                out = await loop.run_in_executor(self._executor, self.client.decide_batch, batch, remaining)
+                results.update(out)
+
+        tasks = [asyncio.ensure_future(_one(b)) for b in self._batches(requests)]
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=max(0.0, end - time.monotonic()))
+            for t in pending:
+                t.cancel()
+            for t in done:
+                if not t.cancelled() and t.exception() is not None:
+                    LOG.warning("LLM batch failed: %s", t.exception())
+
+        missing = [p for p in requests if p not in results]
+        if missing:
+            self.timed_out += len(missing)
+            LOG.warning("LLM deadline (%.1fs) hit; %d/%d pairs default to hold", budget, len(missing), len(requests))
+            for p in missing:
+                c = empty_contract()
+                c["reason"] = FALLBACK_PREFIX + "deadline"
+                results[p] = validate_contract(c)
+        return results
+
+    def run(
+        self,
+        requests: Mapping[str, Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]],
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Blocking wrapper around `decide_all` for synchronous callers."""
+        return asyncio.run(self.decide_all(requests, deadline))
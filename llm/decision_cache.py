@@ -0,0 +1,285 @@
+"""
+Memoizing cache in front of `GroqClient.decide` / `BatchDecider` (stdlib only).
+
+Decisions are keyed on a quantized fingerprint of the inputs rather than the
+raw floats, so states that differ only by noise share an entry:
+- RSI bucket (`rsi_step` wide), EMA cross regime ('bull', 'bear', '*_cross')
+- ATR/price band (log-spaced, `atr_band` ratio between bands)
+- position side (and, when open, which side of entry the price is on)
+- risk limits (exact), the pair (passed in) and the timeframe when present
+  in `indicators`
+
+Entries expire after `ttl` seconds and the least recently used entry is
+evicted beyond `max_entries`. Stop/take-profit are stored relative to the
+price at decision time and rescaled to the current price on a hit, so a
+cached contract never carries another bar's absolute levels. Fallback holds
+(`is_fallback`: deadline, HTTP error, bad reply) are never cached, so an
+outage does not pin a pair to "hold" for a whole TTL.
+
+Persistence (optional) is a JSON file written atomically (tmp + os.replace);
+expiry uses wall-clock time so entries survive a restart until their TTL.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from contracts.action_contract import validate_contract
+from llm.batch import BatchDecider
+from llm.groq_client import is_fallback
+from utils import metrics
+from utils.logging import get_logger
+
+LOG = get_logger("llm.decision_cache")
+
+DecideFn = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+Request = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]  # (indicators, position, risk)
+
+_LEVELS = ("stop", "take_profit")
+
+
+def _num(val: Any) -> Optional[float]:
+    try:
+        f = float(val)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
+
+def fingerprint(
+    indicators: Dict[str, Any],
+    position: Dict[str, Any],
+    risk: Dict[str, Any],
+    rsi_step: float = 5.0,
+    atr_band: float = 1.25,
+    pair: Optional[str] = None,
+) -> str:
+    """Quantize the decision inputs for `pair` into a stable string key."""
+    rsi = _num(indicators.get("rsi"))
+    price = _num(indicators.get("price"))
+    atr = _num(indicators.get("atr"))
+    rsi_bucket = int(rsi // rsi_step) if rsi is not None else None
+    atr_bucket = None
+    if atr is not None and price and atr > 0:
+        atr_bucket = math.floor(math.log(atr / price) / math.log(atr_band))
+    side = position.get("side", "flat")
+    entry = _num(position.get("entry_price"))
+    in_profit = None
+    if side != "flat" and entry and price:
+        in_profit = price >= entry if side == "long" else price <= entry
+    key = [
+        pair,
+        indicators.get("timeframe"),
+        rsi_bucket,
+        indicators.get("ema_cross"),
+        atr_bucket,
+        side,
+        in_profit,
+        sorted((str(k), _num(v)) for k, v in risk.items()),
+    ]
+    return json.dumps(key, separators=(",", ":"))
+
+
+class DecisionCache:
+    """LRU + TTL map of fingerprint -> validated contract. Thread-safe."""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0, path: Optional[str] = None) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        if ttl <= 0:
+            raise ValueError("ttl must be > 0")
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.load()
+
+    @classmethod
+    def from_config(cls, cfg: Any) -> "DecisionCache":
+        """Cache sized from `Config`; persisted under `storage_dir` when enabled."""
+        path = str(Path(cfg.storage_dir) / "decision_cache.json") if cfg.decision_cache_persist else None
+        return cls(max_entries=cfg.decision_cache_size, ttl=cfg.decision_cache_ttl, path=path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                metrics.inc("llm_cache_lookups_total", result="miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.inc("llm_cache_lookups_total", result="hit")
+            return dict(item[1])
+
+    def put(self, key: str, contract: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, dict(contract))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # ---------- Persistence ----------
+    def load(self) -> int:
+        """Merge unexpired entries from `path`; returns how many were loaded."""
+        if self.path is None:
+            return 0
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                items = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            LOG.warning("Ignoring unreadable decision cache %s: %s", self.path, e)
+            return 0
+        now = time.time()
+        n = 0
+        with self._lock:
+            for key, expires, contract in items:
+                if expires > now and isinstance(contract, dict):
+                    self._entries[key] = (float(expires), contract)
+                    n += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return n
+
+    def save(self) -> None:
+        """Write unexpired entries (LRU order) to `path` atomically."""
+        if self.path is None:
+            return
+        now = time.time()
+        with self._lock:
+            items = [[k, exp, c] for k, (exp, c) in self._entries.items() if exp > now]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(items, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+class CachedDecider:
+    """
+    Wrap a `decide(indicators, position, risk)` callable (e.g.
+    `GroqClient(...).decide`) and/or a `BatchDecider` with a `DecisionCache`.
+    Misses call through and cache the validated contract; hits return it
+    without a round-trip.
+    """
+
+    def __init__(
+        self,
+        decide: Optional[DecideFn] = None,
+        cache: Optional[DecisionCache] = None,
+        rsi_step: float = 5.0,
+        atr_band: float = 1.25,
+        batch: Optional[BatchDecider] = None,
+    ) -> None:
+        if decide is None and batch is None:
+            raise ValueError("need a decide callable or a BatchDecider")
+        self._decide = decide
+        self.batch = batch
+        self.cache = cache if cache is not None else DecisionCache()
+        self.rsi_step = float(rsi_step)
+        self.atr_band = float(atr_band)
+
+    @property
+    def batch_size(self) -> int:
+        return self.batch.batch_size if self.batch is not None else 1
+
+    def close(self) -> None:
+        """Close the wrapped `BatchDecider` and persist the cache (no-op when not persisted)."""
+        if self.batch is not None:
+            self.batch.close()
+        try:
+            self.cache.save()
+        except OSError as e:
+            LOG.warning("Could not save decision cache %s: %s", self.cache.path, e)
+
+    def __call__(self, indicators: Dict[str, Any], position: Dict[str, Any], risk: Dict[str, Any],
+                 pair: Optional[str] = None) -> Dict[str, Any]:
+        return self.decide(indicators, position, risk, pair)
+
+    def _lookup(self, pair: Optional[str], indicators: Dict[str, Any], position: Dict[str, Any],
+                risk: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        key = fingerprint(indicators, position, risk, self.rsi_step, self.atr_band, pair=pair)
+        hit = self.cache.get(key)
+        if hit is not None:
+            price = _num(indicators.get("price"))
+            for k in _LEVELS:
+                rel = hit.get(k)
+                hit[k] = rel * price if rel is not None and price else None
+        return key, hit
+
+    def _store(self, key: str, contract: Dict[str, Any], indicators: Dict[str, Any]) -> None:
+        if is_fallback(contract):
+            return
+        price = _num(indicators.get("price"))
+        stored = dict(contract)
+        for k in _LEVELS:
+            level = _num(contract.get(k))
+            stored[k] = level / price if level is not None and price else None
+        self.cache.put(key, stored)
+
+    def decide(self, indicators: Dict[str, Any], position: Dict[str, Any], risk: Dict[str, Any],
+               pair: Optional[str] = None) -> Dict[str, Any]:
+        if self._decide is None:
+            raise ValueError("no decide callable; use decide_all")
+        key, hit = self._lookup(pair, indicators, position, risk)
+        if hit is not None:
+            return hit
+        contract = validate_contract(self._decide(indicators, position, risk))
+        self._store(key, contract, indicators)
+        return contract
+
+    async def decide_all(self, requests: Mapping[str, Request], deadline: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        `BatchDecider.decide_all` with the cache in front: hits are answered
+        here, only the misses go out to the LLM.
+        """
+        if self.batch is None:
+            raise ValueError("no BatchDecider; use decide")
+        results: Dict[str, Dict[str, Any]] = {}
+        keys: Dict[str, str] = {}
+        misses: Dict[str, Request] = {}
+        for pair, req in requests.items():
+            key, hit = self._lookup(pair, *req)
+            if hit is not None:
+                results[pair] = hit
+            else:
+                keys[pair] = key
+                misses[pair] = req
+        if misses:
+            out = await self.batch.decide_all(misses, deadline)
+            for pair, contract in out.items():
+                self._store(keys[pair], contract, misses[pair][0])
+            results.update(out)
+        return results
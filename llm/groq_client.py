@@ -1,16 +1,192 @@
 """
-Groq LLM wrapper (stub). No network calls in Step 1.
+Groq LLM wrapper (OpenAI-compatible chat completions over a pooled keep-alive
+connection). Without an API key every call returns the validated placeholder
+contract, so the bot runs offline.
+
+- `decide`: one pair per request.
+- `decide_batch`: several pairs packed into one request; the reply is split
+  back into per-pair contracts, each run through `validate_contract`. Pairs
+  missing from (or malformed in) the reply fall back to `empty_contract()`.
+
+With `stream=True` replies are read as server-sent events and parsed as they
+arrive (`llm.json_stream`): once the first JSON object is complete the stream
+is closed, which stops the generation of whatever the model would have
+written after it. Prose and code fences around the object are tolerated.
+Groq's JSON mode does not stream, so this relies on the prompt alone.
 """
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import time
+
 from contracts.action_contract import empty_contract, validate_contract
+from llm.json_stream import JSONObjectScanner, iter_sse
+from utils import metrics
+from utils.http_pool import CircuitBreaker, HTTPPool
+from utils.logging import get_logger
+
+LOG = get_logger("llm.groq_client")
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+# (pair, indicators, position, risk)
+BatchItem = Tuple[str, Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+_CONTRACT_SPEC = (
+    '{"action": "enter_long"|"exit_long"|"enter_short"|"exit_short"|"hold", '
+    '"size_fraction": 0..1, "stop": number|null, "take_profit": number|null, '
+    '"confidence": 0..1, "reason": "one sentence"}'
+)
+_SYSTEM_SINGLE = (
+    "You are a cautious paper-trading assistant. Given indicators, the current position "
+    "and risk limits, reply with ONE JSON object and nothing else: " + _CONTRACT_SPEC
+)
+_SYSTEM_BATCH = (
+    "You are a cautious paper-trading assistant. The input maps each pair to its indicators, "
+    "position and risk limits. Reply with ONE JSON object and nothing else: "
+    '{"decisions": {"<pair>": ' + _CONTRACT_SPEC + ", ...}} with one entry per input pair."
+)
+
+
+# Reasons given to "hold" contracts substituted for a missing/failed LLM answer
+FALLBACK_PREFIX = "llm "
+
+
+def _placeholder(reason: str) -> Dict[str, Any]:
+    c = empty_contract()
+    c["reason"] = FALLBACK_PREFIX + reason
+    return validate_contract(c)
+
+
+def is_fallback(contract: Dict[str, Any]) -> bool:
+    """True when `contract` is a hold substituted for a failed or missing LLM answer."""
+    return str(contract.get("reason", "")).startswith(FALLBACK_PREFIX)
+
 
 class GroqClient:
-    def __init__(self, model: str = "llama3.1-70b") -> None:
+    def __init__(
+        self,
+        model: str = "llama3.1-70b",
+        api_key: Optional[str] = None,
+        base_url: str = GROQ_BASE_URL,
+        timeout: float = 20.0,
+        max_connections: int = 8,
+        stream: bool = False,
+    ) -> None:
         self.model = model
+        self.api_key = api_key or None
+        self.timeout = float(timeout)
+        self.stream = bool(stream)
+        self._pool = HTTPPool(base_url, max_size=max_connections, timeout=self.timeout)
+        self._breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def _chat(self, system: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """One chat completion; returns the reply parsed as a JSON object."""
+        req: Dict[str, Any] = {
+            "model": self.model,
+            "temperature": 0,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": json.dumps(payload, separators=(",", ":"))},
+            ],
+        }
+        if self.stream:
+            req["stream"] = True
+        else:
+            req["response_format"] = {"type": "json_object"}
+        body = json.dumps(req).encode("utf-8")
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        self._breaker.before_call()
+        try:
+            with metrics.timer("llm_http_seconds"):
+                if self.stream:
+                    status, data, obj = self._post_stream(body, headers, timeout)
+                else:
+                    status, _, data = self._pool.request("POST", "/chat/completions", body=body, headers=headers, timeout=timeout)
+        except Exception:
+            self._breaker.record_failure()
+            metrics.inc("llm_http_errors_total", kind="transport")
+            raise
+        if status == 429 or status >= 500:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        if status >= 400:
+            metrics.inc("llm_http_errors_total", kind=str(status))
+            raise RuntimeError(f"Groq HTTP {status}: {data[:200].decode('utf-8', 'replace')}")
+        if not self.stream:
+            content = json.loads(data.decode("utf-8"))["choices"][0]["message"]["content"]
+            obj = json.loads(content)
+        if not isinstance(obj, dict):
+            raise ValueError("LLM reply is not a JSON object")
+        return obj
+
+    def _post_stream(
+        self, body: bytes, headers: Dict[str, str], timeout: Optional[float]
+    ) -> Tuple[int, bytes, Optional[Dict[str, Any]]]:
+        """
+        Streamed completion: (status, error body, first JSON object of the
+        reply or None). Stops reading as soon as that object is complete.
+        """
+        t = self.timeout if timeout is None else float(timeout)
+        deadline = time.monotonic() + t
+        scanner = JSONObjectScanner()
+        with self._pool.stream("POST", "/chat/completions", body=body,
+                               headers=dict(headers, Accept="text/event-stream"), timeout=t) as resp:
+            if resp.status >= 400:
+                return resp.status, resp.read(), None
+            for event in iter_sse(resp):
+                if event == "[DONE]":
+                    resp.read()  # chunked terminator; leaves the connection reusable
+                    break
+                choices = json.loads(event).get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text and scanner.feed(text) is not None:
+                    metrics.inc("llm_stream_total", end="early")
+                    return resp.status, b"", scanner.result
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"LLM stream exceeded {t:.1f}s")
+        metrics.inc("llm_stream_total", end="complete")
+        obj = scanner.finish()
+        if obj is None:
+            raise ValueError("LLM stream ended without a JSON object")
+        return resp.status, b"", obj
 
     def decide(self, indicators: Dict[str, Any], position: Dict[str, Any], risk: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Build input JSON and (later) call Groq.
-        Step 1 returns a validated placeholder contract.
+        Ask the model for one contract. Never raises: transport/parse errors
+        and a missing API key yield a validated "hold" placeholder.
+        """
+        if not self.api_key:
+            return validate_contract(empty_contract())
+        try:
+            obj = self._chat(_SYSTEM_SINGLE, {"indicators": indicators, "position": position, "risk": risk})
+        except Exception as e:
+            LOG.warning("Groq decide failed: %s", e)
+            return _placeholder(f"error: {type(e).__name__}")
+        return validate_contract(obj)
+
+    def decide_batch(self, items: Sequence[BatchItem], timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Decide several pairs in one request. Returns {pair: contract} for every
+        input pair; never raises (failures become "hold" placeholders).
         """
-        return validate_contract(empty_contract())
+        pairs: List[str] = [it[0] for it in items]
+        if not self.api_key:
+            return {p: validate_contract(empty_contract()) for p in pairs}
+        payload = {p: {"indicators": ind, "position": pos, "risk": risk} for p, ind, pos, risk in items}
+        try:
+            obj = self._chat(_SYSTEM_BATCH, payload, timeout=timeout)
+        except Exception as e:
+            LOG.warning("Groq batch of %d failed: %s", len(pairs), e)
+            return {p: _placeholder(f"error: {type(e).__name__}") for p in pairs}
+        decisions = obj.get("decisions", obj)
+        if not isinstance(decisions, dict):
+            decisions = {}
+        out: Dict[str, Dict[str, Any]] = {}
+        for p in pairs:
+            d = decisions.get(p)
+            out[p] = validate_contract(d) if isinstance(d, dict) else _placeholder("reply missing pair")
+        return out
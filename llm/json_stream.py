@@ -0,0 +1,128 @@
+"""
+Incremental parsing of streamed (SSE) chat completions.
+
+- `iter_sse`: yields the `data:` payload of each server-sent event read from
+  an HTTP response, line by line as it arrives.
+- `JSONObjectScanner`: fed the reply text piece by piece, returns the first
+  complete top-level JSON object as soon as its closing brace arrives, so
+  the caller can stop reading (and the model stop generating) right there.
+  Text around the object is skipped: leading prose, ```json fences, and
+  whatever the model keeps writing after it. A brace in the prose that does
+  not start a valid object is retried from the next one.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import re
+
+# characters that matter outside / inside a JSON string
+_STRUCT = re.compile(r'[{}\[\]"]')
+_IN_STRING = re.compile(r'["\\]')
+
+
+def iter_sse(resp: Any) -> Iterator[str]:
+    """`data` of each event in an SSE body (multi-line data joined with "\\n"); comments skipped."""
+    data: List[str] = []
+    while True:
+        raw = resp.readline()
+        if not raw:
+            break
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+class JSONObjectScanner:
+    def __init__(self) -> None:
+        self._buf = ""
+        self._pos = 0        # next character to scan
+        self._start = -1     # index of the "{" of the current candidate, -1 when outside one
+        self._depth = 0
+        self._in_str = False
+        self.result: Optional[Dict[str, Any]] = None
+
+    def feed(self, text: str) -> Optional[Dict[str, Any]]:
+        """Add reply text; returns the object once complete (and keeps returning it)."""
+        if self.result is not None:
+            return self.result
+        self._buf += text
+        return self._scan()
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """
+        End of stream: if an unbalanced "{" in the prose swallowed the object,
+        retry from every later brace. Returns the object or None.
+        """
+        if self.result is not None:
+            return self.result
+        start = self._start
+        while start >= 0:
+            start = self._buf.find("{", start + 1)
+            if start < 0:
+                break
+            self._reset(start)
+            if self._scan() is not None:
+                break
+        return self.result
+
+    def _reset(self, pos: int) -> None:
+        self._pos = pos
+        self._start = -1
+        self._depth = 0
+        self._in_str = False
+
+    def _scan(self) -> Optional[Dict[str, Any]]:
+        buf = self._buf
+        while True:
+            if self._start < 0:
+                i = buf.find("{", self._pos)
+                if i < 0:
+                    self._pos = len(buf)
+                    return None
+                self._start, self._pos = i, i
+            if self._in_str:
+                m = _IN_STRING.search(buf, self._pos)
+                if m is None:
+                    self._pos = len(buf)
+                    return None
+                if m.group() == "\\":
+                    if m.end() >= len(buf):
+                        self._pos = m.start()  # escaped character not here yet
+                        return None
+                    self._pos = m.end() + 1
+                    continue
+                self._in_str = False
+                self._pos = m.end()
+                continue
+            m = _STRUCT.search(buf, self._pos)
+            if m is None:
+                self._pos = len(buf)
+                return None
+            self._pos = m.end()
+            ch = m.group()
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads(buf[self._start:self._pos])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        self.result = obj
+                        return obj
+                    self._reset(self._start + 1)
+                elif self._depth < 0:
+                    self._reset(self._start + 1)
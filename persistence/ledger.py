@@ -1,11 +1,420 @@
 """
-Ledger I/O (stub). CSV later.
+Append-only fill ledger with group commit and a sidecar offset index (stdlib only).
+
+Files under `<storage_dir>/ledger/`:
+- `ledger.jsonl`  one JSON record per line (the data of record)
+- `ledger.idx`    fixed-width little-endian entries `<dQI`: t, byte offset of
+                  the line in ledger.jsonl, pair id (20 bytes per record)
+- `ledger.pairs`  pair names, one per line; the line number is the pair id
+- `ledger.late`   `<Qd` entries: index position and own t of each late record
+
+Appends go to an in-memory buffer. A flush writes all buffered lines with one
+write per file and fsyncs (data, then pairs, then late, then index), either when
+`flush_every` records are pending or after `flush_interval` seconds, so the
+fsync cost is shared by the whole group.
+
+Reads never scan the data file: the tail comes from the last index entries,
+and time ranges are found by binary search over the index. The index t is
+non-decreasing: a late record is indexed at the newest t seen so far and its
+own t is kept in `ledger.late` (loaded into memory on open), so a query also
+picks up late records indexed past its end. Pair filters are applied to the
+index before any data is read, and a `limit` query walks the index back
+from the end of its range in blocks, stopping as soon as nothing older can
+be among the newest matches.
+
+On open, index entries that point past the data are dropped, unindexed
+trailing lines (crash between the two writes) are re-indexed, and a torn
+final line is truncated.
 """
-from typing import Dict, Any, List
+from typing import Any, Dict, List, Optional, Tuple
+import atexit
+import json
+import math
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from utils import metrics
+from utils.logging import get_logger
+
+LOG = get_logger("persistence.ledger")
+
+_ENTRY = struct.Struct("<dQI")
+_LATE = struct.Struct("<Qd")
+_SCAN_BLOCK = 256  # index entries read per step when a `limit` query walks back
+
+
+def _finite_t(val: Any) -> Optional[float]:
+    """A stored record's t as a finite float, or None when it can't be read as one."""
+    if isinstance(val, bool):
+        return None
+    try:
+        t = float(val)
+    except (TypeError, ValueError):
+        return None
+    return t if math.isfinite(t) else None
+
+
+class Ledger:
+    def __init__(
+        self,
+        storage_dir: str = "storage",
+        flush_every: int = 256,
+        flush_interval: float = 0.05,
+        fsync: bool = True,
+    ) -> None:
+        if flush_every <= 0:
+            raise ValueError("flush_every must be > 0")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be > 0")
+        self.root = Path(storage_dir) / "ledger"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.flush_every = int(flush_every)
+        self.flush_interval = float(flush_interval)
+        self.fsync = bool(fsync)
+        self._lock = threading.Lock()      # guards the buffer
+        self._io_lock = threading.Lock()   # serializes flushes and reads of the files
+        self._buf: List[Tuple[float, str, bytes]] = []
+        self._pair_ids: Dict[str, int] = {}
+        self._pair_names: List[str] = []
+        self._data = open(self.root / "ledger.jsonl", "a+b")
+        self._idx = open(self.root / "ledger.idx", "a+b")
+        self._pairs = open(self.root / "ledger.pairs", "a+b")
+        self._late_f = open(self.root / "ledger.late", "a+b")
+        self._late: Dict[int, float] = {}  # index position -> own t, for records indexed at a later t
+        self._count = 0
+        self._data_end = 0
+        self._last_t = float("-inf")
+        self._recover()
+        self._closed = False
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="ledger-flush", daemon=True)
+        self._flusher.start()
+
+    # ---------- Open / recovery ----------
+    def _recover(self) -> None:
+        self._pairs.seek(0)
+        for line in self._pairs.read().decode("utf-8").splitlines():
+            self._pair_ids[line] = len(self._pair_names)
+            self._pair_names.append(line)
+
+        data_size = os.fstat(self._data.fileno()).st_size
+        idx_size = os.fstat(self._idx.fileno()).st_size
+        n = idx_size // _ENTRY.size
+        # drop a torn entry and entries whose line never reached the data file
+        while n and self._entry(n - 1)[1] >= data_size:
+            n -= 1
+        if n:
+            # the newest indexed line may itself be torn
+            off = self._entry(n - 1)[1]
+            nl = os.pread(self._data.fileno(), data_size - off, off).find(b"\n")
+            if nl >= 0:
+                self._data_end = off + nl + 1
+            else:
+                n -= 1
+                self._data_end = off
+        if n * _ENTRY.size != idx_size:
+            self._idx.truncate(n * _ENTRY.size)
+        self._count = n
+        if n:
+            self._last_t = self._entry(n - 1)[0]
+        self._late_f.seek(0)
+        late = self._late_f.read()
+        kept = 0
+        for pos, t in _LATE.iter_unpack(late[: len(late) - len(late) % _LATE.size]):
+            if pos >= n:
+                break
+            self._late[pos] = t
+            kept += 1
+        if kept * _LATE.size != len(late):
+            self._late_f.truncate(kept * _LATE.size)
+        # lines written after the last indexed one (crash before the index write)
+        tail = os.pread(self._data.fileno(), data_size - self._data_end, self._data_end)
+        complete = tail.rfind(b"\n") + 1
+        entries = bytearray()
+        late = bytearray()
+        off = self._data_end
+        for line in tail[:complete].splitlines(keepends=True):
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            own = _finite_t(rec.get("t") if isinstance(rec, dict) else None)
+            if own is None:  # unusable t (written before append validated it): index it like a torn line
+                own = self._last_t
+            t = max(own, self._last_t)
+            if own < t:
+                self._late[self._count] = own
+                late += _LATE.pack(self._count, own)
+            pair = rec.get("pair", "") if isinstance(rec, dict) else ""
+            entries += _ENTRY.pack(t, off, self._pair_id(str(pair), persist=True))
+            self._last_t = t
+            self._count += 1
+            off += len(line)
+        if late:
+            self._late_f.write(late)
+            self._late_f.flush()
+        if entries:
+            self._idx.write(entries)
+            self._idx.flush()
+            LOG.warning("Ledger recovery: re-indexed %d records", len(entries) // _ENTRY.size)
+        if off < data_size:
+            LOG.warning("Ledger recovery: truncating %d bytes of torn data", data_size - off)
+            self._data.truncate(off)
+        self._data_end = off
+
+    def _pair_id(self, pair: str, persist: bool = False) -> int:
+        pid = self._pair_ids.get(pair)
+        if pid is None:
+            pid = len(self._pair_names)
+            self._pair_ids[pair] = pid
+            self._pair_names.append(pair)
+            self._pairs.write(pair.encode("utf-8") + b"\n")
+            if persist:
+                self._pairs.flush()
+        return pid
+
+    def _entry(self, i: int) -> Tuple[float, int, int]:
+        return _ENTRY.unpack(os.pread(self._idx.fileno(), _ENTRY.size, i * _ENTRY.size))
+
+    # ---------- Writes ----------
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Buffer one record (a `t` epoch timestamp is added when missing).
+        Raises ValueError when `t` is not a finite number.
+        """
+        if "t" not in record:
+            record = dict(record, t=time.time())
+        t = record["t"]
+        if isinstance(t, bool) or not isinstance(t, (int, float)) or not math.isfinite(t):
+            raise ValueError(f"ledger record t must be a finite epoch timestamp, got {t!r}")
+        line = json.dumps(record, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+        item = (float(t), str(record.get("pair", "")), line)
+        with self._lock:
+            if self._closed:
+                raise ValueError("ledger is closed")
+            self._buf.append(item)
+            full = len(self._buf) >= self.flush_every
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Commit buffered records (write + fsync); returns how many were committed."""
+        with self._io_lock:
+            with self._lock:
+                batch, self._buf = self._buf, []
+            if not batch:
+                return 0
+            t0 = time.perf_counter()
+            data = bytearray()
+            index = bytearray()
+            late: Dict[int, float] = {}
+            off = self._data_end
+            last_t = self._last_t
+            for i, (t, pair, line) in enumerate(batch, self._count):
+                if t < last_t:
+                    late[i] = t
+                last_t = max(t, last_t)
+                index += _ENTRY.pack(last_t, off, self._pair_id(pair))
+                data += line
+                off += len(line)
+            self._data.write(data)
+            self._data.flush()
+            self._pairs.flush()
+            if late:
+                self._late_f.write(b"".join(_LATE.pack(i, t) for i, t in late.items()))
+                self._late_f.flush()
+            if self.fsync:
+                os.fsync(self._data.fileno())
+                os.fsync(self._pairs.fileno())
+                if late:
+                    os.fsync(self._late_f.fileno())
+            self._late.update(late)
+            self._idx.write(index)
+            self._idx.flush()
+            if self.fsync:
+                os.fsync(self._idx.fileno())
+            self._data_end = off
+            self._last_t = last_t
+            self._count += len(batch)
+            metrics.observe("ledger_flush_seconds", time.perf_counter() - t0)
+            return len(batch)
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:  # keep the flusher alive; the next round retries
+                LOG.error("Ledger flush failed: %s", e)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        for f in (self._data, self._idx, self._pairs, self._late_f):
+            f.close()
+
+    def __enter__(self) -> "Ledger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ---------- Reads ----------
+    def __len__(self) -> int:
+        """Committed records (buffered ones are not counted until flushed)."""
+        return self._count
+
+    def _bisect(self, t: float, right: bool) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            et = self._entry(mid)[0]
+            if et < t or (right and et == t):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _entries(self, lo: int, hi: int) -> List[Tuple[float, int, int]]:
+        return list(_ENTRY.iter_unpack(os.pread(self._idx.fileno(), (hi - lo) * _ENTRY.size, lo * _ENTRY.size)))
+
+    def _end_of(self, i: int) -> int:
+        return self._entry(i + 1)[1] if i + 1 < self._count else self._data_end
+
+    def _read_range(self, lo: int, hi: int, pair_id: Optional[int]) -> List[Dict[str, Any]]:
+        if lo >= hi:
+            return []
+        fd = self._data.fileno()
+        if pair_id is None:
+            start = self._entry(lo)[1]
+            block = os.pread(fd, self._end_of(hi - 1) - start, start)
+            return [json.loads(line) for line in block.splitlines()]
+        # filter on the index, then read only the matching lines
+        entries = self._entries(lo, hi)
+        end = self._end_of(hi - 1)
+        out = []
+        for i, (_, off, pid) in enumerate(entries):
+            if pid == pair_id:
+                nxt = entries[i + 1][1] if i + 1 < len(entries) else end
+                out.append(json.loads(os.pread(fd, nxt - off, off)))
+        return out
+
+    def _read_at(self, positions: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Records at the given (sorted) index positions; each run of consecutive ones is one read."""
+        fd = self._data.fileno()
+        out: Dict[int, Dict[str, Any]] = {}
+        k = 0
+        while k < len(positions):
+            first = last = positions[k]
+            while k + 1 < len(positions) and positions[k + 1] == last + 1:
+                k += 1
+                last += 1
+            start = self._entry(first)[1]
+            block = os.pread(fd, self._end_of(last) - start, start)
+            for i, line in enumerate(block.splitlines(), first):
+                out[i] = json.loads(line)
+            k += 1
+        return out
+
+    def tail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest `limit` records, oldest first. Flushes pending records first."""
+        self.flush()
+        with self._io_lock:
+            n = self._count
+            return self._read_range(max(0, n - int(limit)), n, None) if limit > 0 else []
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        pair: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Records with start <= t <= end (either bound optional), optionally for
+        one pair, oldest first; `limit` keeps the newest matches.
+        """
+        self.flush()
+        if limit is not None and limit <= 0:
+            return []
+        with self._io_lock:
+            pair_id = None
+            if pair is not None:
+                pair_id = self._pair_ids.get(pair)
+                if pair_id is None:
+                    return []
+
+            def keep(t: float) -> bool:
+                return (start is None or t >= start) and (end is None or t <= end)
+
+            lo = self._bisect(start, right=False) if start is not None else 0
+            hi = self._bisect(end, right=True) if end is not None else self._count
+            # late records indexed past `end` (their index t is later than their own)
+            picked = [(t, i) for i, t in self._late.items() if i >= hi and keep(t)]
+            if pair_id is not None:
+                picked = [(t, i) for t, i in picked if self._entry(i)[2] == pair_id]
+            step = hi - lo if limit is None else max(int(limit), _SCAN_BLOCK)
+            i = hi
+            while i > lo:
+                j = max(lo, i - step)
+                for k, (et, _, pid) in enumerate(self._entries(j, i), j):
+                    if pair_id is None or pid == pair_id:
+                        t = self._late.get(k, et)
+                        if keep(t):
+                            picked.append((t, k))
+                i = j
+                if limit is not None and len(picked) >= limit and i > lo:
+                    picked.sort()
+                    # entries before i have an own t <= their index t <= that of entry i - 1
+                    if picked[-int(limit)][0] >= self._entry(i - 1)[0]:
+                        break
+            picked.sort()
+            if limit is not None:
+                picked = picked[-int(limit):]
+            recs = self._read_at(sorted(i for _, i in picked))
+        return [recs[i] for _, i in picked]
+
+
+# ---------- Module-level default ledger ----------
+_LEDGER: Optional[Ledger] = None
+_LEDGER_LOCK = threading.Lock()
+
+
+def configure_ledger(storage_dir: str = "storage", **kwargs: Any) -> Ledger:
+    """(Re)open the default ledger used by `append_fill` / `read_ledger`."""
+    global _LEDGER
+    with _LEDGER_LOCK:
+        if _LEDGER is not None:
+            _LEDGER.close()
+        _LEDGER = Ledger(storage_dir, **kwargs)
+        return _LEDGER
+
+
+def _ledger() -> Ledger:
+    global _LEDGER
+    with _LEDGER_LOCK:
+        if _LEDGER is None:
+            _LEDGER = Ledger()
+        return _LEDGER
+
+
+@atexit.register
+def _close_default() -> None:
+    if _LEDGER is not None:
+        _LEDGER.close()
+
 
 def append_fill(record: Dict[str, Any]) -> None:
-    # Step 1 no-op
-    return None
+    _ledger().append(record)
+
 
 def read_ledger(limit: int = 100) -> List[Dict[str, Any]]:
-    return []
+    return _ledger().tail(limit)
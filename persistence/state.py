@@ -1,10 +1,255 @@
 """
-State I/O (stub). JSON later.
+Crash-safe bot state: periodic atomic snapshots plus an append-only delta journal.
+
+Files under `<storage_dir>/state/`:
+- `snapshot.json`  {"seq": N, "state": {...}}; replaced atomically (tmp + fsync + rename)
+- `journal.jsonl`  one line per commit: {"seq": n, "ops": [["set", [k1, k2, ...], value],
+                   ["del", [k1, ...]]]}; fsynced on commit
+
+A commit appends one journal line holding only the changed paths, so the
+per-cycle cost follows the size of the change, not of the state. Every
+`snapshot_every` commits the whole state is snapshotted and the journal is
+truncated. `load()` reads the snapshot and replays journal lines with a
+higher seq (a crash between the rename and the truncate is harmless); a torn
+final line is dropped.
+
+Use `set`/`delete` + `commit` to record explicit changes, or `save(state)` to
+let the store diff against its own copy (two levels deep, e.g.
+`positions -> pair`).
 """
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Sequence
+import copy
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from utils import metrics
+from utils.logging import get_logger
+
+LOG = get_logger("persistence.state")
+
+KeyPath = Sequence[str]
+
+_MISSING = object()
+
+
+def _apply(state: Dict[str, Any], op: Sequence[Any]) -> None:
+    kind, path = op[0], op[1]
+    node = state
+    for key in path[:-1]:
+        nxt = node.get(key)
+        if not isinstance(nxt, dict):
+            nxt = node[key] = {}
+        node = nxt
+    if kind == "set":
+        node[path[-1]] = op[2]
+    elif kind == "del":
+        node.pop(path[-1], None)
+    else:
+        raise ValueError(f"Unknown journal op: {kind}")
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # pragma: no cover - not supported on every platform
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StateStore:
+    def __init__(self, storage_dir: str = "storage", snapshot_every: int = 500, fsync: bool = True) -> None:
+        if snapshot_every <= 0:
+            raise ValueError("snapshot_every must be > 0")
+        self.root = Path(storage_dir) / "state"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.snapshot_every = int(snapshot_every)
+        self.fsync = bool(fsync)
+        self.state: Dict[str, Any] = {}
+        self.seq = 0
+        self._since_snapshot = 0
+        self._pending: List[List[Any]] = []
+        self._lock = threading.Lock()
+        self._journal = None
+        self.load()
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.root / "snapshot.json"
+
+    @property
+    def journal_path(self) -> Path:
+        return self.root / "journal.jsonl"
+
+    # ---------- Recovery ----------
+    def load(self) -> Dict[str, Any]:
+        """Rebuild the state from the snapshot and the journal; returns it."""
+        with self._lock:
+            state: Dict[str, Any] = {}
+            seq = 0
+            try:
+                with self.snapshot_path.open("r", encoding="utf-8") as f:
+                    snap = json.load(f)
+                state, seq = snap.get("state", {}), int(snap.get("seq", 0))
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                LOG.error("Unreadable state snapshot %s: %s", self.snapshot_path, e)
+                raise
+            replayed = 0
+            good = 0
+            try:
+                with self.journal_path.open("rb") as f:
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break
+                        good += len(line)
+                        if entry["seq"] <= seq:
+                            continue
+                        for op in entry["ops"]:
+                            _apply(state, op)
+                        seq = entry["seq"]
+                        replayed += 1
+            except FileNotFoundError:
+                pass
+            if self.journal_path.exists() and self.journal_path.stat().st_size > good:
+                LOG.warning("State journal: dropping %d bytes of torn tail", self.journal_path.stat().st_size - good)
+                os.truncate(self.journal_path, good)
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = self.journal_path.open("ab")
+            self.state, self.seq, self._since_snapshot = state, seq, replayed
+            self._pending = []
+            return state
+
+    # ---------- Changes ----------
+    def set(self, path: KeyPath, value: Any) -> None:
+        """
+        Stage `state[path[0]]...[path[-1]] = value` (applied immediately,
+        persisted on commit). A copy is stored, so later changes to `value`
+        are not picked up.
+        """
+        op = ["set", list(path), copy.deepcopy(value)]
+        with self._lock:
+            _apply(self.state, op)
+            self._pending.append(op)
+
+    def delete(self, path: KeyPath) -> None:
+        op = ["del", list(path)]
+        with self._lock:
+            _apply(self.state, op)
+            self._pending.append(op)
+
+    def commit(self) -> int:
+        """Journal the staged changes as one durable record; returns its seq (0 when nothing changed)."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            ops, self._pending = self._pending, []
+            t0 = time.perf_counter()
+            self.seq += 1
+            line = json.dumps({"seq": self.seq, "ops": ops}, separators=(",", ":"), default=str)
+            self._journal.write(line.encode("utf-8") + b"\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._snapshot()
+            metrics.observe("state_commit_seconds", time.perf_counter() - t0)
+            return self.seq
+
+    def save(self, state: Dict[str, Any]) -> int:
+        """
+        Persist `state` by journaling only what differs from the stored state:
+        top-level keys, and second-level keys of dict values. Unchanged entries
+        cost one in-memory comparison; only changed ones are copied and written.
+        """
+        ops: List[List[Any]] = []
+        with self._lock:
+            cur = self.state
+            for key, val in state.items():
+                old = cur.get(key, _MISSING)
+                if isinstance(val, dict) and isinstance(old, dict):
+                    for sub, sval in val.items():
+                        if old.get(sub, _MISSING) != sval:
+                            ops.append(["set", [key, sub], copy.deepcopy(sval)])
+                    ops.extend(["del", [key, sub]] for sub in old if sub not in val)
+                elif old is _MISSING or old != val:
+                    ops.append(["set", [key], copy.deepcopy(val)])
+            ops.extend(["del", [key]] for key in cur if key not in state)
+            for op in ops:
+                _apply(cur, op)
+            self._pending.extend(ops)
+        return self.commit()
+
+    def snapshot(self) -> None:
+        """Write a full snapshot now and truncate the journal."""
+        with self._lock:
+            self._snapshot()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # ---------- Internals ----------
+    def _snapshot(self) -> None:
+        tmp = self.snapshot_path.with_suffix(".json.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "state": self.state}, f, separators=(",", ":"), default=str)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        if self.fsync:
+            _fsync_dir(self.root)
+        # journal lines up to self.seq are now covered by the snapshot
+        self._journal.truncate(0)
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._since_snapshot = 0
+
+
+# ---------- Module-level default store ----------
+_STORE: Optional[StateStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def configure_state(storage_dir: str = "storage", **kwargs: Any) -> StateStore:
+    """(Re)open the default store used by `load_state` / `save_state`."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is not None:
+            _STORE.close()
+        _STORE = StateStore(storage_dir, **kwargs)
+        return _STORE
+
+
+def _store() -> StateStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = StateStore()
+        return _STORE
+
 
 def load_state() -> Dict[str, Any]:
-    return {"initialized": True}
+    state = copy.deepcopy(_store().load())
+    state.setdefault("initialized", True)
+    return state
+
 
 def save_state(state: Dict[str, Any]) -> None:
-    return None
+    _store().save(state)
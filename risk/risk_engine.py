@@ -1,16 +1,195 @@
 """
-Risk engine (stub). Later enforces per-trade and daily loss caps.
+Risk engine: per-trade and daily loss caps, checked in constant time.
+
+The gate keeps running totals instead of re-reading the ledger:
+- realized equity, updated by `on_fill` with each fill's net PnL
+- unrealized PnL, pushed by `mark` (e.g. `PaperPortfolio.unrealized`)
+- equity at the start of the current UTC day (rolled over on the first
+  fill/mark/check carrying a timestamp from a later day)
+- notional exposure per pair
+
+Rules for entries (exits and holds always pass; they only reduce risk):
+- daily: once today's PnL (realized + unrealized change) reaches
+  -daily_loss_cap of the day's starting equity, entries become "hold".
+- per trade: the loss at the stop, `size_fraction * |price - stop| / price`
+  of equity, may not exceed `per_trade_loss_cap` nor the remaining daily
+  budget; larger proposals are scaled down. Without a stop the whole notional
+  counts as at risk. A stop or take-profit on the wrong side of the price
+  (a long's stop above it, a short's below) is dropped first, so it can
+  neither shrink the measured risk nor reach the broker.
+- per pair: notional may not exceed `max_pair_exposure` of equity.
 """
-from typing import Dict, Any
+from typing import Any, Dict, Mapping, Optional
+import math
+import time
+
+from contracts.action_contract import levels_on_side
+
+_DAY = 86_400
+
+
+def _num(val: Any) -> Optional[float]:
+    try:
+        f = float(val)
+    except (TypeError, ValueError):
+        return None
+    return f if math.isfinite(f) else None
+
 
 class RiskGate:
-    def __init__(self, per_trade_loss_cap: float = 0.01, daily_loss_cap: float = 0.05) -> None:
+    def __init__(
+        self,
+        per_trade_loss_cap: float = 0.01,
+        daily_loss_cap: float = 0.05,
+        equity: float = 10_000.0,
+        max_pair_exposure: float = 1.0,
+    ) -> None:
         self.per_trade_loss_cap = float(per_trade_loss_cap)
         self.daily_loss_cap = float(daily_loss_cap)
+        self.max_pair_exposure = float(max_pair_exposure)
+        self.realized_equity = float(equity)
+        self.unrealized = 0.0
+        self.exposure: Dict[str, float] = {}
+        self.total_exposure = 0.0
+        self.day: Optional[int] = None
+        self.day_start_equity = float(equity)
+
+    # ---------- Running totals ----------
+    @property
+    def equity(self) -> float:
+        return self.realized_equity + self.unrealized
+
+    @property
+    def daily_pnl(self) -> float:
+        return self.equity - self.day_start_equity
+
+    @property
+    def daily_budget(self) -> float:
+        """Loss (in equity units) still allowed today; 0 once the cap is hit."""
+        return max(0.0, self.daily_loss_cap * self.day_start_equity + min(0.0, self.daily_pnl))
+
+    def _roll(self, t: Optional[float]) -> None:
+        day = int((time.time() if t is None else t) // _DAY)
+        if self.day is None or day > self.day:
+            self.day = day
+            self.day_start_equity = self.equity
+
+    def on_fill(self, fill: Dict[str, Any], t: Optional[float] = None) -> None:
+        """Fold one fill (PaperBroker/PaperPortfolio shape) into the totals."""
+        if not fill.get("filled"):
+            return
+        self._roll(t)
+        self.realized_equity += float(fill.get("pnl") or 0.0)
+        pair = fill.get("pair", "")
+        action = fill.get("action", "")
+        old = self.exposure.pop(pair, 0.0)
+        self.total_exposure -= old
+        if action.startswith("enter"):
+            notional = abs(float(fill.get("size") or 0.0) * float(fill.get("price") or 0.0))
+            self.exposure[pair] = notional
+            self.total_exposure += notional
+
+    def mark(self, unrealized: float, t: Optional[float] = None) -> None:
+        """Set the current unrealized PnL total (O(1))."""
+        self._roll(t)
+        self.unrealized = float(unrealized)
+
+    # ---------- Gating ----------
+    @staticmethod
+    def _hold(proposal: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        out = dict(proposal)
+        out.update(action="hold", size_fraction=0.0, reason=reason)
+        return out
+
+    @staticmethod
+    def _check_levels(proposal: Dict[str, Any], price: Optional[float]) -> Dict[str, Any]:
+        """Entry with wrong-side (or unusable) stop/take-profit set to None."""
+        if not price:
+            return proposal
+        side = 1 if proposal.get("action") == "enter_long" else -1
+        sl, tp = levels_on_side(side, price, proposal.get("stop"), proposal.get("take_profit"))
+        dropped = [k for k, v in (("stop", sl), ("take_profit", tp)) if v is None and proposal.get(k) is not None]
+        out = dict(proposal, stop=sl, take_profit=tp)
+        if dropped:
+            out["reason"] = f"{proposal.get('reason', '')} [ignored wrong-side or invalid {'/'.join(dropped)}]".strip()
+        return out
+
+    def _risk_per_unit(self, proposal: Dict[str, Any], price: Optional[float]) -> float:
+        """Fraction of equity lost at the stop per unit of size_fraction."""
+        stop = _num(proposal.get("stop"))
+        if price and stop is not None and stop > 0:
+            return abs(price - stop) / price
+        return 1.0
+
+    def _gate_entry(self, proposal: Dict[str, Any], price: Optional[float], pair: Optional[str], budget: float) -> Dict[str, Any]:
+        if self.equity <= 0 or budget <= 1e-9 * self.equity:  # float dust from gate_batch counts as spent
+            return self._hold(proposal, "daily loss cap reached")
+        proposal = self._check_levels(proposal, price)
+        size = float(proposal.get("size_fraction") or 0.0)
+        per_unit = self._risk_per_unit(proposal, price)
+        cap = min(self.per_trade_loss_cap, budget / self.equity)
+        limit = cap / per_unit if per_unit > 0 else size
+        if pair is not None:
+            room = self.max_pair_exposure - self.exposure.get(pair, 0.0) / self.equity
+            limit = min(limit, max(0.0, room))
+        if limit <= 0:
+            return self._hold(proposal, "pair exposure cap reached")
+        if size <= limit:
+            return proposal
+        out = dict(proposal)
+        out["size_fraction"] = limit
+        out["reason"] = f"{proposal.get('reason', '')} [size capped by risk]".strip()
+        return out
+
+    def check_and_gate(
+        self,
+        proposal: Dict[str, Any],
+        price: Optional[float] = None,
+        pair: Optional[str] = None,
+        t: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Gate one validated contract. Exits/holds pass through; entries may be
+        scaled down or downgraded to "hold". Constant time.
+        """
+        self._roll(t)
+        if not str(proposal.get("action", "hold")).startswith("enter"):
+            return proposal
+        return self._gate_entry(proposal, _num(price), pair, self.daily_budget)
+
+    def entry_risk(self, proposal: Dict[str, Any], price: Optional[float]) -> float:
+        """Equity lost at the stop if a gated entry fills (0 for anything else)."""
+        if not str(proposal.get("action", "hold")).startswith("enter"):
+            return 0.0
+        return float(proposal.get("size_fraction") or 0.0) * self._risk_per_unit(proposal, _num(price)) * self.equity
 
-    def check_and_gate(self, proposal: Dict[str, Any]) -> Dict[str, Any]:
+    def gate_batch(
+        self,
+        proposals: Mapping[str, Dict[str, Any]],
+        prices: Mapping[str, float],
+        t: Optional[float] = None,
+        budget: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
         """
-        For Step 1, pass-through.
-        Later: downgrade actions to 'hold' when caps are tripped.
+        Gate a whole cycle ({pair: contract}) at once. Entries are admitted in
+        order of confidence and share one daily budget, so together they can't
+        risk more than what is left of the daily cap. `budget` (equity units,
+        at most `daily_budget`) narrows it for a caller that gates a cycle in
+        several batches and has already admitted some risk.
         """
-        return proposal
+        self._roll(t)
+        out: Dict[str, Dict[str, Any]] = {}
+        entries = []
+        for pair, prop in proposals.items():
+            if str(prop.get("action", "hold")).startswith("enter"):
+                entries.append((pair, prop))
+            else:
+                out[pair] = prop
+        entries.sort(key=lambda item: -float(item[1].get("confidence") or 0.0))
+        left = self.daily_budget if budget is None else max(0.0, min(float(budget), self.daily_budget))
+        for pair, prop in entries:
+            price = _num(prices.get(pair))
+            gated = self._gate_entry(prop, price, pair, left)
+            left -= self.entry_risk(gated, price)
+            out[pair] = gated
+        return out
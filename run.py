@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import sys
 from executor.loop import run_single_cycle
-from utils.logging import get_logger
+from executor.scheduler import Scheduler
+from utils import metrics
+from utils.logging import configure_logging, get_logger
 from config import load_config
 
 LOG = get_logger("run")
@@ -12,8 +15,11 @@ def parse_args():
     p.add_argument("--pair", type=str, default=None, help="Trading pair, e.g., BTC/EUR (overrides config)")
     p.add_argument("--timeframe", type=str, default=None, help="Candle timeframe (e.g., 1m, 5m, 15m) (overrides config)")
     p.add_argument("--paper", action="store_true", help="REQUIRED: enforce paper trading only")
-    p.add_argument("--auto-eur", action="store_true", help="(Later) trade all EUR-quoted pairs")
-    p.add_argument("--loop-interval", type=int, default=15, help="Seconds between cycles (later used)")
+    p.add_argument("--auto-eur", action="store_true", help="Trade all EUR-quoted pairs")
+    p.add_argument("--ws-feed", action="store_true",
+                   help="React to candle closes on Kraken's WebSocket feed (REST only seeds and fills gaps)")
+    p.add_argument("--loop-interval", type=int, default=None,
+                   help="Seconds between re-polls while a closed candle is not published yet (overrides config)")
     p.add_argument("--dry-run", action="store_true", help="Run a single placeholder cycle and exit")
     p.add_argument("--config", type=str, default="config.toml", help="Path to TOML config file")
     return p.parse_args()
@@ -25,11 +31,13 @@ def main():
         sys.exit(2)
 
     cfg = load_config(args.config)
+    configure_logging(cfg.logs_dir, fmt=cfg.log_format, level=cfg.log_level, rate_limit=cfg.log_rate_limit)
 
     # CLI overrides config
     pair = args.pair or cfg.default_pair
     timeframe = args.timeframe or cfg.timeframe
     auto_eur = args.auto_eur or cfg.auto_eur
+    ws_feed = args.ws_feed or cfg.ws_feed
 
     LOG.info("Starting in PAPER mode.")
     LOG.info("Config loaded from %s", args.config)
@@ -38,12 +46,35 @@ def main():
         pair, timeframe, args.dry_run, auto_eur, cfg.fee_bps, cfg.per_trade_loss_cap, cfg.daily_loss_cap
     )
 
-    # Step 1: placeholder single cycle
-    run_single_cycle(pair=pair, timeframe=timeframe, dry_run=args.dry_run)
+    metrics.configure_metrics(cfg.metrics_enabled, path=cfg.metrics_file or None, port=cfg.metrics_port)
 
-    # Later: continuous loop unless --dry-run
-    if not args.dry_run:
-        LOG.info("Continuous loop will be implemented in a later step.")
+    if args.dry_run:
+        run_single_cycle(
+            pair=pair,
+            timeframe=timeframe,
+            dry_run=True,
+            storage_dir=cfg.storage_dir,
+            auto_eur=auto_eur,
+            cfg=cfg,
+        )
+        LOG.info("Exit.")
+        return 0
+
+    # Continuous loop: one scheduler keeps clients and state across cycles
+    scheduler = Scheduler(
+        cfg,
+        pairs=None if auto_eur else [pair],
+        timeframe=timeframe,
+        auto_eur=auto_eur,
+        ws_feed=ws_feed,
+        poll_interval=args.loop_interval,
+    )
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
     LOG.info("Exit.")
     return 0
 
@@ -0,0 +1,153 @@
+"""`HTTPPool` against a local `http.server`, and `CircuitBreaker` state transitions."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Iterator, List
+import gzip
+import threading
+
+import pytest
+
+from utils import http_pool
+from utils.http_pool import CircuitBreaker, CircuitOpenError, HTTPPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive unless a response says otherwise
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.ports.append(self.client_address[1])
+        body = f"hello {len(self.server.ports)}".encode()
+        gz = self.path.startswith("/gzip")
+        if gz:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path.startswith("/drop"):
+            # keep-alive as far as the client knows, but the server hangs up
+            self.close_connection = True
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.ports: List[int] = []
+    th = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    th.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    th.join()
+
+
+@pytest.fixture
+def pool(server: ThreadingHTTPServer) -> Iterator[HTTPPool]:
+    p = HTTPPool(f"http://127.0.0.1:{server.server_address[1]}", max_size=2, timeout=5.0)
+    yield p
+    p.close()
+
+
+# ---------- HTTPPool ----------
+def test_keep_alive_reuses_one_connection(server, pool):
+    for i in range(3):
+        status, _, body = pool.request("GET", "/x")
+        assert status == 200 and body == f"hello {i + 1}".encode()
+    assert len(server.ports) == 3
+    assert len(set(server.ports)) == 1
+
+
+def test_gzip_body_is_decoded(server, pool):
+    status, headers, body = pool.request("GET", "/gzip")
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert body == b"hello 1"
+
+
+def test_stale_pooled_connection_is_retried_on_a_fresh_one(server, pool):
+    assert pool.request("GET", "/drop")[0] == 200  # pooled, then closed by the server
+    status, _, body = pool.request("GET", "/x")
+    assert status == 200 and body == b"hello 2"
+    assert len(set(server.ports)) == 2
+
+
+def test_fresh_connection_errors_are_not_retried():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    port = srv.server_address[1]
+    srv.server_close()  # nothing listens there any more
+    p = HTTPPool(f"http://127.0.0.1:{port}", timeout=2.0)
+    with pytest.raises(OSError):
+        p.request("GET", "/x")
+
+
+def test_stream_returns_a_fully_read_connection_to_the_pool(server, pool):
+    with pool.stream("GET", "/x") as resp:
+        assert resp.read() == b"hello 1"
+    with pool.stream("GET", "/x") as resp:
+        resp.read(2)  # abandoned mid-body: the connection must not be reused
+    assert pool.request("GET", "/x")[2] == b"hello 3"
+    assert server.ports[0] == server.ports[1] != server.ports[2]
+
+
+# ---------- CircuitBreaker ----------
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    fake = SimpleNamespace(now=1000.0)
+    fake.monotonic = lambda: fake.now
+    monkeypatch.setattr(http_pool, "time", fake)
+    return fake
+
+
+def test_breaker_opens_after_threshold(clock):
+    cb = CircuitBreaker(failure_threshold=3, reset_timeout=10.0)
+    for _ in range(2):
+        cb.before_call()
+        cb.record_failure()
+    assert cb.state == "closed"
+    cb.before_call()
+    cb.record_failure()
+    assert cb.state == "open"
+    clock.now += 9.0
+    with pytest.raises(CircuitOpenError):
+        cb.before_call()
+
+
+def test_breaker_success_resets_the_failure_count(clock):
+    cb = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    cb.record_failure()
+    cb.record_success()
+    cb.record_failure()
+    assert cb.state == "closed"
+
+
+def test_half_open_trial_success_closes(clock):
+    cb = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    cb.record_failure()
+    clock.now += 10.0
+    assert cb.state == "half_open"
+    cb.before_call()  # the single trial call
+    assert cb.state == "open"
+    with pytest.raises(CircuitOpenError):  # others keep failing fast meanwhile
+        cb.before_call()
+    cb.record_success()
+    assert cb.state == "closed"
+    cb.before_call()
+
+
+def test_half_open_trial_failure_reopens(clock):
+    cb = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    cb.record_failure()
+    clock.now += 10.0
+    cb.before_call()
+    cb.record_failure()
+    assert cb.state == "open"
+    clock.now += 5.0
+    with pytest.raises(CircuitOpenError):
+        cb.before_call()
+    clock.now += 5.0
+    assert cb.state == "half_open"
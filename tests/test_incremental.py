@@ -0,0 +1,88 @@
+"""`IncrementalIndicators` / `IndicatorEngine` against the batch `compute_indicators`."""
+from typing import Any, Dict, List
+
+import pytest
+
+from bench.synthetic import generate_series
+from indicators.incremental import IncrementalIndicators, IndicatorEngine
+from indicators.indicators import compute_indicators
+
+KEYS = ("rsi", "ema12", "ema26", "ema_cross", "atr", "vwap", "price", "timeframe")
+
+
+def _candles(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    return list(generate_series(n, "5m", seed=seed))
+
+
+def _assert_same(got: Dict[str, Any], want: Dict[str, Any]) -> None:
+    assert set(got) == set(KEYS)
+    for k in KEYS:
+        if isinstance(want[k], float):
+            assert got[k] == pytest.approx(want[k], rel=1e-9), k
+        else:
+            assert got[k] == want[k], k
+
+
+def test_matches_batch_bar_by_bar_through_warmup():
+    candles = _candles(80)
+    inc = IncrementalIndicators("5m")
+    for i, c in enumerate(candles):
+        _assert_same(inc.update(c), compute_indicators(candles[: i + 1], "5m"))
+    assert inc.count == len(candles)
+
+
+def test_warmup_values_are_none_until_each_period():
+    candles = _candles(30)
+    inc = IncrementalIndicators("5m")
+    seen = [inc.update(c) for c in candles]
+    assert seen[0]["price"] == candles[0]["c"] and seen[0]["vwap"] is None
+    assert seen[10]["ema12"] is None and seen[11]["ema12"] is not None
+    assert seen[13]["rsi"] is None and seen[14]["rsi"] is not None
+    assert seen[13]["atr"] is None and seen[14]["atr"] is not None
+    assert seen[24]["ema26"] is None and seen[24]["ema_cross"] is None
+    assert seen[25]["ema26"] is not None and seen[25]["ema_cross"] is not None
+
+
+def test_same_t_revision_replaces_the_forming_bar():
+    candles = _candles(60)
+    inc = IncrementalIndicators("5m")
+    inc.seed(candles[:-1])
+    last = dict(candles[-1])
+    for scale in (0.98, 1.03, 1.0):  # the forming bar is revised several times
+        rev = dict(last, c=last["o"] * scale, h=max(last["h"], last["o"] * scale),
+                   l=min(last["l"], last["o"] * scale), v=last["v"] * scale)
+        _assert_same(inc.update(rev), compute_indicators(candles[:-1] + [rev], "5m"))
+    assert inc.count == len(candles)
+    nxt = _candles(61)[-1]
+    _assert_same(inc.update(nxt), compute_indicators(candles[:-1] + [rev, nxt], "5m"))
+
+
+def test_out_of_order_candle_is_rejected():
+    candles = _candles(5)
+    inc = IncrementalIndicators("5m")
+    inc.seed(candles)
+    with pytest.raises(ValueError):
+        inc.update(candles[2])
+
+
+def test_gap_reseed_matches_batch_on_the_new_window():
+    candles = _candles(200)
+    engine = IndicatorEngine("5m")
+    engine.seed("X/EUR", candles[:50])
+    window = candles[120:]  # bars 50..119 were missed: reseed rather than bridge the gap
+    _assert_same(engine.seed("X/EUR", window), compute_indicators(window, "5m"))
+    assert engine.get("X/EUR").count == len(window)
+    assert engine.get("X/EUR").last_t == window[-1]["t"]
+
+
+def test_checkpoint_round_trip_continues_identically(tmp_path):
+    candles = _candles(90)
+    engine = IndicatorEngine("5m")
+    engine.seed("X/EUR", candles[:70])
+    path = str(tmp_path / "indicators_5m.json")
+    assert engine.save(path) == 1
+    restored = IndicatorEngine("5m")
+    assert restored.load(path) == 1
+    for c in candles[70:]:
+        got = restored.update("X/EUR", c)
+    _assert_same(got, compute_indicators(candles, "5m"))
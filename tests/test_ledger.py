@@ -0,0 +1,103 @@
+"""`Ledger` range queries, late records and reopen."""
+from typing import Any, Dict, Iterator, List, Optional
+import random
+
+import pytest
+
+from persistence.ledger import Ledger
+
+
+@pytest.fixture
+def ledger(tmp_path) -> Iterator[Ledger]:
+    led = Ledger(str(tmp_path), fsync=False)
+    yield led
+    led.close()
+
+
+def _ts(rows: List[Dict[str, Any]]) -> List[float]:
+    return [r["t"] for r in rows]
+
+
+def _brute(records: List[Dict[str, Any]], start: Optional[float], end: Optional[float], pair: Optional[str],
+           limit: Optional[int]) -> List[Dict[str, Any]]:
+    rows = sorted((r for r in records if (start is None or r["t"] >= start) and (end is None or r["t"] <= end)
+                   and (pair is None or r["pair"] == pair)), key=lambda r: r["t"])
+    return rows[max(0, len(rows) - limit):] if limit is not None else rows
+
+
+def test_late_record_is_found_by_its_own_t(ledger):
+    for t in (100, 200, 150):
+        ledger.append({"t": t, "pair": "X/EUR"})
+    assert _ts(ledger.query(end=160)) == [100, 150]
+    assert _ts(ledger.query(start=140, end=160)) == [150]
+    assert _ts(ledger.query(start=140)) == [150, 200]
+    assert _ts(ledger.query(end=160, pair="X/EUR", limit=1)) == [150]
+    assert _ts(ledger.query()) == [100, 150, 200]
+
+
+def test_late_records_survive_a_reopen(tmp_path):
+    with Ledger(str(tmp_path), fsync=False) as led:
+        for t in (100, 200, 150, 300, 120):
+            led.append({"t": t, "pair": "X/EUR"})
+    with Ledger(str(tmp_path), fsync=False) as led:
+        assert len(led) == 5
+        assert _ts(led.query(start=110, end=160)) == [120, 150]
+        assert _ts(led.tail(2)) == [300, 120]  # tail stays in append order
+
+
+def test_reindexed_tail_keeps_its_late_records(tmp_path):
+    with Ledger(str(tmp_path), fsync=False) as led:
+        for t in (100, 200, 150, 300, 120):
+            led.append({"t": t, "pair": "X/EUR"})
+    root = tmp_path / "ledger"
+    # crash after the data write: the index and late list only cover the first two records
+    (root / "ledger.idx").write_bytes((root / "ledger.idx").read_bytes()[: 2 * 20])
+    (root / "ledger.late").write_bytes(b"")
+    with Ledger(str(tmp_path), fsync=False) as led:
+        assert len(led) == 5
+        assert _ts(led.query(end=160)) == [100, 120, 150]
+
+
+def test_queries_match_a_brute_force_filter(ledger):
+    rng = random.Random(7)
+    records = []
+    for i in range(3000):
+        t = i * 10 - (rng.randrange(200) if rng.random() < 0.05 else 0)  # some late records
+        records.append({"t": t, "pair": rng.choice(["A/EUR", "B/EUR", "C/EUR"]), "i": i})
+        ledger.append(records[-1])
+    for _ in range(200):
+        start = rng.choice([None, rng.randrange(30000)])
+        end = rng.choice([None, rng.randrange(30000)])
+        pair = rng.choice([None, "A/EUR", "C/EUR"])
+        limit = rng.choice([None, 1, 5, 50, 400])
+        got = ledger.query(start=start, end=end, pair=pair, limit=limit)
+        assert [r["i"] for r in got] == [r["i"] for r in _brute(records, start, end, pair, limit)]
+
+
+def test_pair_limit_query_reads_only_the_newest_index_blocks(ledger, monkeypatch):
+    for i in range(20000):
+        ledger.append({"t": i, "pair": "A/EUR" if i % 10 else "B/EUR"})
+    ledger.flush()
+    read = []
+    entries = ledger._entries
+    monkeypatch.setattr(ledger, "_entries", lambda lo, hi: read.append(hi - lo) or entries(lo, hi))
+    assert _ts(ledger.query(pair="B/EUR", limit=3)) == [19970, 19980, 19990]
+    assert sum(read) < 1000
+
+
+@pytest.mark.parametrize("t", ["2024-01-01T00:00:00Z", None, float("nan"), float("inf"), True])
+def test_append_rejects_a_non_numeric_t(ledger, t):
+    with pytest.raises(ValueError):
+        ledger.append({"t": t, "pair": "X/EUR"})
+    assert len(ledger) == 0 and ledger.query() == []
+
+
+def test_unindexed_line_with_a_bad_t_is_indexed_at_the_last_t(tmp_path):
+    with Ledger(str(tmp_path), fsync=False) as led:
+        led.append({"t": 100, "pair": "X/EUR"})
+    with open(tmp_path / "ledger" / "ledger.jsonl", "ab") as f:  # e.g. written by an older version
+        f.write(b'{"t":"2024-01-01T00:00:00Z","pair":"X/EUR"}\n{"t":null}\n{"t":200,"pair":"X/EUR"}\n')
+    with Ledger(str(tmp_path), fsync=False) as led:
+        assert len(led) == 4
+        assert [r["t"] for r in led.query(start=100)] == [100, "2024-01-01T00:00:00Z", None, 200]
+        assert _ts(led.query(start=150)) == [200]
@@ -0,0 +1,112 @@
+"""`Resampler` / `resample_series` against direct per-bucket aggregation."""
+from typing import Any, Dict, List, Sequence
+
+import pytest
+
+from bench.synthetic import generate_series
+from data.resample import Resampler, resample_series
+
+PAIR = "X/EUR"
+STEPS = {"5m": 300, "15m": 900, "1h": 3600}
+
+
+def _candles(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    return list(generate_series(n, "1m", seed=seed))
+
+
+def _direct(candles: Sequence[Dict[str, Any]], step: int) -> List[Dict[str, Any]]:
+    """Group base candles by bucket open time and aggregate each group from scratch."""
+    out: List[Dict[str, Any]] = []
+    for c in candles:
+        bucket = c["t"] - c["t"] % step
+        if out and out[-1]["t"] == bucket:
+            b = out[-1]
+            b["h"], b["l"], b["c"], b["v"] = max(b["h"], c["h"]), min(b["l"], c["l"]), c["c"], b["v"] + c["v"]
+        else:
+            out.append({"t": bucket, "o": c["o"], "h": c["h"], "l": c["l"], "c": c["c"], "v": c["v"]})
+    return out
+
+
+def _assert_bars(got: Sequence[Dict[str, Any]], want: Sequence[Dict[str, Any]]) -> None:
+    assert [b["t"] for b in got] == [b["t"] for b in want]
+    for g, w in zip(got, want):
+        for k in ("o", "h", "l", "c", "v"):
+            assert g[k] == pytest.approx(w[k], rel=1e-12), (g["t"], k)
+
+
+def _assert_matches(rs: Resampler, candles: Sequence[Dict[str, Any]]) -> None:
+    _assert_bars(list(rs.series(PAIR, "1m")), candles)
+    for tf, step in STEPS.items():
+        _assert_bars(list(rs.series(PAIR, tf)), _direct(candles, step))
+
+
+def test_matches_direct_aggregation():
+    candles = _candles(600)
+    rs = Resampler("1m", tuple(STEPS))
+    rs.ingest(PAIR, generate_series(600, "1m", seed=1))
+    _assert_matches(rs, candles)
+
+
+def test_closed_bars_are_reported_once_and_final():
+    candles = _candles(300)
+    rs = Resampler("1m", tuple(STEPS))
+    closed: Dict[str, List[Dict[str, Any]]] = {tf: [] for tf in STEPS}
+    for c in candles:
+        for tf, bar in rs.push(PAIR, c["t"], c["o"], c["h"], c["l"], c["c"], c["v"]):
+            closed[tf].append(dict(zip(("t", "o", "h", "l", "c", "v"), bar)))
+    for tf, step in STEPS.items():
+        _assert_bars(closed[tf], _direct(candles, step)[:-1])  # the last bucket is still open
+
+
+def test_gaps_leave_missing_buckets_out():
+    candles = _candles(400)
+    # a few missing minutes, and a whole missing hour
+    kept = [c for i, c in enumerate(candles) if i % 37 != 5 and not 120 <= i < 190]
+    rs = Resampler("1m", tuple(STEPS))
+    rs.ingest(PAIR, kept)
+    _assert_matches(rs, kept)
+
+
+def test_same_t_revisions_replace_the_forming_candle():
+    candles = _candles(200)
+    rs = Resampler("1m", tuple(STEPS))
+    final = []
+    for c in candles:
+        for scale in (0.97, 1.04):  # earlier versions of the forming candle
+            rs.push(PAIR, c["t"], c["o"], c["h"] * scale, c["l"] * scale, c["c"] * scale, c["v"] * scale)
+        rs.push(PAIR, c["t"], c["o"], c["h"], c["l"], c["c"], c["v"])
+        final.append(c)
+        if len(final) % 50 == 0:  # check mid-stream too, with the bucket still open
+            _assert_matches(rs, final)
+    _assert_matches(rs, candles)
+
+
+def test_stale_candles_are_ignored():
+    candles = _candles(120)
+    rs = Resampler("1m", tuple(STEPS))
+    rs.ingest(PAIR, candles)
+    old = candles[60]
+    assert rs.push(PAIR, old["t"], 1.0, 1e9, 1e-9, 1.0, 1e9) == []
+    _assert_matches(rs, candles)
+
+
+def test_overlapping_ingest_windows_match_one_pass():
+    candles = _candles(500)
+    rs = Resampler("1m", tuple(STEPS))
+    for end in range(30, len(candles) + 1, 10):
+        rs.ingest(PAIR, candles[max(0, end - 30) : end])  # each window repeats the previous 20 candles
+    _assert_matches(rs, candles)
+
+
+def test_resample_series_matches_direct_aggregation():
+    series = generate_series(600, "1m", seed=3)
+    candles = list(series)
+    for tf, step in STEPS.items():
+        _assert_bars(list(resample_series(series, "1m", tf)), _direct(candles, step))
+
+
+def test_targets_must_be_multiples_of_the_base():
+    with pytest.raises(ValueError):
+        Resampler("5m", ("1m",))
+    with pytest.raises(ValueError):
+        Resampler("1m", ("7m",))
@@ -0,0 +1,74 @@
+"""`Scheduler` driven by `KrakenWSFeed` closes from `devtools.ws_replay_server`."""
+from typing import Any, Dict, List, Tuple
+import asyncio
+import dataclasses
+import json
+import time
+
+from bench.suite import _StandInLLM
+from bench.synthetic import SyntheticMarket
+from config import Config
+from devtools.ws_replay_server import ReplayServer
+from executor.scheduler import Scheduler
+
+PAIRS = ["AAA/EUR", "BBB/EUR"]
+STEP = 60
+T0 = 4_102_444_800  # 2100-01-01: the feed's wall-clock close timer never fires during a test
+
+
+def _ws_candle(pair: str, c: Dict[str, Any]) -> Dict[str, Any]:
+    return {"symbol": pair, "open": c["o"], "high": c["h"], "low": c["l"], "close": c["c"], "volume": c["v"],
+            "interval_begin": time.strftime("%Y-%m-%dT%H:%M:%S.000000000Z", time.gmtime(c["t"])), "interval": 1}
+
+
+def _messages(market: SyntheticMarket, closing: List[str]) -> List[Tuple[None, str]]:
+    """History up to the forming bar for every pair, then the next bar opening (which closes it) for `closing`."""
+    history = {p: list(market.get_ohlc_series(p, "1m", limit=3)) for p in PAIRS}
+    nxt = {"t": market.now_t + STEP, "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 1.0}
+    return [
+        (None, json.dumps({"channel": "ohlc", "type": "snapshot",
+                           "data": [_ws_candle(p, c) for p in PAIRS for c in history[p]]})),
+        (None, json.dumps({"channel": "ohlc", "type": "update", "data": [_ws_candle(p, nxt) for p in closing]})),
+    ]
+
+
+def _run(tmp_path: Any, market: SyntheticMarket, server: ReplayServer, offset: float, grace: float) -> Scheduler:
+    """Two cycles from T0 + `offset`: the first seeds over REST, the second handles the candle opening at T0."""
+    start = time.time()
+
+    async def main() -> Scheduler:
+        port = await server.start()
+        cfg = dataclasses.replace(Config(), storage_dir=str(tmp_path), timeframe="1m", scan_rate=1e9,
+                                  scan_burst=10**9, indicator_checkpoint_every=0, ws_feed=True,
+                                  ws_url=f"ws://127.0.0.1:{port}")
+        sched = Scheduler(cfg, pairs=PAIRS, kraken=market, llm=_StandInLLM(), batch_window=0.0, grace=grace,
+                          clock=lambda: T0 + offset + (time.time() - start))
+        try:
+            await asyncio.wait_for(sched.run(max_cycles=2), 10.0)
+        finally:
+            sched.close()
+            await server.stop()
+        return sched
+
+    return asyncio.run(main())
+
+
+def test_feed_closes_drive_the_pipeline_without_rest(tmp_path):
+    market = SyntheticMarket(PAIRS, "1m", seed=3, start=T0 + 1)
+    server = ReplayServer(_messages(market, PAIRS))
+    calls = market.calls
+    sched = _run(tmp_path, market, server, offset=1.0, grace=2.0)  # without the feed: a minute until T0 + 60
+    assert sched.cycles == 2 and sched.decisions == 2 * len(PAIRS)
+    assert sched.done_t == {p: market.now_t for p in PAIRS}
+    assert market.calls == calls + len(PAIRS)  # the seed only; the closed candle came from the ring
+    assert sched.feed is None and len(server.subscriptions) == 1
+
+
+def test_pair_the_feed_does_not_close_falls_back_to_rest(tmp_path):
+    market = SyntheticMarket(PAIRS, "1m", seed=3, start=T0 + 1)
+    server = ReplayServer(_messages(market, PAIRS[:1]))
+    calls = market.calls
+    market.advance()  # REST has the next bar by the time the scheduler polls it
+    sched = _run(tmp_path, market, server, offset=STEP - 0.5, grace=0.2)  # BBB goes to REST at T0 + 60.2
+    assert sched.done_t == {p: T0 for p in PAIRS}
+    assert market.calls == calls + 2 * len(PAIRS) - 1  # seeds (one REST call each) + the gap fill for BBB
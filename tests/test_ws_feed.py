@@ -0,0 +1,179 @@
+"""`KrakenWSFeed` against `devtools.ws_replay_server`, and `CandleRing`."""
+from typing import Any, Callable, Dict, List, Tuple
+import asyncio
+import json
+import time
+
+import pytest
+
+from data.ring_buffer import CandleRing
+from data.ws_feed import KrakenWSFeed
+from devtools.ws_replay_server import ReplayServer
+from utils.websocket import accept
+
+PAIR = "BTC/EUR"
+STEP = 3600
+T0 = 4_102_444_800  # 2100-01-01: far enough ahead that the close timer never fires during a test
+
+
+def _iso(t: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000000000Z", time.gmtime(t))
+
+
+def _candle(t: int, close: float) -> Dict[str, Any]:
+    return {"symbol": PAIR, "open": 100.0, "high": max(100.0, close) + 1.0, "low": min(100.0, close) - 1.0,
+            "close": close, "volume": 2.0, "interval_begin": _iso(t), "interval": 60}
+
+
+def _ohlc(kind: str, *candles: Dict[str, Any]) -> Tuple[None, str]:
+    return None, json.dumps({"channel": "ohlc", "type": kind, "data": list(candles)})
+
+
+HEARTBEAT = (None, json.dumps({"channel": "heartbeat"}))
+
+# history t0..t1, then live updates: t1 revised, t2 opens (t1 closed), t2 revised
+# twice, a stale t0 update, t3 opens (t2 closed)
+MESSAGES = [
+    _ohlc("snapshot", _candle(T0, 100.0), _candle(T0 + STEP, 101.0)),
+    HEARTBEAT,
+    _ohlc("update", _candle(T0 + STEP, 102.0)),
+    _ohlc("update", _candle(T0 + 2 * STEP, 103.0)),
+    _ohlc("update", _candle(T0 + 2 * STEP, 104.0)),
+    HEARTBEAT,
+    _ohlc("update", _candle(T0 + 2 * STEP, 105.0)),
+    _ohlc("update", _candle(T0, 99.0)),
+    _ohlc("update", _candle(T0 + 3 * STEP, 106.0)),
+]
+
+
+async def _until(cond: Callable[[], bool], timeout: float = 5.0) -> None:
+    end = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > end:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def _run_feed(server: ReplayServer, done: Callable[[KrakenWSFeed, List[Dict[str, Any]]], bool],
+              **kwargs: Any) -> Tuple[KrakenWSFeed, List[Dict[str, Any]]]:
+    closes: List[Dict[str, Any]] = []
+
+    async def main() -> KrakenWSFeed:
+        port = await server.start()
+        feed = KrakenWSFeed([PAIR], "1h", url=f"ws://127.0.0.1:{port}",
+                            on_close=lambda pair, c: closes.append(dict(c, pair=pair)), **kwargs)
+        task = asyncio.ensure_future(feed.run(max_backoff=0.05))
+        try:
+            await _until(lambda: done(feed, closes))
+        finally:
+            feed.stop()
+            await asyncio.wait_for(task, 5.0)
+            await server.stop()
+        return feed
+
+    return asyncio.run(main()), closes
+
+
+def test_one_close_per_candle_with_revised_values():
+    feed, closes = _run_feed(ReplayServer(MESSAGES), lambda f, c: len(f.rings.ring(PAIR)) == 4 and len(c) >= 2)
+    assert [(c["t"], c["c"]) for c in closes] == [(T0 + STEP, 102.0), (T0 + 2 * STEP, 105.0)]
+    assert all(c["pair"] == PAIR for c in closes)
+
+
+def test_forming_candle_revision_overwrites_in_place():
+    feed, _ = _run_feed(ReplayServer(MESSAGES), lambda f, c: len(c) >= 2)
+    ring = feed.rings.get(PAIR)
+    series = ring.series()
+    assert list(series.t) == [T0 + i * STEP for i in range(4)]  # revisions and the stale update added nothing
+    assert list(series.c) == [100.0, 102.0, 105.0, 106.0]
+
+
+def test_resubscribes_after_the_server_drops_the_connection():
+    server = ReplayServer(MESSAGES, drop_after=6)  # cut before t2's last revision and t3
+
+    def done(feed: KrakenWSFeed, closes: List[Dict[str, Any]]) -> bool:
+        return feed.connects >= 2 and len(server.subscriptions) >= 2
+
+    feed, closes = _run_feed(server, done)
+    assert server.connections >= 2
+    assert all(s["params"]["channel"] == "ohlc" and s["params"]["symbol"] == [PAIR] for s in server.subscriptions)
+    # the replayed history after the reconnect does not report t1 a second time
+    assert [c["t"] for c in closes] == [T0 + STEP]
+
+
+def test_silent_connection_times_out_and_reconnects():
+    async def main() -> int:
+        async def silent(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            ws = await accept(reader, writer)
+            try:
+                await ws.recv()  # the subscribe; then nothing, like a half-open connection
+                await asyncio.sleep(5.0)
+            except Exception:
+                pass
+            finally:
+                writer.close()
+
+        srv = await asyncio.start_server(silent, "127.0.0.1", 0)
+        feed = KrakenWSFeed([PAIR], "1h", url=f"ws://127.0.0.1:{srv.sockets[0].getsockname()[1]}",
+                            recv_timeout=0.1)
+        task = asyncio.ensure_future(feed.run(max_backoff=0.05))
+        try:
+            await _until(lambda: feed.connects >= 3)
+        finally:
+            feed.stop()
+            await asyncio.wait_for(task, 5.0)
+            srv.close()
+        return feed.connects
+
+    assert asyncio.run(main()) >= 3
+
+
+# ---------- CandleRing ----------
+def _push(ring: CandleRing, t: int, c: float) -> str:
+    return ring.push(t, c, c + 1.0, c - 1.0, c, 1.0)
+
+
+def test_ring_append_revise_and_stale():
+    ring = CandleRing(4)
+    assert _push(ring, 60, 1.0) == "append"
+    assert _push(ring, 120, 2.0) == "append"
+    v = ring.version
+    assert _push(ring, 120, 2.5) == "revise"
+    assert ring.version == v + 1
+    assert _push(ring, 60, 9.0) == "stale"
+    assert len(ring) == 2 and ring.last()["c"] == 2.5
+
+
+def test_ring_wraps_into_two_segments_oldest_first():
+    ring = CandleRing(4)
+    for i in range(6):
+        _push(ring, 60 * i, float(i))
+    segs = ring.segments("c")
+    assert len(segs) == 2
+    assert [x for seg in segs for x in seg] == [2.0, 3.0, 4.0, 5.0]
+    assert list(ring.series().t) == [120, 180, 240, 300]
+    assert list(ring.series(2).c) == [4.0, 5.0]
+    assert ring.last_t == 300
+
+
+def test_ring_segments_are_views_not_copies():
+    ring = CandleRing(3)
+    for i in range(2):
+        _push(ring, 60 * i, float(i))
+    (seg,) = ring.segments("c")
+    _push(ring, 60, 7.0)  # revision written in place is visible through the view
+    assert seg[1] == 7.0
+
+
+def test_ring_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        CandleRing(0)
+
+
+def test_ring_since_returns_only_newer_candles_across_the_wrap():
+    ring = CandleRing(4)
+    for i in range(6):
+        _push(ring, 60 * i, float(i))
+    assert [c["t"] for c in ring.since(180)] == [240, 300]
+    assert [c["c"] for c in ring.since(-1)] == [2.0, 3.0, 4.0, 5.0]
+    assert ring.since(300) == [] and CandleRing(2).since(0) == []
@@ -0,0 +1,208 @@
+"""
+Keep-alive HTTP transport (stdlib only).
+
+- `HTTPPool`: thread-safe pool of persistent `http.client` connections to one
+  origin, so repeated calls skip the TCP/TLS handshake. Responses sent with
+  `Content-Encoding: gzip` are decoded transparently; `stream` hands back the
+  unread response for incremental (e.g. SSE) consumption.
+- `CircuitBreaker`: after `failure_threshold` consecutive failures, calls fail
+  fast with `CircuitOpenError` for `reset_timeout` seconds, then one trial call
+  is let through (half-open).
+- `backoff_delay`: exponential backoff with jitter for retry loops.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+import gzip
+import http.client
+import queue
+import random
+import threading
+import time
+import urllib.parse
+
+# Errors that mean an idle keep-alive connection was closed by the server.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a remote that has been failing repeatedly."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError while open; let a single trial through once the timeout elapsed."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(f"circuit open; retry in {remaining:.1f}s")
+            # half-open: re-arm so concurrent callers keep failing fast until the trial reports
+            self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(backoff: float, attempt: int) -> float:
+    """Exponential backoff with "equal jitter": half fixed, half random."""
+    base = backoff * (2 ** attempt)
+    return base / 2.0 + random.uniform(0.0, base / 2.0)
+
+
+class HTTPPool:
+    def __init__(self, base_url: str, max_size: int = 8, timeout: float = 10.0, user_agent: Optional[str] = None) -> None:
+        parts = urllib.parse.urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = float(timeout)
+        self.user_agent = user_agent
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=max_size)
+
+    def _new_conn(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._new_conn(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        body: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        url = f"{self.base_path}{path}"
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        hdrs = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        if self.user_agent:
+            hdrs["User-Agent"] = self.user_agent
+        if headers:
+            hdrs.update(headers)
+        t = self.timeout if timeout is None else float(timeout)
+        conn, reused = self._acquire(t)
+        try:
+            try:
+                conn.request(method, url, body=body, headers=hdrs)
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                if not reused:
+                    raise
+                # the server dropped the idle connection; retry once on a fresh one
+                conn.close()
+                conn = self._new_conn(t)
+                conn.request(method, url, body=body, headers=hdrs)
+                resp = conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+        return conn, resp
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """
+        Send one request on a pooled connection and return (status, headers, body).
+        The body is fully read (and gunzipped) so the connection can be reused.
+        """
+        conn, resp = self._send(method, path, params, body, headers, timeout)
+        try:
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        if (resp.headers.get("Content-Encoding") or "").lower() == "gzip":
+            data = gzip.decompress(data)
+        return resp.status, resp.headers, data
+
+    @contextmanager
+    def stream(
+        self,
+        method: str,
+        path: str,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Send one request and yield the unread response for incremental reads
+        (`timeout` then bounds each read, not the whole body). On exit the
+        connection returns to the pool only if the body was read to the end;
+        otherwise it is closed, which is how a streamed reply is cancelled.
+        """
+        hdrs = {"Accept-Encoding": "identity"}
+        if headers:
+            hdrs.update(headers)
+        conn, resp = self._send(method, path, None, body, hdrs, timeout)
+        try:
+            yield resp
+        except BaseException:
+            conn.close()
+            raise
+        if resp.isclosed() and not resp.will_close:
+            self._release(conn)
+        else:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
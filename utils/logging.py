@@ -1,29 +1,237 @@
+"""
+Central, non-blocking logging setup.
+
+Every logger from `get_logger` shares one `QueueHandler`; a single
+`QueueListener` thread formats the records and writes them to the console
+and to a rotating `<logs_dir>/app.log`. The calling thread only pays for an
+enqueue (%-formatting is deferred too, unless an argument is mutable).
+
+`configure_logging` (called once the config is loaded) picks the logs
+directory, the level, plain text or compact JSON lines, and an optional
+per-call-site rate limit for lines below WARNING. Structured fields go in
+`extra` and appear as JSON keys:
+
+    LOG.debug("pair done", extra={"pair": pair, "stage": "pipeline", "latency_ms": 12.5})
+
+Until it is called, records go to `logs/` (the directory is created on the
+first write) in the text format.
+"""
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional, Set, Tuple
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
 from pathlib import Path
 
+_TEXT_FMT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+_DATE_FMT = "%Y-%m-%d %H:%M:%S"
+_IMMUTABLE = (str, int, float, bool, bytes, type(None))
+# attributes every LogRecord has; anything else came from `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line: ts, level, logger, msg, then any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, val in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                out[key] = val
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, separators=(",", ":"), default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per call site (logger + message template) for records below
+    `exempt_level`: at most `burst` lines at once, refilled at `rate` per
+    second. The next line let through reports how many were dropped.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None, exempt_level: int = logging.WARNING) -> None:
+        super().__init__()
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, int(rate)))
+        self.exempt_level = exempt_level
+        self._buckets: Dict[Tuple[str, Any], List[float]] = {}  # key -> [tokens, stamp, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                b = self._buckets[key] = [self.burst, now, 0]
+            b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+            b[1] = now
+            if b[0] < 1.0:
+                b[2] += 1
+                return False
+            b[0] -= 1.0
+            dropped, b[2] = int(b[2]), 0
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} similar lines suppressed]"
+            record.suppressed = dropped
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def handle(self, record: logging.LogRecord) -> bool:
+        # shared by every logger: a record propagating from "a.b" to "a" is queued once
+        if getattr(record, "_queued", False):
+            return False
+        record._queued = True
+        return super().handle(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener formats later; only merge now if an argument could change meanwhile
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE) for a in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """Creates its directory on the first write rather than at import time."""
+
+    def _open(self):  # type: ignore[override]
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+# ---------- Shared state ----------
+_LOCK = threading.RLock()
+_QUEUE: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_HANDLER = _DeferredQueueHandler(_QUEUE)
+_LISTENER: Optional[QueueListener] = None
+_SINKS: List[logging.Handler] = []
+_LEVEL = logging.INFO
+_LOGGERS: Set[str] = set()
+
+
+def _build_sinks(logs_dir: str, fmt: str) -> List[logging.Handler]:
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(fmt=_TEXT_FMT, datefmt=_DATE_FMT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    fh = _LazyRotatingFileHandler(Path(logs_dir) / "app.log", maxBytes=1_000_000, backupCount=3, delay=True)
+    fh.setFormatter(formatter)
+    return [console, fh]
+
+
+def _start(sinks: List[logging.Handler]) -> None:
+    global _LISTENER, _SINKS
+    _SINKS = sinks
+    _LISTENER = QueueListener(_QUEUE, *sinks, respect_handler_level=True)
+    _LISTENER.start()
+
+
+def _stop() -> None:
+    """Drain the queue, then close the current sinks."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+    for h in _SINKS:
+        h.close()
+
+
+def configure_logging(
+    logs_dir: str = "logs",
+    fmt: str = "text",
+    level: str = "INFO",
+    rate_limit: float = 0.0,
+) -> None:
+    """
+    (Re)configure the sinks of every logger. `fmt` is "text" or "json";
+    `rate_limit` > 0 caps each call site below WARNING at that many lines/s.
+    """
+    global _LEVEL
+    if fmt not in ("text", "json"):
+        raise ValueError(f"Unknown log format: {fmt}")
+    lvl = logging.getLevelName(str(level).upper())
+    if not isinstance(lvl, int):
+        raise ValueError(f"Unknown log level: {level}")
+    with _LOCK:
+        _stop()
+        for f in list(_HANDLER.filters):
+            _HANDLER.removeFilter(f)
+        if rate_limit > 0:
+            _HANDLER.addFilter(RateLimitFilter(rate_limit))
+        _LEVEL = lvl
+        for name in _LOGGERS:
+            logging.getLogger(name).setLevel(lvl)
+        _start(_build_sinks(logs_dir, fmt))
+
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger  # already configured
-
-    logger.setLevel(logging.INFO)
-    fmt = logging.Formatter(
-        fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-
-    # Console
-    ch = logging.StreamHandler()
-    ch.setFormatter(fmt)
-    logger.addHandler(ch)
-
-    # File (rotating)
-    logs_dir = Path("logs")
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    fh = RotatingFileHandler(logs_dir / "app.log", maxBytes=1_000_000, backupCount=3)
-    fh.setFormatter(fmt)
-    logger.addHandler(fh)
-
+    with _LOCK:
+        if name in _LOGGERS:
+            return logger  # already configured
+        if _LISTENER is None and not _SINKS:
+            _start(_build_sinks("logs", "text"))
+        logger.setLevel(_LEVEL)
+        logger.addHandler(_HANDLER)
+        _LOGGERS.add(name)
     return logger
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    with _LOCK:
+        _stop()
+
+
+class _DirectQueue:
+    """Stands in for the queue in forked children: hands records straight to the sinks."""
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        for h in _SINKS:
+            if record.levelno >= h.level:
+                h.handle(record)
+
+
+def _before_fork() -> None:
+    # don't fork while the listener is mid-write: the stream's own lock would stay held in the child
+    for h in _SINKS:
+        h.acquire()
+
+
+def _after_fork_in_parent() -> None:
+    for h in reversed(_SINKS):
+        h.release()
+
+
+def _after_fork_in_child() -> None:
+    # The listener thread does not survive fork, and pool workers exit without
+    # running atexit, so a queue would never be drained: write synchronously.
+    global _LISTENER, _LOCK
+    _LOCK = threading.RLock()
+    _LISTENER = None
+    for h in reversed(_SINKS):
+        try:
+            h.release()
+        except RuntimeError:
+            pass  # logging's own at-fork hook already replaced the lock
+    _HANDLER.queue = _DirectQueue()
+
+
+os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent,
+                    after_in_child=_after_fork_in_child)
@@ -0,0 +1,359 @@
+"""
+In-process metrics: counters and latency histograms, exported in the
+Prometheus text format (to a file and/or a local HTTP endpoint). Stdlib only.
+
+Histograms are HDR-style: microsecond values go into log-linear buckets (8
+sub-buckets per power of two, so every bucket is within 12.5% of its value)
+stored sparsely, which keeps `observe` O(1) with no preset range. Exports
+fold them into the fixed `le` boundaries of `EXPORT_BUCKETS`; `quantile`
+reads the fine buckets directly.
+
+Metrics are off until `configure_metrics(True, ...)`. While off, `timer`
+returns a shared no-op context manager, `inc`/`observe` return after one
+global check and `timed` functions pay a single extra call, so the hooks can
+stay on hot paths.
+
+    with metrics.timer("cycle_stage_seconds", stage="fetch"):
+        ...
+    metrics.inc("kraken_http_retries_total", path=path)
+
+    @metrics.timed("indicators_seconds")
+    def compute_indicators(...): ...
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import functools
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from utils.logging import get_logger
+
+LOG = get_logger("utils.metrics")
+
+_SUB_BITS = 3
+_SUB = 1 << _SUB_BITS          # sub-buckets per power of two
+_LINEAR = _SUB << 1            # values below this get one bucket each (exact)
+
+EXPORT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                  0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _bucket_index(us: int) -> int:
+    if us < _LINEAR:
+        return us
+    shift = us.bit_length() - (_SUB_BITS + 1)
+    return (shift << _SUB_BITS) + (us >> shift)
+
+
+def _bucket_bounds(idx: int) -> Tuple[int, int]:
+    """[lower, upper) of bucket `idx` in microseconds."""
+    if idx < _LINEAR:
+        return idx, idx + 1
+    shift = (idx >> _SUB_BITS) - 1
+    mantissa = idx - (shift << _SUB_BITS)
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0) -> None:
+        with self._lock:
+            self.value += n
+
+
+class Histogram:
+    """Log-linear latency histogram (seconds in, microsecond resolution)."""
+
+    __slots__ = ("counts", "count", "sum", "max", "_lock")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        if seconds < 0 or seconds != seconds:
+            return
+        idx = _bucket_index(int(seconds * 1e6))
+        with self._lock:
+            self.counts[idx] = self.counts.get(idx, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0..1) in seconds: midpoint of the bucket holding it."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for idx in sorted(self.counts):
+                seen += self.counts[idx]
+                if seen >= rank:
+                    lo, hi = _bucket_bounds(idx)
+                    return min(self.max, (lo + hi) / 2e6)
+            return self.max
+
+    def cumulative(self, bounds: Tuple[float, ...] = EXPORT_BUCKETS) -> List[int]:
+        """Counts <= each bound (a fine bucket counts once its midpoint is <= the bound)."""
+        with self._lock:
+            items = sorted(self.counts.items())
+        out = []
+        i = seen = 0
+        for le in bounds:
+            while i < len(items):
+                lo, hi = _bucket_bounds(items[i][0])
+                if (lo + hi) / 2e6 > le:
+                    break
+                seen += items[i][1]
+                i += 1
+            out.append(seen)
+        return out
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+
+def _fmt_num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._counters: Dict[str, Dict[LabelKey, Counter]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def counter(self, name: str, labels: LabelKey = ()) -> Counter:
+        series = self._counters.get(name)
+        c = series.get(labels) if series is not None else None
+        if c is None:
+            with self._lock:
+                c = self._counters.setdefault(name, {}).setdefault(labels, Counter())
+        return c
+
+    def histogram(self, name: str, labels: LabelKey = ()) -> Histogram:
+        series = self._histograms.get(name)
+        h = series.get(labels) if series is not None else None
+        if h is None:
+            with self._lock:
+                h = self._histograms.setdefault(name, {}).setdefault(labels, Histogram())
+        return h
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            histograms = {n: dict(s) for n, s in self._histograms.items()}
+        for name in sorted(counters):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, c in sorted(counters[name].items()):
+                lines.append(f"{name}{_fmt_labels(key)} {_fmt_num(c.value)}")
+        for name in sorted(histograms):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in sorted(histograms[name].items()):
+                for le, n in zip(EXPORT_BUCKETS, h.cumulative()):
+                    lines.append(f"{name}_bucket{_fmt_labels(key, ('le', _fmt_num(le)))} {n}")
+                lines.append(f"{name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {h.count}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {h.sum!r}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{name{labels}: {count, p50, p99, max}} for every histogram (for logs)."""
+        out = {}
+        with self._lock:
+            histograms = {n: dict(s) for n, s in self._histograms.items()}
+        for name, series in histograms.items():
+            for key, h in series.items():
+                out[name + _fmt_labels(key)] = {
+                    "count": h.count, "p50": h.quantile(0.5), "p99": h.quantile(0.99), "max": h.max,
+                }
+        return out
+
+
+# ---------- Export ----------
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")  # type: ignore[attr-defined]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass  # scrapes are not worth a log line each
+
+
+def write_file(registry: Registry, path: str) -> None:
+    """Write the exposition atomically (e.g. for node_exporter's textfile collector)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(p.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, p)
+
+
+def serve(registry: Registry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `/metrics` on `host:port` from a daemon thread; returns the server (port 0 = any)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.registry = registry  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# ---------- Module-level default registry ----------
+_REGISTRY: Optional[Registry] = None
+_FILE: Optional[str] = None
+_SERVER: Optional[ThreadingHTTPServer] = None
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: Histogram) -> None:
+        self.hist = hist
+        self.t0 = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.hist.observe(time.perf_counter() - self.t0)
+
+
+def configure_metrics(enabled: bool = True, path: Optional[str] = None, port: int = 0) -> Optional[Registry]:
+    """
+    Turn metrics on (fresh registry) or off. With `path`, `write_metrics()`
+    writes the exposition there; with `port`, it is served on 127.0.0.1.
+    """
+    global _REGISTRY, _FILE, _SERVER
+    close_metrics()
+    if not enabled:
+        return None
+    _REGISTRY = Registry()
+    _FILE = path or None
+    if port:
+        _SERVER = serve(_REGISTRY, int(port))
+        LOG.info("Metrics served on http://127.0.0.1:%d/metrics", _SERVER.server_address[1])
+    return _REGISTRY
+
+
+def close_metrics() -> None:
+    global _REGISTRY, _FILE, _SERVER
+    if _SERVER is not None:
+        _SERVER.shutdown()
+        _SERVER.server_close()
+    _REGISTRY, _FILE, _SERVER = None, None, None
+
+
+def registry() -> Optional[Registry]:
+    return _REGISTRY
+
+
+def enabled() -> bool:
+    return _REGISTRY is not None
+
+
+def timer(name: str, **labels: Any) -> Any:
+    """Context manager observing the elapsed seconds into histogram `name`."""
+    reg = _REGISTRY
+    if reg is None:
+        return _NOOP
+    return _Timer(reg.histogram(name, _labels(labels)))
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    reg = _REGISTRY
+    if reg is not None:
+        reg.histogram(name, _labels(labels)).observe(seconds)
+
+
+def inc(name: str, n: float = 1.0, **labels: Any) -> None:
+    reg = _REGISTRY
+    if reg is not None:
+        reg.counter(name, _labels(labels)).inc(n)
+
+
+def timed(name: str, **labels: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of `timer` with fixed labels."""
+    key = _labels(labels)
+
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            reg = _REGISTRY
+            if reg is None:
+                return fn(*args, **kwargs)
+            hist = reg.histogram(name, key)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return inner
+    return wrap
+
+
+def write_metrics() -> None:
+    """Write the exposition to the configured file (no-op when off or without a path)."""
+    if _REGISTRY is None or _FILE is None:
+        return
+    try:
+        write_file(_REGISTRY, _FILE)
+    except OSError as e:
+        LOG.warning("Metrics file write failed: %s", e)
@@ -0,0 +1,194 @@
+"""
+Minimal asyncio WebSocket (RFC 6455) endpoints, stdlib only.
+
+Enough for JSON text feeds: client and server handshakes, masked/unmasked
+frames, fragmented messages, ping/pong and close. No extensions
+(permessage-deflate) and no subprotocol negotiation.
+"""
+from typing import Dict, Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import os
+import ssl
+import struct
+import urllib.parse
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONT = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class ConnectionClosed(Exception):
+    """The peer closed the connection (or it dropped)."""
+
+
+def _accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + _GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def _mask(data: bytes, key: bytes) -> bytes:
+    n = len(data)
+    if n == 0:
+        return data
+    # XOR the whole payload as one big integer instead of byte by byte
+    k = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(k, "little")).to_bytes(n, "little")
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Tuple[str, Dict[str, str]]:
+    raw = await reader.readuntil(b"\r\n\r\n")
+    lines = raw.decode("latin-1").split("\r\n")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+class WebSocket:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, is_client: bool) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._is_client = is_client  # clients mask outgoing frames
+        self.closed = False
+
+    async def _send_frame(self, opcode: int, payload: bytes) -> None:
+        if self.closed:
+            raise ConnectionClosed("send on closed websocket")
+        head = bytearray([0x80 | opcode])
+        mask_bit = 0x80 if self._is_client else 0
+        n = len(payload)
+        if n < 126:
+            head.append(mask_bit | n)
+        elif n < 1 << 16:
+            head.append(mask_bit | 126)
+            head += struct.pack("!H", n)
+        else:
+            head.append(mask_bit | 127)
+            head += struct.pack("!Q", n)
+        if self._is_client:
+            key = os.urandom(4)
+            head += key
+            payload = _mask(payload, key)
+        self._writer.write(bytes(head) + payload)
+        await self._writer.drain()
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        try:
+            b0, b1 = await self._reader.readexactly(2)
+            n = b1 & 0x7F
+            if n == 126:
+                (n,) = struct.unpack("!H", await self._reader.readexactly(2))
+            elif n == 127:
+                (n,) = struct.unpack("!Q", await self._reader.readexactly(8))
+            key = await self._reader.readexactly(4) if b1 & 0x80 else None
+            payload = await self._reader.readexactly(n)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            self.closed = True
+            raise ConnectionClosed(str(e)) from e
+        if key is not None:
+            payload = _mask(payload, key)
+        return bool(b0 & 0x80), b0 & 0x0F, payload
+
+    async def send(self, text: str) -> None:
+        await self._send_frame(OP_TEXT, text.encode("utf-8"))
+
+    async def ping(self, data: bytes = b"") -> None:
+        await self._send_frame(OP_PING, data)
+
+    async def recv(self) -> str:
+        """Return the next text (or binary, decoded) message; answers pings along the way."""
+        parts = []
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    try:
+                        await self._send_frame(OP_CLOSE, payload[:2])
+                    except Exception:
+                        pass
+                await self._shutdown()
+                code = struct.unpack("!H", payload[:2])[0] if len(payload) >= 2 else 1005
+                raise ConnectionClosed(f"closed by peer (code {code})")
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    async def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        try:
+            await self._send_frame(OP_CLOSE, struct.pack("!H", code))
+        except Exception:
+            pass
+        await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        self.closed = True
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def connect(url: str, timeout: float = 10.0, ssl_context: Optional[ssl.SSLContext] = None) -> WebSocket:
+    """Open a client connection to a ws:// or wss:// URL."""
+    parts = urllib.parse.urlsplit(url)
+    secure = parts.scheme == "wss"
+    if parts.scheme not in ("ws", "wss"):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    host = parts.hostname or ""
+    port = parts.port or (443 if secure else 80)
+    ctx = (ssl_context or ssl.create_default_context()) if secure else None
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, ssl=ctx), timeout)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n\r\n"
+    )
+    writer.write(request.encode("ascii"))
+    await writer.drain()
+    status, headers = await asyncio.wait_for(_read_headers(reader), timeout)
+    if " 101 " not in f"{status} " or headers.get("sec-websocket-accept") != _accept_key(key):
+        writer.close()
+        raise ConnectionClosed(f"websocket handshake failed: {status}")
+    return WebSocket(reader, writer, is_client=True)
+
+
+async def accept(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> WebSocket:
+    """Server side: complete the upgrade handshake on a freshly accepted connection."""
+    _request_line, headers = await _read_headers(reader)
+    key = headers.get("sec-websocket-key")
+    if not key or headers.get("upgrade", "").lower() != "websocket":
+        writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+        raise ConnectionClosed("not a websocket upgrade request")
+    writer.write(
+        (
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n"
+        ).encode("ascii")
+    )
+    await writer.drain()
+    return WebSocket(reader, writer, is_client=False)